@@ -0,0 +1,3 @@
+"""
+甘特图 Python 后端工具集（数据导出、索引、查询等）
+"""
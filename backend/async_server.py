@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+"""
+asyncio HTTP/1.1 服务器 - server.py --mode asyncio
+
+    - HTTP/1.1 keep-alive，单线程事件循环处理大量并发连接
+    - 静态文件读入内存缓存（按 mtime 失效），未命中时在线程池中读取
+    - 有预压缩文件（.gz / .br）时按 Accept-Encoding 用 sendfile 直接发送
+    - 与线程模式共用 QueryApi / EventBroadcaster / RenderService（/api/*、/events、POST /render）
+    - /metrics 运行指标（backend.metrics）
+    - SIGINT / SIGTERM 优雅退出：停止接收新连接，等待进行中的请求完成
+"""
+
+import asyncio
+import mimetypes
+import os
+import posixpath
+import signal
+import time
+from email.utils import formatdate, parsedate_to_datetime
+from http import HTTPStatus
+from urllib.parse import unquote, urlsplit
+
+from backend.live_reload import KEEPALIVE_INTERVAL, SSE_KEEPALIVE
+from backend.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, metrics
+from backend.precompress import has_variants, select_variant
+from backend.query_api import etag_matches
+from backend.render_service import MAX_BODY_SIZE, bad_content_length, body_too_large, parse_content_length
+
+# 空闲 keep-alive 连接的超时时间（秒）
+IDLE_TIMEOUT = 15
+# 优雅退出时等待进行中请求的最长时间（秒）
+SHUTDOWN_GRACE = 5
+# 超过此大小的文件不进入内存缓存
+CACHE_MAX_FILE_SIZE = 16 * 1024 * 1024
+
+SERVER_NAME = 'GanttAsync/1.0'
+
+
+class FileCache:
+    """静态文件内存缓存，按 (mtime, size) 判断是否过期"""
+
+    def __init__(self, directory):
+        self.directory = os.path.abspath(directory)
+        self._entries = {}
+
+    def resolve(self, url_path):
+        """URL 路径 -> 服务目录内的文件路径；越界或不存在返回 None"""
+        path = posixpath.normpath(unquote(url_path))
+        parts = [p for p in path.split('/') if p and p not in ('.', '..')]
+        full_path = os.path.join(self.directory, *parts)
+        if not full_path.startswith(self.directory) or not os.path.isfile(full_path):
+            return None
+        return full_path
+
+    async def get(self, full_path):
+        """返回 (内容字节, 修改时间)"""
+        stat = os.stat(full_path)
+        key = (stat.st_mtime_ns, stat.st_size)
+        entry = self._entries.get(full_path)
+        metrics.cache_lookup('static', entry is not None and entry[0] == key)
+        if entry is not None and entry[0] == key:
+            return entry[1], stat.st_mtime
+
+        loop = asyncio.get_running_loop()
+        content = await loop.run_in_executor(None, _read_file, full_path)
+        if stat.st_size <= CACHE_MAX_FILE_SIZE:
+            self._entries[full_path] = (key, content)
+        return content, stat.st_mtime
+
+
+def _read_file(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+class Request:
+    """解析后的请求行与请求头"""
+
+    def __init__(self, method, target, version, headers):
+        self.method = method
+        self.target = target
+        self.version = version
+        self.headers = headers
+        self.body = b''
+        # 指标：状态码与发送字节数
+        self.status = 0
+        self.sent = 0
+        url = urlsplit(target)
+        self.path = url.path
+        self.query = url.query
+
+    @property
+    def keep_alive(self):
+        connection = self.headers.get('connection', '').lower()
+        if self.version == 'HTTP/1.0':
+            return connection == 'keep-alive'
+        return connection != 'close'
+
+
+class AsyncGanttServer:
+    """甘特图 asyncio 服务器"""
+
+    def __init__(self, directory, index_file, query_api, broadcaster=None, extra_headers=None,
+                 render_service=None):
+        self.files = FileCache(directory)
+        self.index_file = index_file
+        self.query_api = query_api
+        self.render_service = render_service
+        self.broadcaster = broadcaster
+        self.extra_headers = extra_headers or {}
+        self._connections = set()
+        self._idle = set()  # 正在等待下一个请求（或挂在 SSE 上）的连接
+        self._closing = asyncio.Event()
+
+    # ------------------------------------------------------------------
+    # 连接与请求解析
+    # ------------------------------------------------------------------
+
+    async def handle_connection(self, reader, writer):
+        task = asyncio.current_task()
+        self._connections.add(task)
+        try:
+            while not self._closing.is_set():
+                self._idle.add(task)
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), IDLE_TIMEOUT)
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+                    break
+                finally:
+                    self._idle.discard(task)
+
+                request = self.parse_request(head)
+                if request is None:
+                    await self.send(writer, None, 400, b'Bad Request', 'text/plain; charset=utf-8')
+                    break
+
+                length = parse_content_length(request.headers.get('content-length'))
+                if length is None or length > MAX_BODY_SIZE:
+                    # 长度非法或过大时不读取请求体，响应后关闭连接
+                    error = bad_content_length if length is None else body_too_large
+                    status, body, content_type, headers = error()
+                    await self.send(writer, None, status, body, content_type, headers)
+                    break
+                try:
+                    # 请求体同样限时读取：客户端中途停止发送或断开时关闭连接
+                    request.body = await asyncio.wait_for(reader.readexactly(length), IDLE_TIMEOUT) if length else b''
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError):
+                    break
+
+                started = metrics.request_started()
+                try:
+                    keep_alive = await self.dispatch(request, writer)
+                finally:
+                    metrics.request_finished(started, request.method, request.path, request.status, request.sent,
+                                             streaming=request.path == '/events')
+                if not keep_alive:
+                    break
+        except (ConnectionResetError, BrokenPipeError):
+            pass
+        finally:
+            self._connections.discard(task)
+            self._idle.discard(task)
+            writer.close()
+
+    @staticmethod
+    def parse_request(head):
+        try:
+            lines = head.decode('iso-8859-1').split('\r\n')
+            method, target, version = lines[0].split(' ', 2)
+        except ValueError:
+            return None
+        headers = {}
+        for line in lines[1:]:
+            if ':' in line:
+                name, value = line.split(':', 1)
+                headers[name.strip().lower()] = value.strip()
+        return Request(method, target, version, headers)
+
+    def response_head(self, request, status, length, content_type=None, headers=None):
+        """状态行 + 响应头，返回 (字节, 是否保持连接)"""
+        keep_alive = request is not None and request.keep_alive and not self._closing.is_set()
+        phrase = HTTPStatus(status).phrase
+        lines = [
+            f'HTTP/1.1 {status} {phrase}',
+            f'Server: {SERVER_NAME}',
+            f'Date: {formatdate(usegmt=True)}',
+            f'Content-Length: {length}',
+            f'Connection: {"keep-alive" if keep_alive else "close"}',
+        ]
+        if content_type:
+            lines.append(f'Content-Type: {content_type}')
+        for name, value in {**self.extra_headers, **(headers or {})}.items():
+            lines.append(f'{name}: {value}')
+        return ('\r\n'.join(lines) + '\r\n\r\n').encode('utf-8'), keep_alive
+
+    async def send(self, writer, request, status, body=b'', content_type=None, headers=None):
+        """写出完整响应，返回是否保持连接"""
+        head, keep_alive = self.response_head(request, status, len(body), content_type, headers)
+        if request is not None:
+            request.status = status
+            request.sent += 0 if request.method == 'HEAD' else len(body)
+        writer.write(head if request is not None and request.method == 'HEAD' else head + body)
+        await writer.drain()
+        return keep_alive
+
+    async def send_static(self, writer, request, path, content_type, headers):
+        """用 loop.sendfile 发送文件（底层为 os.sendfile，不支持时自动回退为读写）"""
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            head, keep_alive = self.response_head(request, 200, size, content_type, headers)
+            writer.write(head)
+            await writer.drain()
+            request.status = 200
+            if request.method != 'HEAD':
+                await asyncio.get_running_loop().sendfile(writer.transport, f)
+                request.sent += size
+        return keep_alive
+
+    # ------------------------------------------------------------------
+    # 路由
+    # ------------------------------------------------------------------
+
+    async def dispatch(self, request, writer):
+        if request.method == 'POST' and self.render_service and self.render_service.handles(request.path):
+            return await self.send_render(request, writer)
+        if request.method not in ('GET', 'HEAD'):
+            return await self.send(writer, request, 405, b'Method Not Allowed',
+                                   'text/plain; charset=utf-8', {'Allow': 'GET, HEAD'})
+
+        if self.query_api.handles(request.path):
+            return await self.send_api(request, writer)
+        if request.path == '/events':
+            return await self.send_event_stream(request, writer)
+        if request.path == '/metrics':
+            return await self.send(writer, request, 200, metrics.render(), METRICS_CONTENT_TYPE)
+
+        # 根路径指向甘特图
+        path = '/' + self.index_file if request.path == '/' else request.path
+        return await self.send_file(request, writer, path)
+
+    async def send_api(self, request, writer):
+        loop = asyncio.get_running_loop()
+        # 首次请求会构建索引（导入 pandas 等），放到线程池避免阻塞事件循环
+        status, body, etag = await loop.run_in_executor(
+            None, self.query_api.handle, request.path, request.query)
+        headers = {'Cache-Control': 'no-cache'}
+        if etag:
+            headers['ETag'] = etag
+            if etag_matches(etag, request.headers.get('if-none-match')):
+                return await self.send(writer, request, 304, headers=headers)
+        return await self.send(writer, request, status, body, 'application/json; charset=utf-8', headers)
+
+    async def send_render(self, request, writer):
+        loop = asyncio.get_running_loop()
+        # 等待渲染结果会阻塞，放到线程池；排队上限由 RenderService 控制
+        status, body, content_type, headers = await loop.run_in_executor(
+            None, self.render_service.handle, request.body, request.query)
+        return await self.send(writer, request, status, body, content_type, headers)
+
+    async def send_file(self, request, writer, path):
+        full_path = self.files.resolve(path)
+        if full_path is None:
+            return await self.send(writer, request, 404, b'File not found', 'text/plain; charset=utf-8')
+
+        content_type = mimetypes.guess_type(full_path)[0] or 'application/octet-stream'
+        headers = {}
+        if has_variants(full_path):
+            headers['Vary'] = 'Accept-Encoding'
+        variant, encoding = select_variant(full_path, request.headers.get('accept-encoding'))
+        if variant is not None:
+            mtime = os.stat(variant).st_mtime
+            headers['Content-Encoding'] = encoding
+        else:
+            content, mtime = await self.files.get(full_path)
+        headers['Last-Modified'] = formatdate(mtime, usegmt=True)
+
+        since = request.headers.get('if-modified-since')
+        if since:
+            try:
+                if int(mtime) <= parsedate_to_datetime(since).timestamp():
+                    return await self.send(writer, request, 304, headers=headers)
+            except (TypeError, ValueError):
+                pass
+
+        if variant is not None:
+            return await self.send_static(writer, request, variant, content_type, headers)
+        return await self.send(writer, request, 200, content, content_type, headers)
+
+    async def send_event_stream(self, request, writer):
+        if self.broadcaster is None:
+            return await self.send(writer, request, 204)
+
+        head = '\r\n'.join([
+            'HTTP/1.1 200 OK',
+            f'Server: {SERVER_NAME}',
+            'Content-Type: text/event-stream',
+            'Connection: close',
+            *(f'{k}: {v}' for k, v in self.extra_headers.items()),
+        ]) + '\r\n\r\n'
+        request.status = 200
+        writer.write(head.encode('utf-8') + b'retry: 1000\n\n')
+        await writer.drain()
+
+        loop = asyncio.get_running_loop()
+        messages = asyncio.Queue()
+        listener = self.broadcaster.subscribe(
+            lambda message: loop.call_soon_threadsafe(messages.put_nowait, message))
+        # SSE 长连接退出时可直接取消
+        self._idle.add(asyncio.current_task())
+        try:
+            while not self._closing.is_set():
+                try:
+                    message = await asyncio.wait_for(messages.get(), KEEPALIVE_INTERVAL)
+                except asyncio.TimeoutError:
+                    message = SSE_KEEPALIVE
+                writer.write(message)
+                await writer.drain()
+        finally:
+            self.broadcaster.unsubscribe(listener)
+        return False
+
+    # ------------------------------------------------------------------
+    # 启动与优雅退出
+    # ------------------------------------------------------------------
+
+    async def serve(self, host, port, on_ready=None):
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        loop = asyncio.get_running_loop()
+        stop = asyncio.Event()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, stop.set)
+            except (NotImplementedError, RuntimeError):
+                pass  # Windows 或非主线程
+
+        if on_ready:
+            on_ready()
+        async with server:
+            await stop.wait()
+
+            # 停止接收新连接，关闭空闲连接，等待进行中的请求完成
+            server.close()
+            self._closing.set()
+            for task in list(self._idle):
+                task.cancel()
+            started = time.monotonic()
+            while self._connections and time.monotonic() - started < SHUTDOWN_GRACE:
+                await asyncio.sleep(0.05)
+            for task in list(self._connections):
+                task.cancel()
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+紧凑列式 JSON - 前端数据（initial-data.json）的可选格式（data_exporter.py --format compact）
+
+普通格式每个任务一个对象，15 个键名逐个重复；紧凑格式按列存放，每个字段一个数组：
+
+    {
+      "format": "gantt-compact/1",          格式及版本（前端据此判断是否需要解码）
+      "tasks": {                            任务表，原来的对象数组换成按列存放
+        "rows": 任务数,
+        "base_date": "2025-12-22",          日期列的基准日
+        "defaults": {"priority": "medium", ...},  整列都等于缺省值的字段不输出，解码时补上
+        "derived": ["duration"],            可由其它列算出、未输出的字段
+        "columns": {
+          "id":         ["module-1", ...],                   普通列：原值数组
+          "parent":     {"ref": [-1, 0, 0, ...], "root": null}, 父任务在本表中的行号，-1 取 root
+          "start_date": {"days": [0, 3, ...]},               距 base_date 的天数
+          "owner":      {"dict": ["", "研发团队"], "codes": [0, 1, ...]},  字典编码
+          "open":       {"bool": [1, 0, ...]}                 0 / 1
+        }
+      },
+      "links": [...],                       其余字段原样保留
+      "config": {...}
+    }
+
+解码规则：普通列中的 null 表示该任务没有这个字段；
+duration 为日历天数（end_date - start_date + 1）。DHTMLX 运行时字段（'$' 开头）不导出。
+前端解码见 frontend/src/utils/compactData.ts。
+"""
+
+from datetime import date
+
+import numpy as np
+
+FORMAT_NAME = 'gantt-compact'
+FORMAT_VERSION = 1
+FORMAT_TAG = f'{FORMAT_NAME}/{FORMAT_VERSION}'
+
+# 字段缺省值：每个任务都有该字段且都等于缺省值时整列不输出（解码时补上）；
+# 某些任务缺少该字段时照常输出该列，缺少的位置为 null，解码后仍然缺少
+DEFAULTS = {
+    'type': 'task',
+    'priority': 'medium',
+    'description': '',
+    'owner': '',
+    'is_milestone': False,
+    'open': True,
+    'progress': 0,
+}
+
+DATE_FIELDS = ('start_date', 'end_date')
+DICT_FIELDS = ('type', 'owner', 'phase', 'status', 'priority', 'view')
+BOOL_FIELDS = ('is_milestone', 'open', 'readonly')
+
+# 取值不是普通日期（YYYY-MM-DD）时，日期列按字典编码
+_DATE_LENGTH = 10
+
+
+def is_compact(data):
+    return isinstance(data, dict) and str(data.get('format', '')).startswith(FORMAT_NAME + '/')
+
+
+def _is_plain_date(value):
+    return isinstance(value, str) and len(value) == _DATE_LENGTH and value[4] == '-' and value[7] == '-'
+
+
+def _dictionary(values):
+    position = {}
+    codes = [position.setdefault(v, len(position)) for v in values]
+    return {'dict': list(position), 'codes': codes}
+
+
+def _duration(start, end):
+    return (date.fromisoformat(end) - date.fromisoformat(start)).days + 1
+
+
+def _ordinals(values):
+    """日期列 -> 日序数数组（已是整数数组时原样返回）"""
+    if values.dtype.kind in 'iu':
+        return values
+    return np.array([date.fromisoformat(v).toordinal() for v in values], dtype=np.int64)
+
+
+def _plain_dates(values):
+    return values.dtype.kind in 'iu' or all(_is_plain_date(v) for v in values)
+
+
+def _object_array(values):
+    return np.fromiter(values, dtype=object, count=len(values))
+
+
+def encode_compact(data):
+    """
+    前端数据对象（build_output 的结果）-> 紧凑格式
+
+    tasks 可以是逐任务对象的列表，也可以是已按列存放、提供 columns() 的对象（data_exporter.TaskColumns）
+    """
+    tasks = data['tasks']
+    if hasattr(tasks, 'columns'):
+        columns = tasks.columns()
+    else:
+        fields = list(dict.fromkeys(k for t in tasks for k in t if not k.startswith('$')))
+        columns = {f: (_object_array([t.get(f) for t in tasks]), all(f in t for t in tasks)) for f in fields}
+    output = {'format': FORMAT_TAG}
+    output.update(data)
+    output['tasks'] = encode_columns(columns, len(tasks))
+    return output
+
+
+def encode_columns(columns, rows):
+    """
+    按列的任务 -> 紧凑格式的任务表
+
+    columns: 字段 -> (取值数组, 是否每个任务都有该字段)，按字段顺序；缺少该字段的位置取值为 None。
+             日期列可以是 ISO 字符串，也可以是日序数（整数数组）
+    """
+    encoded = {}
+    defaults = {}
+    derived = []
+    base = None
+
+    dates = {f: columns[f][0] for f in DATE_FIELDS if f in columns}
+    if rows and 'start_date' in dates and all(_plain_dates(v) for v in dates.values()):
+        dates = {f: _ordinals(v) for f, v in dates.items()}
+        base = int(dates['start_date'].min())
+
+    for field, (values, present) in columns.items():
+        if field in DEFAULTS and present and bool(np.all(values == DEFAULTS[field])):
+            defaults[field] = DEFAULTS[field]
+            continue
+        if field == 'duration' and base is not None and 'end_date' in dates and np.array_equal(
+                values, dates['end_date'] - dates['start_date'] + 1):
+            derived.append(field)
+            continue
+
+        if field == 'parent' and present:
+            row_of = {t: i for i, t in enumerate(columns['id'][0].tolist())}
+            parents = values.tolist()
+            roots = {p for p in parents if p not in row_of}
+            if len(roots) <= 1:
+                encoded[field] = {'ref': [row_of.get(p, -1) for p in parents], 'root': next(iter(roots), None)}
+                continue
+        elif field in DATE_FIELDS and base is not None:
+            encoded[field] = {'days': (dates[field] - base).tolist()}
+            continue
+        elif field in DATE_FIELDS or field in DICT_FIELDS:
+            encoded[field] = _dictionary(values.tolist())
+            continue
+        elif field in BOOL_FIELDS and (values.dtype == bool or all(v is None or isinstance(v, bool) for v in values)):
+            encoded[field] = {'bool': [None if v is None else int(v) for v in values.tolist()]}
+            continue
+        encoded[field] = values.tolist()
+
+    return {
+        'rows': rows,
+        'base_date': date.fromordinal(base).isoformat() if base is not None else None,
+        'defaults': defaults,
+        'derived': derived,
+        'columns': encoded,
+    }
+
+
+def _decode_column(column, base):
+    if not isinstance(column, dict):
+        return column
+    if 'ref' in column:
+        return column['ref']
+    if 'days' in column:
+        ordinal = date.fromisoformat(base).toordinal()
+        return [date.fromordinal(ordinal + d).isoformat() for d in column['days']]
+    if 'dict' in column:
+        return [column['dict'][c] for c in column['codes']]
+    if 'bool' in column:
+        return [None if v is None else bool(v) for v in column['bool']]
+    raise ValueError(f'未知的列编码: {sorted(column)}')
+
+
+def decode_compact(data):
+    """紧凑格式 -> 普通前端数据对象（tasks 为逐任务对象）"""
+    if data['format'] != FORMAT_TAG:
+        raise ValueError(f"不支持的紧凑格式版本: {data['format']}")
+    table = data['tasks']
+    rows = table['rows']
+    columns = {name: _decode_column(column, table['base_date']) for name, column in table['columns'].items()}
+    tasks = [{} for _ in range(rows)]
+    for name, values in columns.items():
+        if name == 'parent' and isinstance(table['columns'][name], dict):
+            ids = columns['id']
+            root = table['columns'][name]['root']
+            values = [ids[i] if i >= 0 else root for i in values]
+            for task, value in zip(tasks, values):
+                task[name] = value
+            continue
+        for task, value in zip(tasks, values):
+            if value is not None:
+                task[name] = value
+    for name, value in table['defaults'].items():
+        for task in tasks:
+            task.setdefault(name, value)
+    if 'duration' in table['derived']:
+        for task in tasks:
+            task['duration'] = _duration(task['start_date'], task['end_date'])
+
+    output = {k: v for k, v in data.items() if k != 'format'}
+    output['tasks'] = tasks
+    return output
@@ -3,18 +3,29 @@
 数据导出工具 - 将 gantt_chart.py 中的任务数据转换为前端 JSON 格式
 """
 
+import argparse
 import json
 import sys
 import os
-from datetime import datetime
+from collections.abc import Sequence
+from datetime import date, datetime
+
+import numpy as np
 
 # Add parent directory to path to import gantt_chart
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from gantt_chart import tasks_list
+from gantt_chart import tasks_list, milestones
+from backend.compact_json import encode_compact
+from backend.plan_columns import EPOCH_ORDINAL, ColumnRecords, ColumnTree
+from backend.plan_sources import load_plan
+from backend.plan_validator import check_plan
+from backend.rollup import Rollup
+from backend.task_tree import TaskTree
+from backend.work_calendar import shift_work_days, working_days
 
 
 def calculate_duration(start_str, end_str):
-    """计算任务持续天数"""
+    """计算任务持续天数（日历天，DHTMLX 以此推算结束日期；工作日见 add_work_days）"""
     start = datetime.strptime(start_str, '%Y-%m-%d')
     end = datetime.strptime(end_str, '%Y-%m-%d')
     return (end - start).days + 1
@@ -30,43 +41,239 @@ def determine_status(progress):
         return 'in-progress'
 
 
-def convert_tasks_to_json():
-    """转换任务列表为前端JSON格式"""
+def convert_tree_to_json(tree):
+    """按层级索引导出任意深度的任务（保留原 id / parent，分组节点取子树汇总）"""
+    output_tasks = []
+    for node in tree.preorder:
+        record = tree.records[node]
+        parent = record['parent'] if tree.parent[node] >= 0 else None
+
+        if tree.is_leaf(node):
+            output_tasks.append({
+                'id': record['id'],
+                'text': record['task'],
+                'type': 'task',
+                'parent': parent,
+                'start_date': record['start'],
+                'end_date': record['end'],
+                'duration': calculate_duration(record['start'], record['end']),
+                'progress': record['progress'] / 100,
+                'owner': record['owner'],
+                'phase': record['phase'],
+                'is_milestone': record['is_milestone'],
+                'priority': 'medium',
+                'status': determine_status(record['progress']),
+                'description': ''
+            })
+            continue
+
+        summary = tree.rollup(node)
+        start, end = summary['start'].isoformat(), summary['end'].isoformat()
+        output_tasks.append({
+            'id': record['id'],
+            'text': record['task'],
+            'type': 'project',
+            'parent': parent,
+            'start_date': start,
+            'end_date': end,
+            'duration': calculate_duration(start, end),
+            'progress': summary['progress'] / 100,
+            'owner': '',
+            'phase': record['phase'],
+            'is_milestone': False,
+            'priority': 'medium',
+            'status': determine_status(int(summary['progress'])),
+            'open': record.get('open', True)
+        })
+    return output_tasks
+
+
+# 逐任务对象的公共字段（顺序同 convert_tree_to_json），其后叶子为 description、分组节点为 open，最后是 work_days
+TASK_FIELDS = ('id', 'text', 'type', 'parent', 'start_date', 'end_date', 'duration', 'progress',
+               'owner', 'phase', 'is_milestone', 'priority', 'status')
+
+
+def _iso_dates(ordinals):
+    """日序数数组 -> ISO 日期字符串列表（每个日期只格式化一次）"""
+    days, inverse = np.unique(ordinals, return_inverse=True)
+    iso = [date.fromordinal(d).isoformat() for d in days.tolist()]
+    return [iso[k] for k in inverse.reshape(-1).tolist()]
+
+
+def _json_values(values):
+    """一列取值 -> 各行的 JSON 文本（与 json.dumps 对单个取值的输出相同）"""
+    if values.dtype == bool:
+        return np.where(values, 'true', 'false').tolist()
+    if values.dtype.kind in 'iu':
+        return list(map(str, values.tolist()))
+    if values.dtype.kind == 'f' and np.isfinite(values).all():
+        return list(map(float.__repr__, values.tolist()))
+    encode = json.encoder.encode_basestring
+    return [encode(v) if isinstance(v, str) else json.dumps(v, ensure_ascii=False) for v in values.tolist()]
+
+
+def _as_days(ordinals):
+    return (ordinals - EPOCH_ORDINAL).astype('datetime64[D]')
+
+
+class TaskColumns(Sequence):
+    """
+    按列存放的前端任务（列式快照导出用），逐项与 convert_tree_to_json + add_work_days 的结果相同
+
+    columns: 字段 -> 数组（按先序）；字符串为 object 数组，日期为日序数，open 只对分组节点有效
+    leaf: 是否叶子任务（叶子有 description，分组节点有 open）
+
+    取下标 / 遍历时才分块生成任务对象；紧凑格式由 columns() 直接编码，json 格式分块写出
+    """
+
+    # 遍历时每次生成的任务数
+    CHUNK = 65536
+
+    def __init__(self, columns, leaf):
+        self._columns = columns
+        self.leaf = leaf
+
+    def __len__(self):
+        return len(self.leaf)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return self._tasks(np.arange(len(self))[i])
+        return self._tasks(np.arange(len(self))[[i]])[0]
+
+    def __iter__(self):
+        for lo in range(0, len(self), self.CHUNK):
+            yield from self._tasks(np.arange(lo, min(lo + self.CHUNK, len(self))))
+
+    def column(self, field):
+        return self._columns[field]
+
+    def _tasks(self, rows):
+        values = [_iso_dates(self._columns[f][rows]) if f in ('start_date', 'end_date') else self._columns[f][rows].tolist()
+                  for f in TASK_FIELDS]
+        tasks = []
+        for row, leaf, is_open, work_days in zip(zip(*values), self.leaf[rows].tolist(),
+                                                self._columns['open'][rows].tolist(),
+                                                self._columns['work_days'][rows].tolist()):
+            task = dict(zip(TASK_FIELDS, row))
+            if leaf:
+                task['description'] = ''
+            else:
+                task['open'] = is_open
+            task['work_days'] = work_days
+            tasks.append(task)
+        return tasks
+
+    def columns(self):
+        """
+        紧凑格式的输入（见 compact_json.encode_columns）：字段 -> (取值, 是否每个任务都有)，
+        字段顺序同逐任务对象中首次出现的顺序
+        """
+        if not len(self):
+            return {}
+        columns = {f: (self._columns[f], True) for f in TASK_FIELDS}
+        description = np.where(self.leaf, '', None)
+        is_open = np.full(len(self), None, dtype=object)
+        is_open[~self.leaf] = self._columns['open'][~self.leaf].tolist()
+        extra = {
+            'description': (description, bool(self.leaf.all())) if self.leaf.any() else None,
+            'work_days': (self._columns['work_days'], True),
+            'open': (is_open, not self.leaf.any()) if not self.leaf.all() else None,
+        }
+        order = ('description', 'work_days', 'open') if self.leaf[0] else ('open', 'work_days', 'description')
+        columns.update((f, extra[f]) for f in order if extra[f] is not None)
+        return columns
 
-    # Step 1: 收集所有模块
-    modules = {}
-    module_tasks = {}  # 记录每个模块的任务
+    def json_chunks(self):
+        """
+        逐块生成各任务的 JSON 文本（同 json.dumps(task, indent=2) 并整体缩进两层，即 tasks 列表中的样子）
 
-    for task in tasks_list:
-        module_name = task['module']
-        if module_name not in modules:
-            modules[module_name] = {
-                'tasks': [],
-                'start': task['start'],
-                'end': task['end'],
-                'phase': task['phase']
-            }
-            module_tasks[module_name] = []
+        按列编码后套用同一模板，不生成任务对象
+        """
+        template = ('{' + ''.join(f'\n      {json.dumps(f)}: %s,' for f in TASK_FIELDS)
+                    + '\n      %s,\n      "work_days": %s\n    }')
+        for lo in range(0, len(self), self.CHUNK):
+            rows = slice(lo, lo + self.CHUNK)
+            values = [_json_values(np.array(_iso_dates(self._columns[f][rows]), dtype=object))
+                      if f in ('start_date', 'end_date') else _json_values(self._columns[f][rows]) for f in TASK_FIELDS]
+            values.append(np.where(self.leaf[rows], '"description": ""',
+                                   np.where(self._columns['open'][rows], '"open": true', '"open": false')).tolist())
+            values.append(_json_values(self._columns['work_days'][rows]))
+            yield [template % row for row in zip(*values)]
 
-        # 更新模块的开始和结束时间
-        if task['start'] < modules[module_name]['start']:
-            modules[module_name]['start'] = task['start']
-        if task['end'] > modules[module_name]['end']:
-            modules[module_name]['end'] = task['end']
 
-        module_tasks[module_name].append(task)
+def convert_columns_to_json(tree, links=(), shift=0):
+    """
+    convert_tree_to_json + build_output 的列式版本（tree 为 plan_columns.ColumnTree）
+
+    平移、分组汇总、状态、工作日都整列计算，不为任务建字典；返回的 tasks 为 TaskColumns
+    """
+    records = tree.records
+    leaf = tree.leaf
+    owners = records.objects('owner')
+    start = records.column('start').astype(np.int64)
+    end = records.column('end').astype(np.int64)
+    if shift:
+        starts, ends = shift_work_days(_as_days(start), _as_days(end), owners, shift)
+        start, end = starts.astype(np.int64) + EPOCH_ORDINAL, ends.astype(np.int64) + EPOCH_ORDINAL
+    start, end = tree.spans(start, end)
+    progress_sum, count = tree.rollups()[2:]
+    progress = progress_sum / count
+    # 叶子按原进度、分组节点按取整后的平均进度判断状态（同 determine_status 的调用方式）
+    level = np.where(leaf, progress, np.trunc(progress))
+    status = np.array(['in-progress', 'planned', 'completed'], dtype=object)[(level == 0) + 2 * (level == 100)]
+    owner = np.where(leaf, owners, '')
+
+    columns = {
+        'id': records.objects('id'),
+        'text': records.objects('task'),
+        'type': np.array(['project', 'task'], dtype=object)[leaf.astype(np.int64)],
+        'parent': np.where(tree.parent >= 0, records.objects('parent'), None),
+        'start_date': start,
+        'end_date': end,
+        'duration': end - start + 1,
+        'progress': progress / 100,
+        'owner': owner,
+        'phase': records.objects('phase'),
+        'is_milestone': leaf & records.column('is_milestone'),
+        'priority': np.full(len(tree), 'medium', dtype=object),
+        'status': status,
+        'open': records.column('open'),
+        'work_days': working_days(_as_days(start), _as_days(end), owner),
+    }
+    order = tree.preorder
+    return build_output(TaskColumns({f: a[order] for f, a in columns.items()}, leaf[order]), list(links))
+
+
+def convert_tasks_to_json(rollup=None, tree=None, links=()):
+    """
+    转换任务列表为前端JSON格式
+
+    tree: 任务层级索引（backend.task_tree.TaskTree），提供时按任意深度导出
+    """
+
+    if tree is not None:
+        return build_output(convert_tree_to_json(tree), list(links))
+
+    # Step 1: 按模块汇总（与概览图共用同一 rollup 结构）
+    if rollup is None:
+        rollup = Rollup(tasks_list)
 
     # Step 2: 生成输出数据
     output_tasks = []
     task_id_counter = 1
 
     # 生成模块和任务
-    for module_name, module_info in modules.items():
+    for module_name in rollup.keys('module'):
         module_id = f"module-{task_id_counter}"
         task_id_counter += 1
 
-        # 计算模块的总进度（所有任务的平均进度）
-        module_progress = sum(t['progress'] for t in module_tasks[module_name]) / len(module_tasks[module_name]) / 100
+        module_info = rollup.summary('module', module_name)
+        module_start = module_info['start'].isoformat()
+        module_end = module_info['end'].isoformat()
+
+        # 模块的总进度（所有任务的平均进度）
+        module_progress = module_info['progress'] / 100
 
         # 添加模块
         output_tasks.append({
@@ -74,9 +281,9 @@ def convert_tasks_to_json():
             'text': module_name,
             'type': 'project',  # DHTMLX Gantt uses 'project' for parent tasks
             'parent': None,
-            'start_date': module_info['start'],
-            'end_date': module_info['end'],
-            'duration': calculate_duration(module_info['start'], module_info['end']),
+            'start_date': module_start,
+            'end_date': module_end,
+            'duration': calculate_duration(module_start, module_end),
             'progress': module_progress,
             'owner': '',
             'phase': module_info['phase'],
@@ -87,7 +294,8 @@ def convert_tasks_to_json():
         })
 
         # 添加该模块下的所有任务
-        for task in module_tasks[module_name]:
+        for key in rollup.members('module', module_name):
+            task = rollup.tasks[key]
             task_id = f"task-{task_id_counter}"
             task_id_counter += 1
 
@@ -109,9 +317,30 @@ def convert_tasks_to_json():
             })
 
     # Step 3: 生成完整的输出对象
+    return build_output(output_tasks, [])  # 初始没有依赖关系
+
+
+def add_work_days(output_tasks):
+    """按负责团队的工作日历整列计算工期（工作日，扣除周末与法定节假日、含调休）"""
+    if not output_tasks:
+        return output_tasks
+    counts = working_days(
+        [t['start_date'] for t in output_tasks],
+        [t['end_date'] for t in output_tasks],
+        [t['owner'] for t in output_tasks],
+    )
+    for task, count in zip(output_tasks, counts.tolist()):
+        task['work_days'] = count
+    return output_tasks
+
+
+def build_output(output_tasks, links):
+    """完整的前端数据对象（TaskColumns 已带 work_days）"""
+    if not isinstance(output_tasks, TaskColumns):
+        add_work_days(output_tasks)
     output = {
         'tasks': output_tasks,
-        'links': [],  # 初始没有依赖关系
+        'links': links,
         'config': {
             'view': 'month',
             'readonly': False,
@@ -123,32 +352,121 @@ def convert_tasks_to_json():
     return output
 
 
-def main():
+# 前端数据的默认输出路径
+OUTPUT_FILE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    'frontend',
+    'src',
+    'data',
+    'initial-data.json'
+)
+
+
+def shift_records(records, n):
+    """
+    任务记录整体平移 n 个工作日（按负责团队的日历），返回新的记录列表
+
+    结束日期按各任务的工作日工期重新推算（backend.work_calendar.shift_work_days），
+    分组节点在导出时由子任务汇总，随之平移
+    """
+    records = list(records)
+    if not n or not records:
+        return records
+    starts, ends = shift_work_days([r['start'] for r in records], [r['end'] for r in records],
+                                   [r['owner'] for r in records], n)
+    return [dict(r, start=s, end=e) for r, s, e in zip(records, starts.astype(str), ends.astype(str))]
+
+
+def build_frontend_data(plan=None, validate=True, shift=0):
+    """
+    计划 -> 前端数据对象
+
+    plan: load_plan / load_snapshot 的结果，None 时使用 tasks_list
+    validate: 导出前先校验，有错误时抛出 PlanValidationError
+    shift: 整体平移的工作日数（如整体延期），见 shift_records
+
+    列式快照（tasks 为 ColumnRecords）直接在列上导出，见 convert_columns_to_json
+    """
+    if plan is not None:
+        if validate:
+            check_plan(plan['tasks'], milestones)
+        if isinstance(plan['tasks'], ColumnRecords):
+            return convert_columns_to_json(ColumnTree(plan['tasks']), plan['links'], shift)
+        return convert_tasks_to_json(tree=TaskTree(shift_records(plan['tasks'], shift)), links=plan['links'])
+    if validate:
+        check_plan(tasks_list, milestones)
+    if shift:
+        return convert_tasks_to_json(Rollup(shift_records(tasks_list, shift)))
+    return convert_tasks_to_json()
+
+
+def _dump_chunked(data, f):
+    """与 json.dump(data, f, indent=2, ensure_ascii=False) 输出相同；tasks（TaskColumns）按列编码、分块写出"""
+    f.write('{')
+    for i, (key, value) in enumerate(data.items()):
+        f.write(f'{"," if i else ""}\n  {json.dumps(key, ensure_ascii=False)}: ')
+        if key == 'tasks' and len(value):
+            f.write('[')
+            for k, chunk in enumerate(value.json_chunks()):
+                f.write(f'{"," if k else ""}\n    ' + ',\n    '.join(chunk))
+            f.write('\n  ]')
+            continue
+        f.write(json.dumps(list(value) if key == 'tasks' else value, indent=2, ensure_ascii=False).replace('\n', '\n  '))
+    f.write('\n}')
+
+
+def write_frontend_data(data, output_file=OUTPUT_FILE, fmt='json'):
+    """写出前端数据（json: 逐任务对象；compact: 紧凑列式 JSON），返回路径"""
+    os.makedirs(os.path.dirname(output_file), exist_ok=True)
+    with open(output_file, 'w', encoding='utf-8') as f:
+        if fmt == 'compact':
+            # json.dumps 一次编码走 C 编码器，json.dump 逐块编码慢数倍
+            f.write(json.dumps(encode_compact(data), ensure_ascii=False, separators=(',', ':')))
+        elif isinstance(data['tasks'], TaskColumns):
+            _dump_chunked(data, f)
+        else:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+    return output_file
+
+
+def count_tasks(tasks):
+    """(分组数, 任务数, 里程碑数)；TaskColumns 按列统计"""
+    if isinstance(tasks, TaskColumns):
+        types = tasks.column('type')
+        return int((types == 'project').sum()), int((types == 'task').sum()), int(tasks.column('is_milestone').sum())
+    return (sum(1 for t in tasks if t['type'] == 'project'), sum(1 for t in tasks if t['type'] == 'task'),
+            sum(1 for t in tasks if t['is_milestone']))
+
+
+def main(argv=None):
     """主函数"""
-    print("🔄 开始转换任务数据...")
+    parser = argparse.ArgumentParser(description='导出前端 initial-data.json')
+    parser.add_argument('--snapshot',
+                        help='从 DHTMLX 快照（如 local_data.json）、列式快照（.gcol）或 gantt.db 按层级导出，默认使用 tasks_list')
+    parser.add_argument('--format', choices=('json', 'compact'), default='json',
+                        help='json: 逐任务对象（默认）；compact: 紧凑列式 JSON（见 backend/compact_json.py），前端加载时自动解码')
+    parser.add_argument('--shift-work-days', type=int, default=0, metavar='N',
+                        help='整体平移 N 个工作日（负数为提前），结束日期按各任务的工作日工期与团队日历推算')
+    args = parser.parse_args(argv)
 
-    # 转换数据
-    data = convert_tasks_to_json()
+    print("🔄 开始转换任务数据...")
 
-    # 确保输出目录存在
-    output_dir = os.path.join(
-        os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
-        'frontend',
-        'src',
-        'data'
-    )
-    os.makedirs(output_dir, exist_ok=True)
+    # 转换数据（导出前先校验，有错误时不覆盖 initial-data.json）
+    try:
+        data = build_frontend_data(load_plan(args.snapshot) if args.snapshot else None, shift=args.shift_work_days)
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}")
+        return 1
 
     # 写入文件
-    output_file = os.path.join(output_dir, 'initial-data.json')
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+    output_file = write_frontend_data(data, OUTPUT_FILE, args.format)
 
-    print(f"✅ 成功导出 {len(data['tasks'])} 个任务到: {output_file}")
-    print(f"   - 模块数: {sum(1 for t in data['tasks'] if t['type'] == 'project')}")
-    print(f"   - 任务数: {sum(1 for t in data['tasks'] if t['type'] == 'task')}")
-    print(f"   - 里程碑: {sum(1 for t in data['tasks'] if t['is_milestone'])}")
+    print(f"✅ 成功导出 {len(data['tasks'])} 个任务到: {output_file}（{os.path.getsize(output_file) / 1024:.1f} KB）")
+    projects, tasks, milestone_count = count_tasks(data['tasks'])
+    print(f"   - 模块数: {projects}")
+    print(f"   - 任务数: {tasks}")
+    print(f"   - 里程碑: {milestone_count}")
 
 
 if __name__ == '__main__':
-    main()
+    sys.exit(main())
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+挣值 / 燃起曲线 - 计划值 (PV)、挣值 (EV) 与范围 (scope) 的逐日时间序列
+
+工作量以任务工期（天）计，里程碑为 0：
+    PV  每个任务在计划起止之间匀速累计
+    EV  有历史快照时，按各快照日期的进度插值；
+        否则把当前完成量匀速摊到任务已开始的日子上（今日之后为空）
+
+所有分组（总计 / 各阶段 / 各模块）一次算出：
+    起止点差分 -> bincount 落到 (分组, 日) 矩阵 -> 两次 cumsum
+不逐日逐任务循环。结果按数据版本缓存。
+"""
+
+import hashlib
+import json
+from collections import OrderedDict
+from datetime import date
+
+import numpy as np
+
+# 分组字段（另有 ('total', '总计')）
+GROUP_FIELDS = ('phase', 'module')
+
+# 缓存的数据版本数
+CACHE_LIMIT = 16
+
+_cache = OrderedDict()
+
+
+def task_columns(tasks):
+    """
+    任务 -> 计算用的列
+
+        start / end     日序数（int64）
+        is_milestone    bool
+        progress        进度（0-100，float）
+        各分组字段       (组号, 取值)，取值按首次出现的顺序
+
+    列式快照的 ColumnRecords 直接取映射的列，不逐行解码
+    """
+    from backend.plan_columns import ColumnRecords
+
+    if isinstance(tasks, ColumnRecords):
+        columns = {
+            'start': tasks.column('start').astype(np.int64),
+            'end': tasks.column('end').astype(np.int64),
+            'is_milestone': tasks.column('is_milestone').astype(bool),
+            'progress': tasks.column('progress').astype(float),
+        }
+        for field in GROUP_FIELDS:
+            columns[field] = tasks.grouped(field)
+        return columns
+
+    tasks = list(tasks)
+    columns = {
+        'start': _ordinals([t['start'] for t in tasks]),
+        'end': _ordinals([t['end'] for t in tasks]),
+        'is_milestone': np.array([bool(t['is_milestone']) for t in tasks], dtype=bool),
+        'progress': np.array([float(t['progress']) for t in tasks], dtype=float),
+    }
+    for field in GROUP_FIELDS:
+        values = list(dict.fromkeys(t[field] for t in tasks))
+        position = {v: k for k, v in enumerate(values)}
+        columns[field] = (np.array([position[t[field]] for t in tasks], dtype=np.int64), values)
+    return columns
+
+
+def data_version(columns):
+    """任务数据的内容版本（task_columns 各列的哈希）"""
+    digest = hashlib.sha1()
+    for name in ('start', 'end', 'is_milestone', 'progress'):
+        digest.update(np.ascontiguousarray(columns[name]).tobytes())
+    for field in GROUP_FIELDS:
+        codes, values = columns[field]
+        digest.update(np.ascontiguousarray(codes, dtype=np.int64).tobytes())
+        digest.update(json.dumps(values, ensure_ascii=False).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def leaf_tasks(tasks):
+    """只保留叶子任务（父任务的工期与子任务重叠，不重复计入工作量）；tasks_list 没有 id，原样返回"""
+    from backend.plan_columns import ColumnRecords
+
+    if isinstance(tasks, ColumnRecords):
+        return tasks.leaves()
+    tasks = list(tasks)
+    parents = {t.get('parent') for t in tasks}
+    return [t for t in tasks if t.get('id') is None or t['id'] not in parents]
+
+
+def _ordinals(values):
+    return np.array([date.fromisoformat(v[:10]).toordinal() for v in values], dtype=np.int64)
+
+
+class EarnedValueSeries:
+    """
+    逐日序列
+
+        days    日期列表（计划最早开始与今日中较早者 ~ 最晚结束与今日中较晚者）
+        groups  [('total', '总计'), ('phase', 'H1'), ..., ('module', ...), ...]
+        pv / ev / scope  形状 (分组数, 天数)，ev 在今日之后为 NaN
+
+    columns / history 中的任务数据为 task_columns 的结果
+    """
+
+    def __init__(self, columns, today, history=()):
+        self.today = today
+        start = columns['start']
+        end = columns['end']
+        milestone = columns['is_milestone']
+        progress = np.clip(columns['progress'], 0, 100) / 100
+
+        # 今日早于计划开始时，日期范围从今日起（今日之前 PV 为 0）
+        self.first = int(min(start.min(), today.toordinal()))
+        self.last = int(max(end.max(), today.toordinal()))
+        n_days = self.last - self.first + 1
+        self.days = [date.fromordinal(self.first + i) for i in range(n_days)]
+        self.today_index = today.toordinal() - self.first
+
+        # 任务 -> 所属分组（每个任务属于 总计 + 每个分组字段各一个组）
+        self.groups = [('total', '总计')]
+        group_ids = [np.zeros(len(start), dtype=np.int64)]
+        for field in GROUP_FIELDS:
+            codes, values = columns[field]
+            group_ids.append(codes + len(self.groups))
+            self.groups.extend((field, v) for v in values)
+        self.index = {g: k for k, g in enumerate(self.groups)}
+        gid = np.concatenate(group_ids)
+        n_groups = len(self.groups)
+        reps = len(group_ids)
+
+        s = np.tile(start - self.first, reps)
+        e = np.tile(end - self.first, reps)
+        budget = np.tile(np.where(milestone, 0, end - start + 1).astype(float), reps)
+        done = budget * np.tile(progress, reps)
+
+        def spread(amount, lo, hi):
+            """把每个任务的 amount 匀速摊到 [lo, hi] 上，返回 (分组, 日) 的累计矩阵"""
+            rate = amount / (hi - lo + 1)
+            width = n_days + 1
+            diff = (np.bincount(gid * width + lo, rate, n_groups * width)
+                    - np.bincount(gid * width + hi + 1, rate, n_groups * width))
+            return np.cumsum(np.cumsum(diff.reshape(n_groups, width), axis=1), axis=1)[:, :n_days]
+
+        self.pv = spread(budget, s, e)
+        self.scope = np.repeat(np.bincount(gid, budget, n_groups)[:, None], n_days, axis=1)
+
+        if history:
+            self.ev = self._ev_from_history(history, gid, done, n_groups)
+        else:
+            # 已开始的日子: [开始, min(结束, 今日前一天)]；今日才开始或提前完成的记到今日前一天
+            t = self.today_index - 1
+            hi = np.clip(np.minimum(e, t), 0, None)
+            lo = np.minimum(s, hi)
+            self.ev = spread(done, lo, hi)
+        self.ev[:, self.today_index + 1:] = np.nan
+
+    def _ev_from_history(self, history, gid, done, n_groups):
+        """历史快照：各快照日期的分组挣值作为节点，逐日线性插值"""
+        points = [(self.first - 1, np.zeros(n_groups))]
+        for snapshot_day, columns in sorted(history, key=lambda item: item[0]):
+            day = snapshot_day.toordinal()
+            if not self.first <= day < self.today_index + self.first:
+                continue
+            work = ~columns['is_milestone']
+            duration = (columns['end'] - columns['start'] + 1)[work]
+            amount = duration * np.clip(columns['progress'][work], 0, 100) / 100
+            # 快照中的分组取值映射到本序列的分组（本序列没有的分组不计入）
+            ids = [np.zeros(len(amount), dtype=np.int64)]
+            amounts = [amount]
+            for field in GROUP_FIELDS:
+                codes, values = columns[field]
+                lookup = np.array([self.index.get((field, v), -1) for v in values] + [-1], dtype=np.int64)
+                mapped = lookup[codes[work]]
+                ids.append(mapped[mapped >= 0])
+                amounts.append(amount[mapped >= 0])
+            points.append((day, np.bincount(np.concatenate(ids), np.concatenate(amounts), n_groups)))
+        points.append((self.today_index + self.first, np.bincount(gid, done, n_groups)))
+
+        xs = np.array([p[0] for p in points], dtype=float)
+        ys = np.stack([p[1] for p in points], axis=1)
+        days = np.arange(self.first, self.last + 1, dtype=float)
+        return np.stack([np.interp(days, xs, row) for row in ys])
+
+    def group(self, field, value):
+        k = self.index[(field, value)]
+        return {'pv': self.pv[k], 'ev': self.ev[k], 'scope': self.scope[k]}
+
+    def status(self, field='total', value='总计'):
+        """今日的 PV / EV / 进度偏差 SV / 进度绩效指数 SPI"""
+        k = self.index[(field, value)]
+        pv = float(self.pv[k, self.today_index - 1]) if self.today_index > 0 else 0.0
+        ev = float(self.ev[k, self.today_index])
+        return {'pv': pv, 'ev': ev, 'sv': ev - pv, 'spi': ev / pv if pv else None}
+
+
+def earned_value(tasks, today, history=()):
+    """
+    计算（或取缓存的）逐日序列
+
+    tasks / history 中的任务记录可以是列式快照的 ColumnRecords（按列计算，不逐行解码）
+    history: [(快照日期, 任务记录), ...]，可选
+    """
+    columns = task_columns(leaf_tasks(tasks))
+    history = [(d, task_columns(leaf_tasks(records))) for d, records in history]
+    key = (
+        data_version(columns),
+        today.toordinal(),
+        tuple((d.toordinal(), data_version(c)) for d, c in history),
+    )
+    series = _cache.get(key)
+    if series is None:
+        series = EarnedValueSeries(columns, today, history)
+        _cache[key] = series
+        while len(_cache) > CACHE_LIMIT:
+            _cache.popitem(last=False)
+    else:
+        _cache.move_to_end(key)
+    return series
+
+
+def load_history(paths):
+    """DHTMLX 快照文件 -> [(快照日期, 任务记录), ...]，日期取文件中的 timestamp"""
+    from backend.plan_sources import load_snapshot, parse_plan_date
+
+    history = []
+    for path in paths:
+        plan = load_snapshot(path)
+        if not plan.get('timestamp'):
+            raise ValueError(f'{path} 中没有 timestamp，无法作为历史快照')
+        history.append((parse_plan_date(plan['timestamp'])[0], plan['tasks']))
+    return history
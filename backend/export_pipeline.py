@@ -0,0 +1,408 @@
+#!/usr/bin/env python3
+"""
+导出流水线 - 读取一次计划，把任务记录分发给多个输出（sink），一条命令生成全部产物
+
+    读取计划（load_plan，只读一次）-> 校验（只校验一次）-> 处理阶段（流式，按批）-> 分发给各 sink
+
+内置 sink:
+    html      HTML 甘特图及图表数据（gantt_chart.build_outputs，含 .gz / .br）
+    frontend  前端 initial-data.json（data_exporter，json / compact）
+    ndjson    每行一条任务记录
+    sqlite    按 (计划, id) upsert 到 plan_tasks / plan_links 表，并删除本次计划中已不存在的记录
+    stats     控制台统计
+
+每个 sink 默认在自己的工作线程中运行，批次通过有界队列传递（慢的 sink 会让分发等待，内存不会无限增长）；
+写文件、SQLite、压缩等 I/O 与其它 sink 重叠，总耗时接近最慢的 sink（纯 Python 的图表生成之间仍受 GIL 限制）。
+html / frontend 需要整棵任务树（汇总、层级），会先收集记录（处理阶段之后的记录），结束时再生成。
+处理阶段（stages）对所有 sink 生效；命令行的 --view 即一个只保留指定视图任务的阶段。
+
+用法:
+    python3 backend/export_pipeline.py                                  # tasks_list -> HTML + 前端 JSON + 统计
+    python3 backend/export_pipeline.py local_data.json --format compact --ndjson plan.ndjson --sqlite plan.db
+    python3 backend/export_pipeline.py local_data.json --serial         # 所有 sink 在主线程依次运行（对比用）
+    python3 backend/export_pipeline.py local_data.json --view project   # 只导出 project 视图的任务
+"""
+
+import argparse
+import json
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 每批记录数 / 每个 sink 队列中最多积压的批数
+BATCH_SIZE = 2048
+QUEUE_BATCHES = 8
+
+# 任务记录写入 SQLite 的列（plan_sources 的任务记录字段）
+SQLITE_COLUMNS = ('id', 'parent', 'module', 'task', 'start', 'end', 'owner', 'progress', 'phase',
+                  'is_milestone', 'type', 'order', 'open', 'view')
+
+_DONE = object()
+
+
+def batched(records, size=BATCH_SIZE):
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class Sink:
+    """
+    输出的基类
+
+        open(meta)     开始（meta: 计划的 source / links / timestamp，不含任务；staged 表示记录经过了处理阶段）
+        write(batch)   一批任务记录（只读，多个 sink 共用同一批对象）
+        close()        结束，返回显示用的结果说明
+    """
+
+    name = ''
+    threaded = True
+
+    def open(self, meta):
+        self.meta = meta
+
+    def write(self, batch):
+        pass
+
+    def close(self):
+        return ''
+
+
+class _CollectingSink(Sink):
+    """需要完整任务树的 sink：收集记录，结束时调用 build 生成"""
+
+    def open(self, meta):
+        super().open(meta)
+        self.records = []
+
+    def write(self, batch):
+        self.records.extend(batch)
+
+    def plan(self):
+        # 未经处理阶段的 tasks_list 按原有的两层方式渲染 / 导出（与 gantt_chart.py、data_exporter.py 的结果一致）；
+        # 其它情况都按流过来的记录生成，处理阶段的结果对 html / frontend 同样生效
+        if self.meta['source'] == 'tasks_list' and not self.meta['staged']:
+            return None
+        return dict(self.meta, tasks=self.records)
+
+    def close(self):
+        return self.build(self.plan())
+
+    def build(self, plan):
+        raise NotImplementedError
+
+
+class HtmlSink(_CollectingSink):
+    name = 'html'
+
+    def __init__(self, output_file):
+        self.output_file = output_file
+
+    def build(self, plan):
+        from gantt_chart import build_outputs
+        return build_outputs(self.output_file, plan=plan, validate=False)
+
+
+class FrontendSink(_CollectingSink):
+    name = 'frontend'
+
+    def __init__(self, output_file, fmt='json'):
+        self.output_file = output_file
+        self.fmt = fmt
+
+    def build(self, plan):
+        from backend.data_exporter import build_frontend_data, write_frontend_data
+        data = build_frontend_data(plan, validate=False)
+        write_frontend_data(data, self.output_file, self.fmt)
+        return f"{self.output_file}（{len(data['tasks'])} 个任务，{self.fmt}）"
+
+
+class NdjsonSink(Sink):
+    name = 'ndjson'
+
+    def __init__(self, path):
+        self.path = path
+
+    def open(self, meta):
+        super().open(meta)
+        self.count = 0
+        self.file = open(self.path + '.tmp', 'w', encoding='utf-8')
+
+    def write(self, batch):
+        self.file.write(''.join(json.dumps(r, ensure_ascii=False) + '\n' for r in batch))
+        self.count += len(batch)
+
+    def close(self):
+        self.file.close()
+        os.replace(self.path + '.tmp', self.path)
+        return f'{self.path}（{self.count} 行）'
+
+
+class SqliteSink(Sink):
+    name = 'sqlite'
+
+    def __init__(self, path):
+        self.path = path
+
+    def open(self, meta):
+        super().open(meta)
+        self.plan_name = meta['source']
+        self.exported_at = datetime.now().isoformat(timespec='microseconds')
+        self.count = 0
+        # 连接在工作线程中创建，只在该线程使用
+        self.conn = sqlite3.connect(self.path)
+        columns = ', '.join(f'"{c}"' for c in SQLITE_COLUMNS)
+        self.conn.executescript(f'''
+            CREATE TABLE IF NOT EXISTS plan_tasks (
+                plan TEXT NOT NULL, {columns}, exported_at TEXT NOT NULL,
+                PRIMARY KEY (plan, id)
+            );
+            CREATE TABLE IF NOT EXISTS plan_links (
+                plan TEXT NOT NULL, id TEXT, source TEXT NOT NULL, target TEXT NOT NULL, type TEXT NOT NULL,
+                exported_at TEXT NOT NULL,
+                PRIMARY KEY (plan, source, target, type)
+            );
+        ''')
+        updates = ', '.join(f'"{c}" = excluded."{c}"' for c in SQLITE_COLUMNS[1:])
+        placeholders = ', '.join('?' * (len(SQLITE_COLUMNS) + 2))
+        self.upsert = (f'INSERT INTO plan_tasks (plan, {columns}, exported_at) VALUES ({placeholders}) '
+                       f'ON CONFLICT (plan, id) DO UPDATE SET {updates}, exported_at = excluded.exported_at')
+        self.conn.execute('BEGIN')
+
+    def write(self, batch):
+        self.conn.executemany(self.upsert, (
+            (self.plan_name, *(r.get(c) for c in SQLITE_COLUMNS), self.exported_at) for r in batch))
+        self.count += len(batch)
+
+    def close(self):
+        links = [(self.plan_name, None if l.get('id') is None else str(l['id']), str(l.get('source')),
+                  str(l.get('target')), str(l.get('type', '0')), self.exported_at)
+                 for l in self.meta['links']]
+        self.conn.executemany(
+            'INSERT INTO plan_links VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (plan, source, target, type) '
+            'DO UPDATE SET id = excluded.id, exported_at = excluded.exported_at', links)
+        # 本次计划中已不存在的任务 / 依赖
+        removed = 0
+        for table in ('plan_tasks', 'plan_links'):
+            removed += self.conn.execute(f'DELETE FROM {table} WHERE plan = ? AND exported_at != ?',
+                                         (self.plan_name, self.exported_at)).rowcount
+        self.conn.commit()
+        self.conn.close()
+        return f'{self.path}（upsert {self.count} 个任务、{len(links)} 条依赖，删除 {removed} 条）'
+
+
+class StatsSink(Sink):
+    """叶子任务的统计（与 gantt_chart.py 的项目统计一致）；只做计数，在分发线程中运行"""
+
+    name = 'stats'
+    threaded = False
+
+    def open(self, meta):
+        super().open(meta)
+        self.rows = {}
+        self.parents = set()
+
+    def write(self, batch):
+        for r in batch:
+            self.rows[r['id']] = (r['phase'], bool(r['is_milestone']))
+            if r.get('parent') is not None:
+                self.parents.add(r['parent'])
+
+    def close(self):
+        from gantt_chart import milestones
+        leaves = [v for k, v in self.rows.items() if k not in self.parents]
+        phases = Counter(phase for phase, _ in leaves)
+        return '\n'.join([
+            '',
+            f"   - 总任务数: {len(leaves)}",
+            *(f"   - {phase} 任务: {phases[phase]}" for phase in sorted(phases)),
+            f"   - 里程碑数: {sum(1 for _, is_milestone in leaves if is_milestone)}",
+            f"   - 总里程碑: {len(milestones)}",
+        ])
+
+
+class _Worker:
+    """在线程中运行一个 sink；出错后继续取走队列中的批次，避免分发端阻塞"""
+
+    def __init__(self, sink, meta):
+        self.sink = sink
+        self.meta = meta
+        self.queue = queue.Queue(QUEUE_BATCHES)
+        self.result = None
+        self.error = None
+        self.elapsed = 0.0
+        self.thread = threading.Thread(target=self._run, name=f'export-{sink.name}', daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        try:
+            self._timed(self.sink.open, self.meta)
+            for batch in iter(self.queue.get, _DONE):
+                self._timed(self.sink.write, batch)
+            self.result = self._timed(self.sink.close)
+        except Exception as e:
+            self.error = e
+            while self.queue.get() is not _DONE:
+                pass
+
+    def _timed(self, method, *args):
+        """只计 sink 自身的处理时间（不含等待批次的时间）"""
+        started = time.perf_counter()
+        try:
+            return method(*args)
+        finally:
+            self.elapsed += time.perf_counter() - started
+
+    def put(self, batch):
+        self.queue.put(batch)
+
+    def finish(self):
+        self.queue.put(_DONE)
+        self.thread.join()
+
+
+class _Inline:
+    """在分发线程中直接运行的 sink（不走队列）"""
+
+    def __init__(self, sink, meta):
+        self.sink = sink
+        self.result = None
+        self.error = None
+        self.elapsed = 0.0
+        self._call(sink.open, meta)
+
+    def _call(self, method, *args):
+        if self.error is not None:
+            return None
+        started = time.perf_counter()
+        try:
+            return method(*args)
+        except Exception as e:
+            self.error = e
+        finally:
+            self.elapsed += time.perf_counter() - started
+
+    def put(self, batch):
+        self._call(self.sink.write, batch)
+
+    def finish(self):
+        self.result = self._call(self.sink.close)
+
+
+def view_stage(views):
+    """处理阶段：只保留指定视图（view 字段，如 project / product）的任务记录"""
+    views = set(views)
+
+    def stage(records):
+        return (r for r in records if r['view'] in views)
+    return stage
+
+
+def run_pipeline(plan, sinks, stages=(), threaded=True):
+    """
+    把计划分发给各 sink，返回 ([(sink, 结果, 异常, 耗时秒), ...], 分发的记录数)
+
+    记录数是经过处理阶段后实际送到 sink 的条数
+
+    plan: load_plan 的结果
+    stages: 处理阶段，每个为 records 迭代器 -> records 迭代器（生成器），按顺序串联
+    threaded: False 时所有 sink 在当前线程中依次处理每一批
+    """
+    meta = dict({k: v for k, v in plan.items() if k != 'tasks'}, staged=bool(stages))
+    records = iter(plan['tasks'])
+    for stage in stages:
+        records = stage(records)
+
+    runners = [_Worker(s, meta) if threaded and s.threaded else _Inline(s, meta) for s in sinks]
+    count = 0
+    try:
+        for batch in batched(records):
+            count += len(batch)
+            for runner in runners:
+                runner.put(batch)
+    finally:
+        for runner in runners:
+            runner.finish()
+    return [(r.sink, r.result, r.error, r.elapsed) for r in runners], count
+
+
+def main(argv=None):
+    from backend import data_exporter
+    import gantt_chart
+
+    parser = argparse.ArgumentParser(description='读取一次计划，生成 HTML / 前端 JSON / NDJSON / SQLite / 统计')
+    parser.add_argument('source', nargs='?', default='tasks_list',
+                        help="计划来源: 'tasks_list'（默认）、JSON 快照/导出文件、列式快照（.gcol）或 gantt.db")
+    parser.add_argument('-o', '--output', default=gantt_chart.OUTPUT_FILE, help='HTML 输出路径')
+    parser.add_argument('--no-html', action='store_true', help='不生成 HTML')
+    parser.add_argument('--frontend', default=data_exporter.OUTPUT_FILE, help='前端数据输出路径')
+    parser.add_argument('--no-frontend', action='store_true', help='不导出前端数据')
+    parser.add_argument('--format', choices=('json', 'compact'), default='json', help='前端数据格式')
+    parser.add_argument('--ndjson', metavar='路径', help='同时写出 NDJSON（每行一条任务记录）')
+    parser.add_argument('--sqlite', metavar='路径', help='同时 upsert 到 SQLite 数据库的 plan_tasks / plan_links 表')
+    parser.add_argument('--view', action='append', metavar='视图',
+                        help='只导出指定视图的任务（如 project / product，可重复），对全部输出生效')
+    parser.add_argument('--no-stats', action='store_true', help='不打印统计')
+    parser.add_argument('--serial', action='store_true', help='所有 sink 在主线程依次运行')
+    args = parser.parse_args(argv)
+
+    sinks = []
+    if not args.no_html:
+        sinks.append(HtmlSink(args.output))
+    if not args.no_frontend:
+        sinks.append(FrontendSink(args.frontend, args.format))
+    if args.ndjson:
+        sinks.append(NdjsonSink(args.ndjson))
+    if args.sqlite:
+        sinks.append(SqliteSink(args.sqlite))
+    if not args.no_stats:
+        sinks.append(StatsSink())
+    if not sinks:
+        parser.error('没有要生成的输出')
+
+    from backend.plan_sources import load_plan
+    from backend.plan_validator import PlanValidationError, check_plan
+
+    started = time.perf_counter()
+    print(f"🔄 读取计划: {args.source}")
+    plan = load_plan(args.source)
+    phases = [k for k, v in gantt_chart.COLORS.items() if isinstance(v, dict)]
+    try:
+        # 只校验一次（tasks_list 按原始任务表校验，与 gantt_chart.py 一致）
+        check_plan(gantt_chart.tasks_list if plan['source'] == 'tasks_list' else plan['tasks'],
+                   gantt_chart.milestones, phases)
+    except PlanValidationError as e:
+        print(f"❌ {e}")
+        return 1
+
+    stages = [view_stage(args.view)] if args.view else []
+    results, count = run_pipeline(plan, sinks, stages, threaded=not args.serial)
+    failed = False
+    for sink, result, error, elapsed in results:
+        if error is not None:
+            failed = True
+            print(f"❌ {sink.name}: {error}（{elapsed:.2f} 秒）")
+        elif sink.name == 'stats':
+            print(f"📊 项目统计:{result}")
+        else:
+            print(f"✅ {sink.name}: {result}（{elapsed:.2f} 秒）")
+    read = f"（读取 {len(plan['tasks'])} 条）" if count != len(plan['tasks']) else ''
+    print(f"⏱️  共 {count} 条记录{read}，总耗时 {time.perf_counter() - started:.2f} 秒"
+          f"（{'串行' if args.serial else '并行'}）")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
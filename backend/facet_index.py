@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+分面过滤索引 - 每个分面取值一张位图
+
+位图用 Python 整数表示（第 i 位 = 第 i 个任务），过滤条件直接做位运算：
+    同一分面多个取值   OR
+    不同分面之间       AND
+    任意组合           {'and': [...]} / {'or': [...]} / {'not': ...}
+
+只有任务数不少于总数 1/DENSE_RATIO 的取值（阶段、状态等低基数字段）预先建满位图；
+其余取值（负责人、模块等高基数字段的大部分取值）只存升序的任务下标数组，
+过滤用到时再转为位图，计数时整个分面一次 bincount。
+这样索引的内存与构建时间与任务数成正比，不随取值数增长。
+
+各分面取值的计数（筛选侧栏）用 popcount 计算，10 万任务下每次过滤 / 计数都在毫秒级。
+"""
+
+import numpy as np
+
+# 支持的分面字段（status 由进度推导，规则同 data_exporter.determine_status）
+FACET_FIELDS = ('phase', 'owner', 'status', 'module', 'is_milestone')
+
+_TRUE_VALUES = ('1', 'true', 'yes', 'y')
+
+# 任务数 * DENSE_RATIO >= 总任务数的取值使用位图，其余使用下标数组
+# （int32 下标 32 位，少于 1/32 的任务时下标数组更省内存）
+DENSE_RATIO = 32
+
+
+def parse_filter_args(args):
+    """
+    命令行过滤参数 -> 过滤条件
+
+    ['phase=H1', 'owner=研发团队,数据团队', 'is_milestone=true']
+    -> {'phase': ['H1'], 'owner': ['研发团队', '数据团队'], 'is_milestone': [True]}
+    """
+    filters = {}
+    for arg in args or ():
+        field, sep, raw = arg.partition('=')
+        field = field.strip()
+        if not sep or field not in FACET_FIELDS:
+            raise ValueError(f"过滤条件格式错误: {arg}（应为 字段=取值，字段: {', '.join(FACET_FIELDS)}）")
+        values = [v.strip() for v in raw.split(',') if v.strip()]
+        if field == 'is_milestone':
+            values = [v.lower() in _TRUE_VALUES for v in values]
+        filters.setdefault(field, []).extend(values)
+    return filters
+
+
+class FacetIndex:
+    """任务分面位图索引"""
+
+    def __init__(self, tasks, fields=FACET_FIELDS):
+        from backend.data_exporter import determine_status
+
+        self.tasks = list(tasks)
+        self.fields = tuple(fields)
+        self.size = len(self.tasks)
+        self.all = (1 << self.size) - 1
+
+        positions = {field: {} for field in self.fields}
+        for i, task in enumerate(self.tasks):
+            for field in self.fields:
+                value = determine_status(task['progress']) if field == 'status' else task[field]
+                positions[field].setdefault(value, []).append(i)
+
+        # bitmaps: 取值 -> 位图（int）或升序下标数组，取值顺序按任务中首次出现的顺序
+        # sparse: 分面内全部下标数组的取值序号与下标（计数时一次 bincount）
+        self.bitmaps = {}
+        self.sparse = {}
+        for field, values in positions.items():
+            entries = {}
+            sparse_ids, sparse_rows = [], []
+            for value, rows in values.items():
+                if len(rows) * DENSE_RATIO >= self.size:
+                    entries[value] = self._bitmap(rows)
+                else:
+                    entries[value] = np.array(rows, dtype=np.int32)
+                    sparse_ids.append(np.full(len(rows), len(entries) - 1, dtype=np.int32))
+                    sparse_rows.append(entries[value])
+            self.bitmaps[field] = entries
+            if sparse_rows:
+                self.sparse[field] = (np.concatenate(sparse_ids), np.concatenate(sparse_rows))
+
+    def _bitmap(self, rows):
+        bits = np.zeros(self.size, dtype=np.uint8)
+        bits[rows] = 1
+        return int.from_bytes(np.packbits(bits, bitorder='little').tobytes(), 'little')
+
+    def _bits(self, mask):
+        """位图 -> 布尔数组（第 i 项 = 第 i 个任务）"""
+        raw = np.frombuffer(mask.to_bytes((self.size + 7) // 8, 'little'), dtype=np.uint8)
+        return np.unpackbits(raw, bitorder='little', count=self.size).astype(bool)
+
+    def values(self, field):
+        return list(self.bitmaps[field])
+
+    def resolve(self, expr=None):
+        """
+        过滤条件 -> 位图
+
+        expr: {字段: [取值, ...], ...}（字段间 AND、取值间 OR），
+              或 {'and': [expr, ...]} / {'or': [expr, ...]} / {'not': expr}，None 表示全部
+        """
+        if not expr:
+            return self.all
+        if 'and' in expr or 'or' in expr or 'not' in expr:
+            if 'not' in expr:
+                return self.all & ~self.resolve(expr['not'])
+            parts = [self.resolve(e) for e in expr.get('and', expr.get('or', []))]
+            mask = self.all if 'and' in expr else 0
+            for part in parts:
+                mask = mask & part if 'and' in expr else mask | part
+            return mask
+
+        mask = self.all
+        for field, values in expr.items():
+            if field not in self.bitmaps:
+                raise KeyError(field)
+            if not isinstance(values, (list, tuple, set)):
+                values = [values]
+            bitmaps = self.bitmaps[field]
+            field_mask = 0
+            sparse_rows = []
+            for value in values:
+                entry = bitmaps.get(value, 0)
+                if isinstance(entry, int):
+                    field_mask |= entry
+                else:
+                    sparse_rows.append(entry)
+            if sparse_rows:
+                field_mask |= self._bitmap(np.concatenate(sparse_rows))
+            mask &= field_mask
+        return mask
+
+    def rows(self, mask):
+        """位图 -> 任务下标（升序）"""
+        if not mask:
+            return []
+        return np.flatnonzero(self._bits(mask)).tolist()
+
+    def select(self, expr=None):
+        """满足条件的任务（保持原顺序）"""
+        return [self.tasks[i] for i in self.rows(self.resolve(expr))]
+
+    def counts(self, filters=None):
+        """
+        各分面取值的任务数（筛选侧栏）
+
+        字段过滤条件下，某分面的计数不受该分面自身的选择影响，
+        以便侧栏中同一分面的其它取值仍显示可选数量
+        """
+        filters = filters or {}
+        plain = not ('and' in filters or 'or' in filters or 'not' in filters)
+        full = self.resolve(filters)
+        result = {}
+        for field, bitmaps in self.bitmaps.items():
+            if plain and field in filters:
+                base = self.resolve({f: v for f, v in filters.items() if f != field})
+            else:
+                base = full
+            sparse_counts = None
+            if field in self.sparse:
+                ids, rows = self.sparse[field]
+                sparse_counts = np.bincount(ids, weights=self._bits(base)[rows], minlength=len(bitmaps))
+            result[field] = {
+                value: (entry & base).bit_count() if isinstance(entry, int) else int(sparse_counts[k])
+                for k, (value, entry) in enumerate(bitmaps.items())
+            }
+        return result
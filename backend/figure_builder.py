@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+轻量图表构建 - 用普通 dict / list 直接拼出 Plotly 图表（data + layout）
+
+go.Bar / go.Scatter / fig.add_trace / fig.add_vline 每次调用都会跑 plotly 的属性校验并深拷贝参数，
+大计划下这部分占了生成图表的大部分时间。这里提供同名的最小替代：
+
+    Figure()                      add_trace / add_vline / add_vrect / update_layout / update_yaxes / to_json
+    Bar(**props) / Scatter(**props)  直接返回 trace 字典
+
+to_json 使用与 plotly 相同的 JSON 编码器（日期、numpy 数组、NaN 的处理一致），
+结果可直接放进 generate_html 中的 Plotly.newPlot。
+
+调试模式（环境变量 GANTT_VALIDATE_FIGURES=1 或 gantt_chart.py --check-figures）：
+to_json 时再用 plotly 完整校验一遍，并确认两者解析后的 JSON 完全一致，不一致时抛出 ValueError。
+"""
+
+import base64
+import json
+import os
+from functools import lru_cache
+
+import numpy as np
+import plotly.io as pio
+from plotly.shapeannotation import axis_spanning_shape_annotation
+
+VALIDATE = os.environ.get('GANTT_VALIDATE_FIGURES', '') not in ('', '0')
+
+# plotly 的“魔法下划线”写法（font_size -> font.size）中可能出现的前缀
+MAGIC_PREFIXES = ('font', 'line', 'marker', 'title')
+
+# 字符串会被 plotly 展开为 {'text': ...} 的属性
+TITLE_KEYS = ('title',)
+
+
+def Bar(**props):
+    props['type'] = 'bar'
+    return props
+
+
+def Scatter(**props):
+    props['type'] = 'scatter'
+    return props
+
+
+@lru_cache(maxsize=None)
+def default_template():
+    """当前默认主题（plotly 会把它写进每张图的 layout.template）"""
+    return pio.templates[pio.templates.default].to_plotly_json()
+
+
+def _expand(props):
+    """展开魔法下划线并把标题字符串规范为 {'text': ...}（与 plotly 校验后的结构一致）"""
+    result = {}
+    for key, value in props.items():
+        if isinstance(value, dict):
+            value = _expand(value)
+        if key in TITLE_KEYS and isinstance(value, str):
+            value = {'text': value}
+        head, sep, rest = key.partition('_')
+        if sep and head in MAGIC_PREFIXES:
+            _merge(result, {head: _expand({rest: value})})
+        elif isinstance(value, dict) and isinstance(result.get(key), dict):
+            _merge(result[key], value)
+        else:
+            result[key] = value
+    return result
+
+
+def _merge(target, updates):
+    for key, value in updates.items():
+        if isinstance(value, dict) and isinstance(target.get(key), dict):
+            _merge(target[key], value)
+        else:
+            target[key] = value
+    return target
+
+
+class Figure:
+    """go.Figure 中本项目用到的部分，内部只是 {'data': [...], 'layout': {...}}"""
+
+    def __init__(self, validate=None):
+        self.data = []
+        self.layout = {'template': default_template()}
+        self.validate = VALIDATE if validate is None else validate
+
+    def add_trace(self, trace):
+        self.data.append(trace)
+        return self
+
+    def update_layout(self, **props):
+        _merge(self.layout, _expand(props))
+        return self
+
+    def update_yaxes(self, **props):
+        return self.update_layout(yaxis=props)
+
+    def add_vline(self, x, annotation=None, **props):
+        shape = {'type': 'line', 'x0': x, 'x1': x, 'xref': 'x', 'y0': 0, 'y1': 1, 'yref': 'y domain'}
+        return self._add_spanning_shape('vline', shape, annotation, props)
+
+    def add_vrect(self, x0, x1, annotation=None, **props):
+        shape = {'type': 'rect', 'x0': x0, 'x1': x1, 'xref': 'x', 'y0': 0, 'y1': 1, 'yref': 'y domain'}
+        return self._add_spanning_shape('vrect', shape, annotation, props)
+
+    def _add_spanning_shape(self, shape_type, shape, annotation, props):
+        """纵向线 / 色带及其标注，标注位置规则直接沿用 plotly.shapeannotation"""
+        annotation_kwargs = {k: props.pop(k) for k in list(props) if k.startswith('annotation_')}
+        _merge(shape, _expand(props))
+        self.layout.setdefault('shapes', []).append(shape)
+
+        annotation = axis_spanning_shape_annotation(
+            _expand(annotation) if annotation else None, shape_type, shape, annotation_kwargs)
+        if annotation is not None:
+            annotation.update(xref=shape['xref'], yref=shape['yref'])
+            self.layout.setdefault('annotations', []).append(annotation)
+        return self
+
+    def to_dict(self):
+        return {'data': self.data, 'layout': self.layout}
+
+    def to_plotly(self):
+        """转换为 go.Figure（完整校验，属性错误时抛出 ValueError）"""
+        import plotly.graph_objects as go
+        return go.Figure(self.to_dict())
+
+    def to_json(self):
+        content = pio.json.to_json_plotly(self.to_dict())
+        if self.validate:
+            expected = _decode_typed_arrays(json.loads(self.to_plotly().to_json()))
+            if json.loads(content) != expected:
+                raise ValueError(f'图表 JSON 与 plotly 校验结果不一致: {_first_difference(json.loads(content), expected)}')
+        return content
+
+
+def _decode_typed_arrays(value):
+    """plotly 把 numpy 数组编码为 {'dtype', 'bdata'}（base64），比对前还原为列表（NaN -> null）"""
+    if isinstance(value, dict):
+        if 'bdata' in value and 'dtype' in value:
+            array = np.frombuffer(base64.b64decode(value['bdata']), dtype=value['dtype'])
+            if 'shape' in value:
+                array = array.reshape([int(n) for n in str(value['shape']).split(',')])
+            return json.loads(pio.json.to_json_plotly(array))
+        return {k: _decode_typed_arrays(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_decode_typed_arrays(v) for v in value]
+    return value
+
+
+def _first_difference(actual, expected, path='$'):
+    """两份 JSON 的第一处差异（调试模式的报错信息）"""
+    if isinstance(actual, dict) and isinstance(expected, dict):
+        for key in sorted(set(actual) | set(expected)):
+            if key not in actual or key not in expected:
+                return f'{path}.{key} 仅存在于{"plotly" if key in expected else "构建结果"}'
+            if actual[key] != expected[key]:
+                return _first_difference(actual[key], expected[key], f'{path}.{key}')
+    elif isinstance(actual, list) and isinstance(expected, list) and len(actual) == len(expected):
+        for i, (a, e) in enumerate(zip(actual, expected)):
+            if a != e:
+                return _first_difference(a, e, f'{path}[{i}]')
+    return f'{path}: {str(actual)[:80]} != {str(expected)[:80]}'
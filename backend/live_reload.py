@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+热更新 - 监听计划源文件变化，防抖后后台重新生成，并通过 SSE 通知所有页面
+
+    FileWatcher       轮询 mtime，变化平静 debounce 秒后触发回调（在后台线程中执行）
+    EventBroadcaster  将事件推送给所有订阅者（SSE 连接）
+"""
+
+import json
+import os
+import threading
+import time
+
+# SSE 连接空闲时发送注释行保活的间隔（秒）
+KEEPALIVE_INTERVAL = 15
+
+
+def format_sse(event, data):
+    """编码一条 SSE 消息"""
+    payload = json.dumps(data, ensure_ascii=False)
+    return f'event: {event}\ndata: {payload}\n\n'.encode('utf-8')
+
+
+SSE_KEEPALIVE = b': keep-alive\n\n'
+
+
+class EventBroadcaster:
+    """SSE 广播：订阅者为可调用对象，收到编码好的消息字节"""
+
+    def __init__(self):
+        self._listeners = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, listener):
+        with self._lock:
+            self._listeners.append(listener)
+        return listener
+
+    def unsubscribe(self, listener):
+        with self._lock:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+    @property
+    def subscriber_count(self):
+        return len(self._listeners)
+
+    def publish(self, event, data):
+        message = format_sse(event, data)
+        with self._lock:
+            listeners = list(self._listeners)
+        for listener in listeners:
+            listener(message)
+
+
+class FileWatcher(threading.Thread):
+    """轮询文件 mtime 的监听线程，带防抖"""
+
+    def __init__(self, paths, callback, interval=0.1, debounce=0.25):
+        super().__init__(name='gantt-file-watcher', daemon=True)
+        self.paths = [os.path.abspath(p) for p in paths]
+        self.callback = callback
+        self.interval = interval
+        self.debounce = debounce
+        self._stop_event = threading.Event()
+
+    def _snapshot(self):
+        mtimes = {}
+        for path in self.paths:
+            try:
+                stat = os.stat(path)
+                mtimes[path] = (stat.st_mtime_ns, stat.st_size)
+            except FileNotFoundError:
+                mtimes[path] = None
+        return mtimes
+
+    def run(self):
+        last = self._snapshot()
+        pending_since = None
+        changed = set()
+
+        while not self._stop_event.wait(self.interval):
+            current = self._snapshot()
+            diff = {p for p in current if current[p] != last[p]}
+            last = current
+
+            if diff:
+                # 连续保存时重新计时，直到平静 debounce 秒
+                changed |= diff
+                pending_since = time.monotonic()
+            elif pending_since is not None and time.monotonic() - pending_since >= self.debounce:
+                paths, changed, pending_since = sorted(changed), set(), None
+                try:
+                    self.callback(paths)
+                except Exception as e:
+                    print(f"❌ 重新生成失败: {e}")
+
+    def stop(self):
+        self._stop_event.set()
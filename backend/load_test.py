@@ -0,0 +1,393 @@
+#!/usr/bin/env python3
+"""
+压测工具 - 对本地 server.py 按请求组合施压，报告各并发级别的吞吐量与 p50 / p95 / p99 延迟
+
+    - asyncio 实现的最小 HTTP/1.1 客户端（keep-alive；服务端关闭连接时自动重连），不依赖外部服务
+    - 闭环模型：每个并发连接发完一个请求、收完响应后再发下一个
+    - 请求组合按权重随机抽取（固定随机种子，多次运行可比）
+    - 每个并发级别先预热，预热期间的请求不计入结果
+    - 结果可追加保存到 JSON Lines 文件，用 --compare 对比不同服务模式 / 版本
+
+用法:
+    # 自动启动 server.py（threading 模式）并压测
+    python3 backend/load_test.py --start threading --label threading --save loadtest.jsonl
+    python3 backend/load_test.py --start asyncio --label asyncio --save loadtest.jsonl
+
+    # 压测已启动的服务器，自定义请求组合与并发级别
+    python3 backend/load_test.py --url http://127.0.0.1:3003 --concurrency 1 8 32 --mix /api/tasks=5 /=1
+
+    # 对比保存的结果
+    python3 backend/load_test.py --compare loadtest.jsonl
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from collections import Counter
+from datetime import datetime
+from urllib.parse import urlsplit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 默认请求组合: (路径, 权重)
+DEFAULT_MIX = (
+    ('/', 2),
+    ('/AI_Project_Gantt_2026.html', 2),
+    ('/AI_Project_Gantt_2026.figures.json', 2),
+    ('/api/tasks?phase=H1', 2),
+    ('/api/modules', 1),
+    ('/api/milestones', 1),
+    ('/api/search?q=%E5%AE%A2%E6%9C%8D', 1),
+    ('/api/facets', 1),
+    ('/metrics', 1),
+)
+
+DEFAULT_CONCURRENCY = (1, 4, 16, 64)
+DEFAULT_DURATION = 10.0
+DEFAULT_WARMUP = 2.0
+REQUEST_TIMEOUT = 30.0
+SERVER_START_TIMEOUT = 60.0
+PERCENTILES = (50, 95, 99)
+
+
+def percentile(sorted_values, p):
+    """最近秩法百分位"""
+    if not sorted_values:
+        return None
+    k = math.ceil(p / 100 * len(sorted_values)) - 1
+    return sorted_values[max(0, min(len(sorted_values) - 1, k))]
+
+
+# ======================================================================
+# HTTP 客户端
+# ======================================================================
+
+class Connection:
+    """一个 keep-alive 连接；服务端声明关闭（或 HTTP/1.0）时下次请求前重连"""
+
+    def __init__(self, host, port, accept_encoding):
+        self.host = host
+        self.port = port
+        self.accept_encoding = accept_encoding
+        self.reader = None
+        self.writer = None
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except OSError:
+                pass
+        self.reader = self.writer = None
+
+    async def request(self, path):
+        """发送 GET，返回 (状态码, 响应体字节数)"""
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        head = (f'GET {path} HTTP/1.1\r\nHost: {self.host}:{self.port}\r\n'
+                f'Accept-Encoding: {self.accept_encoding}\r\nConnection: keep-alive\r\n\r\n')
+        self.writer.write(head.encode('latin-1'))
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError('服务端在响应前关闭了连接')
+        version, status = status_line.split(None, 2)[:2]
+        headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        keep_alive = version == b'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+        if 'content-length' in headers:
+            size = int(headers['content-length'])
+            await self.reader.readexactly(size)
+        elif headers.get('transfer-encoding', '').lower() == 'chunked':
+            size = await self._read_chunked()
+        else:
+            size = len(await self.reader.read())
+            keep_alive = False
+        if not keep_alive:
+            await self.close()
+        return int(status), size
+
+    async def _read_chunked(self):
+        size = 0
+        while True:
+            length = int((await self.reader.readline()).split(b';')[0], 16)
+            if length == 0:
+                await self.reader.readline()
+                return size
+            await self.reader.readexactly(length + 2)
+            size += length
+
+
+# ======================================================================
+# 压测
+# ======================================================================
+
+async def run_level(host, port, mix, concurrency, duration, warmup, accept_encoding, seed):
+    """一个并发级别：返回统计结果"""
+    paths = [path for path, _ in mix]
+    weights = [weight for _, weight in mix]
+    samples = []  # (路径, 状态码, 字节数, 延迟秒)
+    errors = Counter()
+    measure_from = time.perf_counter() + warmup
+    stop_at = measure_from + duration
+
+    async def client(k):
+        rng = random.Random(seed * 1000 + k)
+        conn = Connection(host, port, accept_encoding)
+        try:
+            while True:
+                started = time.perf_counter()
+                if started >= stop_at:
+                    return
+                path = rng.choices(paths, weights)[0]
+                try:
+                    status, size = await asyncio.wait_for(conn.request(path), REQUEST_TIMEOUT)
+                except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError) as e:
+                    await conn.close()
+                    if started >= measure_from:
+                        errors[type(e).__name__] += 1
+                    continue
+                if started >= measure_from:
+                    samples.append((path, status, size, time.perf_counter() - started))
+        finally:
+            await conn.close()
+
+    await asyncio.gather(*(client(k) for k in range(concurrency)))
+    return summarize(samples, errors, concurrency, duration)
+
+
+def _latency_stats(latencies):
+    latencies = sorted(latencies)
+    stats = {f'p{p}_ms': round(percentile(latencies, p) * 1000, 3) if latencies else None for p in PERCENTILES}
+    stats['max_ms'] = round(latencies[-1] * 1000, 3) if latencies else None
+    return stats
+
+
+def summarize(samples, errors, concurrency, duration):
+    statuses = Counter(str(status) for _, status, _, _ in samples)
+    total_bytes = sum(size for _, _, size, _ in samples)
+    by_path = {}
+    for path, _, _, latency in samples:
+        by_path.setdefault(path, []).append(latency)
+    result = {
+        'concurrency': concurrency,
+        'requests': len(samples),
+        'errors': sum(errors.values()),
+        'error_types': dict(errors),
+        'statuses': dict(statuses),
+        'rps': round(len(samples) / duration, 2),
+        'mb_per_s': round(total_bytes / duration / 1e6, 3),
+    }
+    result.update(_latency_stats([latency for _, _, _, latency in samples]))
+    result['paths'] = {path: dict(requests=len(values), **_latency_stats(values))
+                       for path, values in sorted(by_path.items())}
+    return result
+
+
+# ======================================================================
+# 本地启动 server.py
+# ======================================================================
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_server(mode, port, extra_args=()):
+    """启动 server.py 并等待端口可连接，返回子进程"""
+    process = subprocess.Popen(
+        [sys.executable, 'server.py', '--mode', mode, '--port', str(port), '--no-open', *extra_args],
+        cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + SERVER_START_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'server.py 启动失败（退出码 {process.returncode}）')
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.5):
+                return process
+        except OSError:
+            time.sleep(0.2)
+    stop_server(process)
+    raise RuntimeError(f'server.py 在 {SERVER_START_TIMEOUT:.0f} 秒内未开始监听')
+
+
+def stop_server(process):
+    process.terminate()
+    try:
+        process.wait(10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+# ======================================================================
+# 报告
+# ======================================================================
+
+def print_level(result):
+    errors = f"，错误 {result['errors']}" if result['errors'] else ''
+    non_ok = {k: v for k, v in result['statuses'].items() if not k.startswith('2')}
+    statuses = f"，非 2xx {non_ok}" if non_ok else ''
+    print(f"   并发 {result['concurrency']:>4}: {result['rps']:>9.1f} req/s  {result['mb_per_s']:>8.2f} MB/s  "
+          f"p50 {_ms(result['p50_ms'])}  p95 {_ms(result['p95_ms'])}  p99 {_ms(result['p99_ms'])}  "
+          f"max {_ms(result['max_ms'])}  ({result['requests']} 个请求{errors}{statuses})")
+
+
+def print_paths(result):
+    for path, stats in result['paths'].items():
+        print(f"        {path:<45}{stats['requests']:>8}  p50 {_ms(stats['p50_ms'])}  p95 {_ms(stats['p95_ms'])}  "
+              f"p99 {_ms(stats['p99_ms'])}")
+
+
+def _ms(value):
+    return f'{value:>8.2f} ms' if value is not None else '       - ms'
+
+
+def compare(path):
+    """按并发级别对比保存的多次结果"""
+    with open(path, encoding='utf-8') as f:
+        runs = [json.loads(line) for line in f if line.strip()]
+    if not runs:
+        print(f"⚠️  {path} 中没有结果")
+        return
+    levels = sorted({level['concurrency'] for run in runs for level in run['levels']})
+    print(f"📊 {path}（{len(runs)} 次运行）")
+    for concurrency in levels:
+        print(f"\n   并发 {concurrency}")
+        print(f"   {'标签':<20}{'版本':<10}{'时间':<22}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'错误':>8}")
+        for run in runs:
+            level = next((l for l in run['levels'] if l['concurrency'] == concurrency), None)
+            if level is None:
+                continue
+            print(f"   {run.get('label') or '-':<20}{run.get('revision') or '-':<10}{run['timestamp']:<22}"
+                  f"{level['rps']:>10.1f}{_num(level['p50_ms'])}{_num(level['p95_ms'])}{_num(level['p99_ms'])}"
+                  f"{level['errors']:>8}")
+
+
+def _num(value):
+    return f'{value:>10.2f}' if value is not None else f"{'-':>10}"
+
+
+def parse_mix(items):
+    mix = []
+    for item in items:
+        path, sep, weight = item.rpartition('=')
+        if not sep or not path.startswith('/'):
+            raise ValueError(f'请求组合应为 路径=权重: {item}')
+        try:
+            weight = float(weight)
+        except ValueError:
+            raise ValueError(f'权重应为数字: {item}')
+        if weight <= 0:
+            raise ValueError(f'权重应大于 0: {item}')
+        mix.append((path, weight))
+    return mix
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='server.py 压测：吞吐量与 p50 / p95 / p99 延迟')
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument('--url', default='http://127.0.0.1:3003', help='已启动的服务器地址（默认 %(default)s）')
+    target.add_argument('--start', metavar='模式', choices=('threading', 'asyncio'),
+                        help='在空闲端口上启动 server.py（threading / asyncio），压测后停止')
+    target.add_argument('--compare', metavar='结果文件', help='对比 --save 保存的结果，不压测')
+    parser.add_argument('--server-arg', action='append', default=[], metavar='参数',
+                        help='--start 时传给 server.py 的额外参数（可重复）')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=list(DEFAULT_CONCURRENCY),
+                        help='并发连接数（可多个，依次压测）')
+    parser.add_argument('--duration', type=float, default=DEFAULT_DURATION, help='每个并发级别的计时秒数')
+    parser.add_argument('--warmup', type=float, default=DEFAULT_WARMUP, help='每个并发级别的预热秒数')
+    parser.add_argument('--mix', nargs='+', metavar='路径=权重', help='请求组合（默认覆盖首页、HTML、静态文件与 API）')
+    parser.add_argument('--accept-encoding', default='gzip', help="Accept-Encoding 请求头（'identity' 表示不压缩）")
+    parser.add_argument('--seed', type=int, default=0, help='请求抽样的随机种子')
+    parser.add_argument('--paths', action='store_true', help='同时打印各路径的延迟')
+    parser.add_argument('--label', help='结果标签（如服务模式、版本）')
+    parser.add_argument('--save', metavar='结果文件', help='把结果追加到 JSON Lines 文件')
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        compare(args.compare)
+        return 0
+    try:
+        mix = parse_mix(args.mix) if args.mix else list(DEFAULT_MIX)
+    except ValueError as e:
+        parser.error(str(e))
+    if any(c < 1 for c in args.concurrency):
+        parser.error('并发数应大于 0')
+
+    process = None
+    if args.start:
+        port = free_port()
+        print(f"🚀 启动 server.py --mode {args.start}（端口 {port}）...")
+        try:
+            process = start_server(args.start, port, args.server_arg)
+        except RuntimeError as e:
+            print(f"❌ {e}")
+            return 1
+        host = '127.0.0.1'
+        mode = args.start
+    else:
+        url = urlsplit(args.url)
+        host, port = url.hostname or '127.0.0.1', url.port or 80
+        mode = None
+
+    run = {
+        'label': args.label,
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'revision': git_revision(),
+        'target': f'{host}:{port}',
+        'mode': mode,
+        'duration': args.duration,
+        'warmup': args.warmup,
+        'accept_encoding': args.accept_encoding,
+        'mix': mix,
+        'levels': [],
+    }
+    print(f"🎯 压测 http://{host}:{port}（每级预热 {args.warmup:g} 秒 + 计时 {args.duration:g} 秒）")
+    try:
+        for concurrency in args.concurrency:
+            result = asyncio.run(run_level(host, port, mix, concurrency, args.duration, args.warmup,
+                                           args.accept_encoding, args.seed))
+            run['levels'].append(result)
+            print_level(result)
+            if args.paths:
+                print_paths(result)
+    except KeyboardInterrupt:
+        print("\n⚠️  已中断")
+    finally:
+        if process is not None:
+            stop_server(process)
+
+    if args.save and run['levels']:
+        with open(args.save, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(run, ensure_ascii=False) + '\n')
+        print(f"💾 结果已追加到 {args.save}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+服务器运行指标 - /metrics（Prometheus 文本格式）
+
+    gantt_http_requests_total              请求数（路径 / 方法 / 状态码）
+    gantt_http_request_duration_seconds    请求耗时直方图（路径，不含 SSE 长连接）
+    gantt_http_response_bytes_total        发送字节数（路径）
+    gantt_http_requests_in_flight          正在处理的请求数
+    gantt_cache_requests_total             缓存命中 / 未命中（api 响应缓存、render 结果缓存、静态文件缓存）
+    gantt_render_duration_seconds          生成耗时直方图（regenerate: --watch 热更新，render: POST /render）
+
+记录时不加锁：每个线程写自己的分片（thread-local），抓取时再汇总。
+只有线程第一次记录时才需要加锁登记分片；已结束线程的分片会被并入汇总分片，分片数不会无限增长。
+"""
+
+import threading
+import time
+from bisect import bisect_left
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# 耗时直方图的桶上界（秒）
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+RENDER_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# 名称 -> (类型, 说明, 直方图的桶)
+METRICS = {
+    'gantt_http_requests_total': ('counter', 'HTTP 请求数', None),
+    'gantt_http_request_duration_seconds': ('histogram', 'HTTP 请求耗时（秒）', LATENCY_BUCKETS),
+    'gantt_http_response_bytes_total': ('counter', '发送的响应字节数', None),
+    'gantt_http_requests_in_flight': ('gauge', '正在处理的请求数', None),
+    'gantt_cache_requests_total': ('counter', '缓存查询次数（按命中 / 未命中）', None),
+    'gantt_render_duration_seconds': ('histogram', '图表生成耗时（秒）', RENDER_BUCKETS),
+}
+
+# 分片数超过此值时，登记新分片前先合并已结束线程的分片
+SHARD_COMPACT_THRESHOLD = 64
+
+# 固定取值的路径标签，其余归入 static（避免任意 URL 造成标签爆炸）
+ROUTES = ('/', '/events', '/metrics', '/render')
+
+
+def route_label(path):
+    if path in ROUTES:
+        return path
+    if path.startswith('/api/'):
+        from backend.query_api import ENDPOINT_FIELDS
+        return path if path in ENDPOINT_FIELDS else '/api/other'
+    return 'static'
+
+
+class _Shard:
+    def __init__(self, thread):
+        self.thread = thread
+        self.values = {}      # (名称, 标签) -> 数值
+        self.histograms = {}  # (名称, 标签) -> [各桶计数..., +Inf 计数, 总和]
+
+
+class Metrics:
+    """按线程分片的指标注册表"""
+
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._shards = []
+        self._retired = _Shard(None)
+
+    def _shard(self):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = _Shard(threading.current_thread())
+            with self._lock:
+                if len(self._shards) >= SHARD_COMPACT_THRESHOLD:
+                    self._compact()
+                self._shards.append(shard)
+        return shard
+
+    def _compact(self):
+        """把已结束线程的分片并入汇总分片（调用方持有锁）"""
+        alive = []
+        for shard in self._shards:
+            if shard.thread.is_alive():
+                alive.append(shard)
+            else:
+                _merge_into(self._retired, shard)
+        self._shards = alive
+
+    # ------------------------------------------------------------------
+    # 记录
+    # ------------------------------------------------------------------
+
+    def inc(self, name, labels=(), value=1):
+        values = self._shard().values
+        key = (name, labels)
+        values[key] = values.get(key, 0) + value
+
+    def observe(self, name, value, labels=()):
+        histograms = self._shard().histograms
+        key = (name, labels)
+        buckets = METRICS[name][2]
+        counts = histograms.get(key)
+        if counts is None:
+            counts = histograms[key] = [0] * (len(buckets) + 2)
+        counts[bisect_left(buckets, value)] += 1
+        counts[-1] += value
+
+    def request_started(self):
+        self.inc('gantt_http_requests_in_flight')
+        return time.perf_counter()
+
+    def request_finished(self, started, method, path, status, sent, streaming=False):
+        route = route_label(path)
+        self.inc('gantt_http_requests_in_flight', value=-1)
+        self.inc('gantt_http_requests_total', (('method', method), ('path', route), ('status', str(status))))
+        self.inc('gantt_http_response_bytes_total', (('path', route),), sent)
+        if not streaming:
+            self.observe('gantt_http_request_duration_seconds', time.perf_counter() - started, (('path', route),))
+
+    def cache_lookup(self, cache, hit):
+        self.inc('gantt_cache_requests_total', (('cache', cache), ('result', 'hit' if hit else 'miss')))
+
+    def render_finished(self, kind, seconds):
+        self.observe('gantt_render_duration_seconds', seconds, (('kind', kind),))
+
+    # ------------------------------------------------------------------
+    # 导出
+    # ------------------------------------------------------------------
+
+    def snapshot(self):
+        """汇总所有分片，返回一个 _Shard"""
+        total = _Shard(None)
+        with self._lock:
+            self._compact()
+            for shard in [self._retired] + self._shards:
+                _merge_into(total, shard)
+        return total
+
+    def render(self):
+        """Prometheus 文本格式"""
+        total = self.snapshot()
+        lines = []
+        for name, (kind, help_text, buckets) in METRICS.items():
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            if kind == 'histogram':
+                for labels, counts in sorted((k[1], v) for k, v in total.histograms.items() if k[0] == name):
+                    cumulative = 0
+                    for bound, count in zip(buckets + ('+Inf',), counts):
+                        cumulative += count
+                        lines.append(f'{name}_bucket{_labels(labels + (("le", str(bound)),))} {cumulative}')
+                    lines.append(f'{name}_sum{_labels(labels)} {_number(counts[-1])}')
+                    lines.append(f'{name}_count{_labels(labels)} {cumulative}')
+            else:
+                samples = sorted((k[1], v) for k, v in total.values.items() if k[0] == name)
+                if not samples and kind == 'gauge':
+                    samples = [((), 0)]
+                for labels, value in samples:
+                    lines.append(f'{name}{_labels(labels)} {_number(value)}')
+        return ('\n'.join(lines) + '\n').encode('utf-8')
+
+
+def _merge_into(target, shard):
+    # dict(...) 在 CPython 中一次性复制，其它线程同时写入也不会出错
+    for key, value in dict(shard.values).items():
+        target.values[key] = target.values.get(key, 0) + value
+    for key, counts in dict(shard.histograms).items():
+        merged = target.histograms.get(key)
+        if merged is None:
+            target.histograms[key] = list(counts)
+        else:
+            for i, count in enumerate(list(counts)):
+                merged[i] += count
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in labels)
+    return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(labels, escaped)) + '}'
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+# 进程内共用的注册表
+metrics = Metrics()
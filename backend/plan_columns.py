@@ -0,0 +1,757 @@
+#!/usr/bin/env python3
+"""
+列式计划快照 - 可内存映射（mmap）的二进制任务表（.gcol）
+
+JSON / tasks_list 每次读取都要整份解析；列式快照按列存放，打开时只读文件头，
+各列用 np.frombuffer 直接映射到文件上，用到哪一列才读哪一列（操作系统按页加载）。
+
+    字符串列  字典编码：int32 编码（-1 表示 None）+ 字典（int64 偏移 + UTF-8 字节）
+    日期列    int32 日序数（date.toordinal，含结束日）
+    数值列    int32 / float64 / bool；number 为 float64 + 标记原值是否为整数的 bool 列（解码后类型不变）
+
+文件布局（小端）:
+    0   8 字节魔数 b'GANTCOL1'
+    8   uint64 文件头长度
+    16  文件头 JSON：{'format', 'version', 'timestamp', 'source',
+                      'tables': {'tasks' / 'links': {'rows', 'columns': {列名: {'type', 'offset', ...}}}}}
+    之后为各列数据，每块按 64 字节对齐
+
+任务表的列与 plan_sources 的任务记录一致，另有写入时算好的 parent_row（父任务行号，-1 表示没有）；
+links 表为 id / source / target / type。
+
+读取（load_columns）只建立映射，任务记录按需解码（ColumnRecords）；
+渲染与导出用到的层级、汇总、过滤直接在列上计算（ColumnTree / ColumnRollup），不为每个任务建字典。
+
+用法:
+    python3 backend/plan_columns.py convert local_data.json plan.gcol
+    python3 backend/plan_columns.py info plan.gcol
+"""
+
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+from collections.abc import Sequence
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+MAGIC = b'GANTCOL1'
+FORMAT_NAME = 'gantt-columns'
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+
+# 表 -> ((列名, 类型, 缺省值), ...)
+TABLES = {
+    'tasks': (
+        ('id', 'str', None),
+        ('parent', 'str', None),
+        ('module', 'str', ''),
+        ('task', 'str', ''),
+        ('start', 'date', None),
+        ('end', 'date', None),
+        ('owner', 'str', ''),
+        ('progress', 'number', 0),
+        ('phase', 'str', ''),
+        ('is_milestone', 'bool', False),
+        ('type', 'str', 'task'),
+        ('order', 'int32', 0),
+        ('open', 'bool', True),
+        ('view', 'str', ''),
+    ),
+    'links': (
+        ('id', 'str', None),
+        ('source', 'str', None),
+        ('target', 'str', None),
+        ('type', 'str', None),
+    ),
+}
+
+# 写入时派生的列（不属于任务记录）
+DERIVED_COLUMNS = ('parent_row',)
+
+# date.toordinal() - EPOCH_ORDINAL 即 datetime64[D] 的整数值
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+DTYPES = {
+    'str': '<i4',
+    'date': '<i4',
+    'int32': '<i4',
+    'float64': '<f8',
+    'number': '<f8',
+    'bool': '|b1',
+}
+
+
+def is_columns_file(path):
+    try:
+        with open(path, 'rb') as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+# ======================================================================
+# 写入
+# ======================================================================
+
+class _Writer:
+    """按顺序追加对齐的数据块，记录各块偏移（相对数据区起点）"""
+
+    def __init__(self):
+        self.blocks = []
+        self.size = 0
+
+    def add(self, data):
+        data = bytes(data)
+        padding = -self.size % ALIGNMENT
+        if padding:
+            self.blocks.append(b'\0' * padding)
+            self.size += padding
+        offset = self.size
+        self.blocks.append(data)
+        self.size += len(data)
+        return offset
+
+
+def _encode_strings(values):
+    """字符串列 -> (int32 编码, 字典)；None 编码为 -1"""
+    values = [None if v is None else str(v) for v in values]
+    codes, uniques = pd.factorize(pd.Series(values, dtype=object), use_na_sentinel=True)
+    return codes.astype('<i4'), list(uniques)
+
+
+def _encode_dates(values):
+    codes, uniques = pd.factorize(pd.Series([str(v)[:10] for v in values], dtype=object))
+    ordinals = np.array([date.fromisoformat(v).toordinal() for v in uniques], dtype='<i4')
+    return ordinals[codes] if len(codes) else np.zeros(0, dtype='<i4')
+
+
+def _parent_rows(id_codes, id_dictionary, parent_codes, parent_dictionary):
+    """父任务的行号：id 重复时取首次出现的行；没有父任务、父任务不存在或指向自身时为 -1"""
+    id_codes = np.asarray(id_codes)
+    codes, first = np.unique(id_codes, return_index=True)
+    row_of_code = np.full(len(id_dictionary) + 1, -1, dtype=np.int64)
+    row_of_code[codes] = first
+    # 父任务字典 -> id 字典中的编码（末尾一项对应编码 -1，即 None）
+    to_id = pd.Index(id_dictionary, dtype=object).get_indexer(pd.Index(parent_dictionary, dtype=object))
+    to_id = np.append(to_id, -1)
+    rows = row_of_code[to_id[np.asarray(parent_codes)]]
+    rows[rows == np.arange(len(rows))] = -1
+    return rows.astype('<i4')
+
+
+def _encode_table(writer, name, rows):
+    """返回 (表的元数据, 字符串列的 (编码, 字典))"""
+    columns = {}
+    strings = {}
+    for column, kind, default in TABLES[name]:
+        values = [row.get(column, default) for row in rows]
+        meta = {'type': kind}
+        if kind == 'str':
+            codes, dictionary = _encode_strings(values)
+            strings[column] = (codes, dictionary)
+            encoded = [v.encode('utf-8') for v in dictionary]
+            offsets = np.zeros(len(encoded) + 1, dtype='<i8')
+            np.cumsum([len(v) for v in encoded], out=offsets[1:])
+            meta['dictionary'] = {
+                'size': len(encoded),
+                'offsets': writer.add(offsets.tobytes()),
+                'data': writer.add(b''.join(encoded)),
+            }
+            array = codes
+        elif kind == 'date':
+            array = _encode_dates(values)
+        elif kind == 'number':
+            integers = np.array([isinstance(v, int) for v in values], dtype=DTYPES['bool'])
+            meta['integers'] = writer.add(integers.tobytes())
+            array = np.array(values, dtype=DTYPES[kind])
+        else:
+            array = np.array(values, dtype=DTYPES[kind])
+        meta['offset'] = writer.add(array.tobytes())
+        columns[column] = meta
+    return {'rows': len(rows), 'columns': columns}, strings
+
+
+def write_columns(path, tasks, links=(), timestamp=None, source=None):
+    """任务记录（plan_sources 格式）及依赖 -> 列式快照文件（先写临时文件再替换）"""
+    writer = _Writer()
+    tasks_meta, strings = _encode_table(writer, 'tasks', list(tasks))
+    parent_row = _parent_rows(*strings['id'], *strings['parent'])
+    tasks_meta['columns']['parent_row'] = {'type': 'int32', 'offset': writer.add(parent_row.tobytes())}
+    tables = {
+        'tasks': tasks_meta,
+        'links': _encode_table(writer, 'links', list(links))[0],
+    }
+    header = json.dumps({
+        'format': FORMAT_NAME,
+        'version': FORMAT_VERSION,
+        'timestamp': timestamp,
+        'source': source,
+        'tables': tables,
+    }, ensure_ascii=False).encode('utf-8')
+    # 数据区起点对齐
+    header += b' ' * (-(16 + len(header)) % ALIGNMENT)
+
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<Q', len(header)))
+        f.write(header)
+        for block in writer.blocks:
+            f.write(block)
+    os.replace(tmp_path, path)
+    return path
+
+
+# ======================================================================
+# 读取
+# ======================================================================
+
+class ColumnTable:
+    """映射在文件上的一张表；列数组为只读视图，字符串 / 日期在取记录时才解码"""
+
+    def __init__(self, buffer, base, name, meta):
+        self.name = name
+        self.rows = meta['rows']
+        self._buffer = buffer
+        self._base = base
+        self._meta = meta['columns']
+        self._dictionaries = {}
+        self._parent_rows = None
+
+    def __len__(self):
+        return self.rows
+
+    @property
+    def columns(self):
+        return list(self._meta)
+
+    def column(self, name):
+        """原始列：字符串为字典编码，日期为日序数"""
+        meta = self._meta[name]
+        return np.frombuffer(self._buffer, dtype=DTYPES[meta['type']], count=self.rows,
+                             offset=self._base + meta['offset'])
+
+    def dictionary(self, name):
+        """字符串列的字典（解码后缓存）"""
+        if name not in self._dictionaries:
+            meta = self._meta[name]['dictionary']
+            offsets = np.frombuffer(self._buffer, dtype='<i8', count=meta['size'] + 1,
+                                    offset=self._base + meta['offsets']).tolist()
+            start = self._base + meta['data']
+            data = bytes(self._buffer[start:start + offsets[-1]])
+            self._dictionaries[name] = [data[a:b].decode('utf-8') for a, b in zip(offsets, offsets[1:])]
+        return self._dictionaries[name]
+
+    def strings(self, name, codes):
+        """字符串列的编码 -> 字符串（-1 为 None）；编码少于字典项时只解码用到的项"""
+        meta = self._meta[name]['dictionary']
+        if name in self._dictionaries or len(codes) * 4 >= meta['size']:
+            lookup = self.dictionary(name)
+            return [lookup[code] if code >= 0 else None for code in codes]
+        offsets = np.frombuffer(self._buffer, dtype='<i8', count=meta['size'] + 1, offset=self._base + meta['offsets'])
+        start = self._base + meta['data']
+        decoded = {-1: None}
+        for code in codes:
+            if code not in decoded:
+                a, b = offsets[code:code + 2].tolist()
+                decoded[code] = bytes(self._buffer[start + a:start + b]).decode('utf-8')
+        return [decoded[code] for code in codes]
+
+    def values(self, name, rows=None):
+        """解码后的列（Python 列表）；rows 为行号数组时只取这些行"""
+        kind = self._meta[name]['type']
+        array = self.column(name)
+        if rows is not None:
+            array = array[rows]
+        if kind == 'str':
+            return self.strings(name, array.tolist())
+        if kind == 'date':
+            days, inverse = np.unique(array, return_inverse=True)
+            iso = [date.fromordinal(d).isoformat() for d in days.tolist()]
+            return [iso[k] for k in inverse.tolist()]
+        if kind == 'number':
+            integers = np.frombuffer(self._buffer, dtype=DTYPES['bool'], count=self.rows,
+                                     offset=self._base + self._meta[name]['integers'])
+            if rows is not None:
+                integers = integers[rows]
+            return [int(v) if k else v for v, k in zip(array.tolist(), integers.tolist())]
+        return array.tolist()
+
+    def records(self, rows=None):
+        names = [name for name in self.columns if name not in DERIVED_COLUMNS]
+        columns = [self.values(name, rows) for name in names]
+        return [dict(zip(names, row)) for row in zip(*columns)]
+
+    def days(self, name, rows=None):
+        """日期列 -> datetime64[D] 数组"""
+        array = self.column(name)
+        if rows is not None:
+            array = array[rows]
+        return (array - EPOCH_ORDINAL).astype('datetime64[D]')
+
+    def categorical(self, name, rows=None):
+        """字符串列 -> pd.Categorical（直接复用编码，-1 为缺失值）"""
+        codes = self.column(name)
+        if rows is not None:
+            codes = codes[rows]
+        return pd.Categorical.from_codes(codes, pd.Index(self.dictionary(name), dtype=object))
+
+    def grouped(self, name, rows=None):
+        """
+        列 -> (组号, 取值)：组号按取值在这些行中首次出现的顺序编号
+
+        字符串列的编码 -1（None）也单独成组
+        """
+        codes = self.column(name)
+        if rows is not None:
+            codes = codes[rows]
+        unique, first, inverse = np.unique(codes, return_index=True, return_inverse=True)
+        order = np.argsort(first, kind='stable')
+        rank = np.empty(len(order), dtype=np.int64)
+        rank[order] = np.arange(len(order))
+        if self._meta[name]['type'] == 'str':
+            values = self.strings(name, unique[order].tolist())
+        else:
+            values = unique[order].tolist()
+        return rank[inverse.reshape(-1)], values
+
+    def parent_rows(self):
+        """父任务的行号（-1 表示没有）；写入时已算好，没有该列的文件按字典现算"""
+        if 'parent_row' in self._meta:
+            return self.column('parent_row')
+        if self._parent_rows is None:
+            self._parent_rows = _parent_rows(self.column('id'), self.dictionary('id'),
+                                             self.column('parent'), self.dictionary('parent'))
+        return self._parent_rows
+
+
+class PlanColumns:
+    """
+    打开列式快照（只读 mmap）
+
+        tasks / links   ColumnTable
+        timestamp       快照时间（没有时为 None）
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+        with open(path, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f'{path} 不是列式计划快照')
+            # 映射整个文件；映射建立后即可关闭文件
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        header_size, = struct.unpack_from('<Q', self._mmap, len(MAGIC))
+        header = json.loads(bytes(self._mmap[16:16 + header_size]))
+        if header.get('format') != FORMAT_NAME or header.get('version') != FORMAT_VERSION:
+            raise ValueError(f"{path} 的格式版本不受支持: {header.get('format')} v{header.get('version')}")
+        self.header = header
+        self.timestamp = header.get('timestamp')
+        base = 16 + header_size
+        self.tasks = ColumnTable(self._mmap, base, 'tasks', header['tables']['tasks'])
+        self.links = ColumnTable(self._mmap, base, 'links', header['tables']['links'])
+
+    def to_plan(self):
+        """解码为 plan_sources 的计划格式"""
+        return {'tasks': self.tasks.records(), 'links': self.links.records(), 'source': self.path,
+                'timestamp': self.timestamp}
+
+
+def load_columns(path):
+    """
+    列式快照 -> {'tasks', 'links', 'source', 'timestamp'}（与 load_snapshot 的返回一致）
+
+    tasks 为按需解码的 ColumnRecords，依赖链接直接解码
+    """
+    columns = PlanColumns(path)
+    return {'tasks': ColumnRecords(columns.tasks), 'links': columns.links.records(), 'source': columns.path,
+            'timestamp': columns.timestamp}
+
+
+# ======================================================================
+# 列式计算：按需解码的记录、层级索引、分组汇总
+# ======================================================================
+
+class ColumnRecords(Sequence):
+    """
+    任务表（或其中部分行）的记录序列：取下标时解码单条，遍历时分块解码
+
+    只按记录使用时与任务字典列表一样；校验、层级、汇总、挣值等按列计算的调用方
+    识别该类型后直接使用 table / rows 上的列
+    """
+
+    # 遍历时每次解码的行数
+    CHUNK = 65536
+
+    def __init__(self, table, rows=None):
+        self.table = table
+        self.rows = np.arange(table.rows) if rows is None else np.asarray(rows, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return self.table.records(self.rows[i])
+        return self.table.records(self.rows[[i]])[0]
+
+    def __iter__(self):
+        for lo in range(0, len(self.rows), self.CHUNK):
+            yield from self.table.records(self.rows[lo:lo + self.CHUNK])
+
+    def subset(self, mask):
+        """按布尔数组（或行位置）取部分记录"""
+        return ColumnRecords(self.table, self.rows[mask])
+
+    def column(self, name):
+        return self.table.column(name)[self.rows]
+
+    def days(self, name):
+        return self.table.days(name, self.rows)
+
+    def grouped(self, name):
+        return self.table.grouped(name, self.rows)
+
+    def objects(self, name):
+        """字符串列 -> object 数组（元素为字典中共用的字符串对象，编码 -1 为 None）"""
+        lookup = np.array(self.table.dictionary(name) + [None], dtype=object)
+        return lookup[self.column(name)]
+
+    def frame(self, columns):
+        """校验 / 统计用的任务表：字符串列为 Categorical，日期列为共用的 ISO 字符串（每个日期只解码一次）"""
+        data = {}
+        for name in columns:
+            kind = self.table._meta[name]['type']
+            if kind == 'str':
+                data[name] = self.table.categorical(name, self.rows)
+            elif kind == 'date':
+                days, inverse = np.unique(self.column(name), return_inverse=True)
+                iso = np.array([date.fromordinal(d).isoformat() for d in days.tolist()], dtype=object)
+                data[name] = iso[inverse.reshape(-1)]
+            else:
+                data[name] = self.column(name)
+        return pd.DataFrame(data)
+
+    def values(self, name, positions):
+        """指定位置的某列原值"""
+        return self.table.values(name, self.rows[positions])
+
+    def leaves(self):
+        """不是任何任务父任务的记录（同 earned_value.leaf_tasks）"""
+        parent = self.table.parent_rows()
+        id_codes = self.table.column('id')
+        parent_ids = id_codes[parent[parent >= 0]]
+        return self.subset(~np.isin(id_codes[self.rows], parent_ids))
+
+    def mask(self, expr=None):
+        """分面过滤条件（FacetIndex.resolve 的格式）-> 布尔数组"""
+        from backend.facet_index import FACET_FIELDS
+
+        result = np.ones(len(self.rows), dtype=bool)
+        if not expr:
+            return result
+        if 'not' in expr:
+            return ~self.mask(expr['not'])
+        if 'and' in expr:
+            for e in expr['and']:
+                result &= self.mask(e)
+            return result
+        if 'or' in expr:
+            result[:] = False
+            for e in expr['or']:
+                result |= self.mask(e)
+            return result
+
+        for field, values in expr.items():
+            if field not in FACET_FIELDS:
+                raise KeyError(field)
+            if not isinstance(values, (list, tuple, set)):
+                values = [values]
+            if field == 'status':
+                # 规则同 data_exporter.determine_status
+                progress = self.column('progress')
+                status = {'planned': progress == 0, 'completed': progress == 100}
+                status['in-progress'] = ~(status['planned'] | status['completed'])
+                field_mask = np.zeros(len(self.rows), dtype=bool)
+                for value in values:
+                    if value in status:
+                        field_mask |= status[value]
+                result &= field_mask
+            elif field == 'is_milestone':
+                result &= np.isin(self.column(field), [bool(v) for v in values if isinstance(v, (bool, int))])
+            else:
+                position = {v: k for k, v in enumerate(self.table.dictionary(field))}
+                codes = [position[v] for v in values if v in position]
+                result &= np.isin(self.column(field), codes)
+        return result
+
+
+class ColumnTree:
+    """
+    TaskTree 的列式版本（接口相同）：父子关系取自 parent_row 列，
+    深度、先序、欧拉区间与汇总都按层整列计算；records 只在取到时解码（渲染 / 导出的可见行）
+
+    records: ColumnRecords，节点 i 即其中第 i 条记录
+    """
+
+    def __init__(self, records):
+        self.records = records
+        table = records.table
+        n = len(records)
+
+        # 全表行号 -> 节点号，父任务不在这些行中时为根
+        position = np.full(table.rows + 1, -1, dtype=np.int64)
+        position[records.rows] = np.arange(n)
+        parent = position[table.parent_rows()[records.rows]]
+
+        depth = np.full(n, -1, dtype=np.int64)
+        roots = list(np.flatnonzero(parent < 0))
+        self._walk(parent, depth, parent < 0)
+        # 处于环中的节点从任何根都不可达：依次把下标最小的提升为根（同 TaskTree）
+        while (depth < 0).any():
+            node = int(np.argmax(depth < 0))
+            parent[node] = -1
+            roots.append(node)
+            start = np.zeros(n, dtype=bool)
+            start[node] = True
+            self._walk(parent, depth, start)
+        self.parent = parent
+        self.depth = depth
+        self.roots = [int(r) for r in roots]
+
+        # 先序：按各层祖先的（同级次序）逐层排序；同级按 order、再按出现顺序；较浅的节点补 -1 排在子孙之前
+        sibling_rank = np.empty(n, dtype=np.int64)
+        sibling_rank[np.lexsort((np.arange(n), table.column('order')[records.rows]))] = np.arange(n)
+        root_rank = np.full(n, -1, dtype=np.int64)
+        root_rank[self.roots] = np.arange(len(self.roots))
+        max_depth = int(depth.max()) if n else 0
+        ancestor = np.arange(n)
+        ancestor_depth = depth.copy()
+        keys = []
+        for level in range(max_depth, -1, -1):
+            up = ancestor_depth > level
+            ancestor[up] = parent[ancestor[up]]
+            ancestor_depth[up] -= 1
+            rank = root_rank if level == 0 else sibling_rank
+            keys.append(np.where(depth >= level, rank[ancestor], -1))
+        self.preorder = np.lexsort(keys) if n else np.zeros(0, dtype=np.int64)
+
+        # 子树大小：自下而上逐层累加
+        size = np.ones(n, dtype=np.int64)
+        for level in range(max_depth, 0, -1):
+            rows = np.flatnonzero(depth == level)
+            np.add.at(size, parent[rows], size[rows])
+        self.tin = np.empty(n, dtype=np.int64)
+        self.tin[self.preorder] = np.arange(n)
+        self.tout = self.tin + size
+        self.leaf = size == 1
+        self._max_depth = max_depth
+        self._rollups = None
+        self._owners = None
+
+    @staticmethod
+    def _walk(parent, depth, frontier):
+        """从 frontier 逐层向下标记深度（只标记尚未标记的节点）"""
+        safe = np.maximum(parent, 0)
+        level = 0
+        frontier = frontier & (depth < 0)
+        while frontier.any():
+            depth[frontier] = level
+            frontier = (depth < 0) & (parent >= 0) & frontier[safe]
+            level += 1
+
+    def __len__(self):
+        return len(self.records)
+
+    def is_leaf(self, node):
+        return bool(self.leaf[node])
+
+    def is_descendant(self, node, ancestor):
+        return self.tin[ancestor] <= self.tin[node] < self.tout[ancestor]
+
+    def closed_nodes(self):
+        """记录中标记为收起（open=False）的分组节点"""
+        return set(np.flatnonzero(~self.leaf & ~self.records.column('open')).tolist())
+
+    def visible(self, collapsed=()):
+        """展开/折叠后的可见行（先序）；收起的节点本身可见，其子树整体跳过"""
+        if not collapsed:
+            return self.preorder.tolist()
+        rows = []
+        pos = 0
+        while pos < len(self.preorder):
+            node = int(self.preorder[pos])
+            rows.append(node)
+            pos = int(self.tout[node]) if node in collapsed else pos + 1
+        return rows
+
+    def filtered(self, mask):
+        """只保留 mask 为真的叶子任务及其祖先（同 gantt_chart.filter_tree）"""
+        keep = self.leaf & mask
+        for level in range(self._max_depth, 0, -1):
+            rows = np.flatnonzero(keep & (self.depth == level))
+            keep[self.parent[rows]] = True
+        return ColumnTree(self.records.subset(keep))
+
+    def leaf_records(self):
+        return self.records.subset(self.leaf)
+
+    def rollups(self):
+        """
+        全部节点的 (最早开始, 最晚结束, 进度和, 叶子数)，日期为日序数
+
+        自下而上逐层归约；同层节点按先序累加，进度和与逐个子节点求和的结果一致
+        """
+        if self._rollups is None:
+            start, end = self.spans(self.records.column('start'), self.records.column('end'))
+            progress = np.where(self.leaf, self.records.column('progress'), 0.0)
+            count = self.leaf.astype(np.int64)
+            for rows in self._levels():
+                np.add.at(progress, self.parent[rows], progress[rows])
+                np.add.at(count, self.parent[rows], count[rows])
+            self._rollups = (start, end, progress, count)
+        return self._rollups
+
+    def spans(self, start, end):
+        """按叶子的开始 / 结束日期（日序数，按节点号）归约出各节点的最早开始、最晚结束"""
+        start = np.where(self.leaf, start, np.iinfo(np.int32).max).astype(np.int64)
+        end = np.where(self.leaf, end, np.iinfo(np.int32).min).astype(np.int64)
+        for rows in self._levels():
+            np.minimum.at(start, self.parent[rows], start[rows])
+            np.maximum.at(end, self.parent[rows], end[rows])
+        return start, end
+
+    def _levels(self):
+        """自最深一层起各层的非根节点（层内按先序）"""
+        for level in range(self._max_depth, 0, -1):
+            rows = np.flatnonzero(self.depth == level)
+            yield rows[np.argsort(self.tin[rows])]
+
+    def rollup(self, node):
+        """节点汇总（同 TaskTree.rollup）；负责人按先序首次出现的顺序，只对取到的节点计算"""
+        start, end, progress, count = self.rollups()
+        if self._owners is None:
+            self._owners = self.records.column('owner')
+        nodes = self.preorder[self.tin[node]:self.tout[node]]
+        unique, first = np.unique(self._owners[nodes[self.leaf[nodes]]], return_index=True)
+        owners = self.records.table.strings('owner', unique[np.argsort(first)].tolist())
+        return {
+            'start': date.fromordinal(int(start[node])),
+            'end': date.fromordinal(int(end[node])),
+            'progress': float(progress[node]) / int(count[node]),
+            'owners': [o for o in owners if o],
+            'leaf_count': int(count[node]),
+        }
+
+
+class ColumnRollup:
+    """
+    Rollup 的只读列式版本（概览图 / 导出用，接口同 Rollup 的 keys / summary / summaries）
+
+    各分组的起止、进度和、工期加权进度和、负责人 / 阶段顺序都由分组归约一次算出
+    """
+
+    def __init__(self, records, fields=('module', 'phase')):
+        self.fields = tuple(fields)
+        self._summaries = {}
+        start = records.column('start').astype(np.int64)
+        end = records.column('end').astype(np.int64)
+        progress = records.column('progress').astype(float)
+        duration = np.maximum(end - start, 0) + 1
+        owner_codes, owners = records.grouped('owner')
+        phase_codes, phases = records.grouped('phase')
+
+        for field in self.fields:
+            codes, values = records.grouped(field)
+            k = len(values)
+            first = np.full(k, np.iinfo(np.int64).max)
+            last = np.full(k, np.iinfo(np.int64).min)
+            np.minimum.at(first, codes, start)
+            np.maximum.at(last, codes, end)
+            count = np.bincount(codes, minlength=k)
+            progress_sum = np.bincount(codes, progress, k)
+            weighted_sum = np.bincount(codes, progress * duration, k)
+            duration_sum = np.bincount(codes, duration, k)
+            group_owners = self._first_seen(codes, owner_codes, owners, k)
+            group_phases = self._first_seen(codes, phase_codes, phases, k)
+            self._summaries[field] = {
+                value: (int(first[i]), int(last[i]), float(progress_sum[i]), int(count[i]),
+                        float(weighted_sum[i]), float(duration_sum[i]), group_owners[i], group_phases[i])
+                for i, value in enumerate(values)
+            }
+
+    @staticmethod
+    def _first_seen(groups, codes, values, k):
+        """每组内取值按首次出现的顺序 -> [[取值, ...], ...]"""
+        pairs = groups * (len(values) + 1) + codes
+        unique, first = np.unique(pairs, return_index=True)
+        result = [[] for _ in range(k)]
+        for pair in unique[np.argsort(first)].tolist():
+            result[pair // (len(values) + 1)].append(values[pair % (len(values) + 1)])
+        return result
+
+    def __len__(self):
+        return sum(s[3] for s in self._summaries[self.fields[0]].values())
+
+    def keys(self, field='module'):
+        return list(self._summaries[field])
+
+    def summary(self, field, value, weighted=False):
+        start, end, progress_sum, count, weighted_sum, duration_sum, owners, phases = self._summaries[field][value]
+        return {
+            field: value,
+            'start': date.fromordinal(start),
+            'end': date.fromordinal(end),
+            'progress': weighted_sum / duration_sum if weighted else progress_sum / count,
+            'phase': phases[0],
+            'owners': list(owners),
+            'task_count': count,
+        }
+
+    def summaries(self, field='module', weighted=False):
+        return [self.summary(field, value, weighted) for value in self._summaries[field]]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='列式计划快照（.gcol）')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('convert', help='把计划来源转换为列式快照')
+    p.add_argument('source', help="计划来源: 'tasks_list'、JSON 快照/导出文件或 gantt.db")
+    p.add_argument('output', help='输出路径（如 plan.gcol）')
+
+    p = sub.add_parser('info', help='查看列式快照的行数与各列')
+    p.add_argument('path')
+    args = parser.parse_args(argv)
+
+    if args.command == 'convert':
+        from backend.plan_sources import load_plan
+        plan = load_plan(args.source)
+        write_columns(args.output, plan['tasks'], plan['links'], plan.get('timestamp'), plan['source'])
+        print(f"✅ 已写出 {len(plan['tasks'])} 个任务、{len(plan['links'])} 条依赖: {args.output} "
+              f"({os.path.getsize(args.output) / 1024:.1f} KB)")
+        return 0
+
+    started = time.perf_counter()
+    columns = PlanColumns(args.path)
+    elapsed = time.perf_counter() - started
+    print(f"📦 {args.path}（打开耗时 {elapsed * 1000:.2f} ms）")
+    print(f"   - 快照时间: {columns.timestamp or '无'}")
+    for table in (columns.tasks, columns.links):
+        print(f"   - {table.name}: {table.rows} 行")
+        for name in table.columns:
+            meta = table._meta[name]
+            extra = f"，字典 {meta['dictionary']['size']} 项" if 'dictionary' in meta else ''
+            print(f"       {name:<14}{meta['type']}{extra}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+计划快照对比工具 - 校验迁移 / 恢复结果，可作为部署脚本的检查关卡
+
+任意两个计划来源之间对比（tasks_list、导出 JSON、DHTMLX 快照、gantt.db）：
+    - 按 id 建立记录字典
+    - 直接比较规范化后的字段元组，相等即未变
+    - 只对元组不同的记录逐字段比较
+整体 O(n)。
+
+用法:
+    python3 backend/plan_diff.py local_data_backup_20260224_101458.json api/gantt.db
+    python3 backend/plan_diff.py tasks_list frontend/src/data/initial-data.json --json
+
+退出码: 0 无差异，1 有差异（可直接用于 deploy 脚本中的 `|| exit 1`）
+"""
+
+import argparse
+import gc
+import json
+import os
+import sys
+from operator import itemgetter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from backend.plan_sources import load_plan
+
+# 参与对比的规范化字段
+DIFF_FIELDS = ('parent', 'task', 'start', 'end', 'owner', 'progress', 'phase', 'is_milestone', 'type')
+
+# 依赖链接的对比键
+LINK_FIELDS = ('source', 'target', 'type')
+
+
+def _describe(record):
+    return {'id': record['id'], 'task': record['task'], 'module': record['module']}
+
+
+def diff_records(old_records, new_records, fields=DIFF_FIELDS):
+    """
+    对比两组任务记录
+
+    返回 (新增记录, 删除记录, 修改列表)，修改项为 (旧记录, 新记录, {字段: (旧值, 新值)})
+    """
+    old_by_id = {r['id']: r for r in old_records}
+    new_by_id = {r['id']: r for r in new_records}
+
+    row_of = itemgetter(*fields) if len(fields) > 1 else (lambda r: (r[fields[0]],))
+
+    added, changed = [], []
+    for key, record in new_by_id.items():
+        before = old_by_id.get(key)
+        if before is None:
+            added.append(record)
+            continue
+        # 元组直接比较（哈希相同不代表相等，只比哈希会漏掉碰撞的修改）
+        if row_of(before) == row_of(record):
+            continue
+        field_changes = {
+            f: (before[f], record[f]) for f in fields if before[f] != record[f]
+        }
+        changed.append((before, record, field_changes))
+
+    removed = [r for k, r in old_by_id.items() if k not in new_by_id]
+    return added, removed, changed
+
+
+def diff_links(old_links, new_links):
+    old = {tuple(str(l.get(f)) for f in LINK_FIELDS) for l in old_links}
+    new = {tuple(str(l.get(f)) for f in LINK_FIELDS) for l in new_links}
+    as_dict = lambda keys: [dict(zip(LINK_FIELDS, k)) for k in sorted(keys)]
+    return as_dict(new - old), as_dict(old - new)
+
+
+def diff_plans(old_plan, new_plan, fields=DIFF_FIELDS):
+    """对比两份计划（load_plan 的返回值），返回可 JSON 序列化的报告"""
+    added, removed, changed = diff_records(old_plan['tasks'], new_plan['tasks'], fields)
+    links_added, links_removed = diff_links(old_plan['links'], new_plan['links'])
+    return {
+        'old': old_plan['source'],
+        'new': new_plan['source'],
+        'summary': {
+            'old_count': len(old_plan['tasks']),
+            'new_count': len(new_plan['tasks']),
+            'added': len(added),
+            'removed': len(removed),
+            'changed': len(changed),
+            'unchanged': len(new_plan['tasks']) - len(added) - len(changed),
+            'links_added': len(links_added),
+            'links_removed': len(links_removed),
+        },
+        'added': [_describe(r) for r in added],
+        'removed': [_describe(r) for r in removed],
+        'changed': [
+            dict(_describe(new), fields={f: list(v) for f, v in changes.items()})
+            for _, new, changes in changed
+        ],
+        'links': {'added': links_added, 'removed': links_removed},
+    }
+
+
+def has_differences(report):
+    s = report['summary']
+    return any(s[k] for k in ('added', 'removed', 'changed', 'links_added', 'links_removed'))
+
+
+def format_report(report, limit=None):
+    """人类可读的对比报告"""
+    s = report['summary']
+    lines = [
+        f"📊 对比: {report['old']} → {report['new']}",
+        f"   任务数: {s['old_count']} → {s['new_count']}",
+        f"   ➕ 新增 {s['added']}  ➖ 删除 {s['removed']}  ✏️  修改 {s['changed']}  未变 {s['unchanged']}",
+    ]
+    if s['links_added'] or s['links_removed']:
+        lines.append(f"   🔗 依赖: 新增 {s['links_added']}  删除 {s['links_removed']}")
+
+    def section(title, items, render):
+        if not items:
+            return
+        lines.append(f"\n{title}")
+        for item in items[:limit]:
+            lines.extend(render(item))
+        if limit is not None and len(items) > limit:
+            lines.append(f"   ... 另有 {len(items) - limit} 项")
+
+    label = lambda r: f"{r['id']}  {r['task']}" + (f"  ({r['module']})" if r['module'] != r['task'] else '')
+    section('➕ 新增:', report['added'], lambda r: [f"   {label(r)}"])
+    section('➖ 删除:', report['removed'], lambda r: [f"   {label(r)}"])
+    section('✏️  修改:', report['changed'], lambda r: [f"   {label(r)}"] + [
+        f"       {field}: {old!r} → {new!r}" for field, (old, new) in r['fields'].items()
+    ])
+    section('🔗 新增依赖:', report['links']['added'], lambda l: [f"   {l['source']} → {l['target']} (type {l['type']})"])
+    section('🔗 删除依赖:', report['links']['removed'], lambda l: [f"   {l['source']} → {l['target']} (type {l['type']})"])
+
+    if not has_differences(report):
+        lines.append("\n✅ 两份计划一致")
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='对比两份计划数据')
+    parser.add_argument('old', help="旧计划: 'tasks_list'、JSON 快照/导出文件或 gantt.db")
+    parser.add_argument('new', help='新计划（同上）')
+    parser.add_argument('--json', action='store_true', help='输出 JSON 报告')
+    parser.add_argument('--ignore', action='append', default=[], choices=DIFF_FIELDS,
+                        help='忽略的字段（可重复），如 --ignore progress')
+    parser.add_argument('--limit', type=int, default=50, help='文本报告中每类最多显示的条数')
+    args = parser.parse_args(argv)
+
+    fields = tuple(f for f in DIFF_FIELDS if f not in args.ignore)
+    # 大计划会一次性创建数十万个字典，期间暂停循环垃圾回收
+    gc.disable()
+    try:
+        report = diff_plans(load_plan(args.old), load_plan(args.new), fields)
+    finally:
+        gc.enable()
+
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print(format_report(report, args.limit))
+    return 1 if has_differences(report) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
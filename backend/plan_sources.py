@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+计划数据源 - 把各种来源统一成 Python 侧的任务记录
+
+任务记录字段（与 gantt_chart.tasks_list 对齐，另加 id / parent）:
+    id, parent, module, task, start, end (YYYY-MM-DD，含结束日),
+    owner, progress (0-100), phase, is_milestone, type, order, view
+
+支持的来源:
+    - gantt_chart.tasks_list
+    - DHTMLX 快照（local_data.json：projectTasks / productTasks）
+    - 前端导出 JSON（initial-data.json：tasks，或紧凑列式格式 backend/compact_json.py）
+    - 后端数据库（api/gantt.db：tasks / task_links 表）
+    - 列式快照（.gcol，backend/plan_columns.py，内存映射读取）
+"""
+
+import json
+import sqlite3
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+
+from backend.compact_json import decode_compact, is_compact
+
+# 前端运行在北京时间，DHTMLX 以 UTC 时间戳保存本地零点
+PLAN_TZ = timezone(timedelta(hours=8))
+
+# 快照中的任务分组（视图）
+SNAPSHOT_VIEWS = {
+    'projectTasks': 'project',
+    'productTasks': 'product',
+}
+
+# DHTMLX 根节点的 parent 取值
+ROOT_PARENTS = (None, 0, '0', '')
+
+# 进度（0-100）统一保留的小数位：导出的 0-1 小数换算回来、模块平均进度都按此取整，各来源可直接比较
+PROGRESS_DIGITS = 2
+
+
+@lru_cache(maxsize=65536)
+def parse_plan_date(value):
+    """
+    解析 DHTMLX / 导出 JSON 中的日期，返回 (date, 是否带时间)
+
+    '2025-12-21T16:00:00.000Z' -> 2025-12-22（北京时间），True
+    '2026-01-15'               -> 2026-01-15，False
+    """
+    if len(value) <= 10:
+        return datetime.strptime(value, '%Y-%m-%d').date(), False
+    moment = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(PLAN_TZ)
+    return moment.date(), True
+
+
+def normalize_dhtmlx_task(raw, view=''):
+    """DHTMLX 任务 -> 任务记录"""
+    start, _ = parse_plan_date(raw['start_date'])
+    end, timestamped = parse_plan_date(raw['end_date'])
+    # DHTMLX 的 end_date 是开区间（start + duration），转换为含结束日
+    if timestamped and end > start:
+        end -= timedelta(days=1)
+
+    parent = raw.get('parent')
+    progress = raw.get('progress') or 0
+    return {
+        'id': str(raw['id']),
+        'parent': None if parent in ROOT_PARENTS else str(parent),
+        'module': '',
+        'task': raw.get('text', ''),
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'owner': raw.get('owner') or '',
+        'progress': round(progress * 100, PROGRESS_DIGITS) if progress <= 1 else progress,
+        'phase': raw.get('phase') or '',
+        'is_milestone': bool(raw.get('is_milestone')) or raw.get('type') == 'milestone',
+        'type': raw.get('type', 'task'),
+        'order': raw.get('order', 0),
+        'open': raw.get('open', True),
+        'view': raw.get('view') or view,
+    }
+
+
+def assign_modules(records):
+    """module 字段取顶层祖先的名称（与 tasks_list 的一级分组对应）"""
+    by_id = {r['id']: r for r in records}
+    cache = {}
+
+    def root_of(record):
+        chain = []
+        seen = set()
+        while record['parent'] in by_id and record['id'] not in seen and record['id'] not in cache:
+            seen.add(record['id'])
+            chain.append(record)
+            record = by_id[record['parent']]
+        root = cache.get(record['id'], record)
+        for r in chain:
+            cache[r['id']] = root
+        cache[record['id']] = root
+        return root
+
+    for record in records:
+        record['module'] = root_of(record)['task']
+    return records
+
+
+def records_from_dhtmlx(raw_tasks, view=''):
+    return assign_modules([normalize_dhtmlx_task(t, view) for t in raw_tasks])
+
+
+def load_snapshot(path, views=tuple(SNAPSHOT_VIEWS)):
+    """
+    读取 DHTMLX 快照、前端导出 JSON 或列式快照（.gcol）
+
+    返回 {'tasks': 任务记录, 'links': 依赖链接, 'source': 路径, 'timestamp': 快照时间（没有时为 None）}
+    不同视图中重复的 id 会加上视图前缀，以保证整棵树内唯一
+    """
+    from backend.plan_columns import is_columns_file, load_columns
+    if is_columns_file(path):
+        return load_columns(path)
+
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    if is_compact(data):
+        data = decode_compact(data)
+    timestamp = data.get('timestamp')
+
+    # api/local-data-snapshot.json 等导出文件把快照包在 data 字段里
+    if isinstance(data.get('data'), dict):
+        data = data['data']
+
+    timestamp = data.get('timestamp', timestamp)
+
+    if 'tasks' in data:
+        return {'tasks': records_from_dhtmlx(data['tasks']), 'links': data.get('links', []), 'source': str(path),
+                'timestamp': timestamp}
+
+    records = []
+    seen = set()
+    for key in views:
+        view = SNAPSHOT_VIEWS.get(key, key)
+        view_records = [normalize_dhtmlx_task(t, view) for t in data.get(key, [])]
+        renamed = {r['id']: f"{view}:{r['id']}" for r in view_records if r['id'] in seen}
+        for r in view_records:
+            r['id'] = renamed.get(r['id'], r['id'])
+            r['parent'] = renamed.get(r['parent'], r['parent'])
+            seen.add(r['id'])
+        records.extend(view_records)
+
+    return {'tasks': assign_modules(records), 'links': data.get('links', []), 'source': str(path),
+            'timestamp': timestamp}
+
+
+def records_from_tasks_list(tasks):
+    """
+    tasks_list -> 两层任务记录：模块为根节点，任务为子节点
+
+    id 规则与 data_exporter 一致（module-N / task-N）
+    """
+    groups = {}
+    for task in tasks:
+        groups.setdefault(task['module'], []).append(task)
+
+    records = []
+    counter = 1
+    for module_order, (module, members) in enumerate(groups.items()):
+        module_id = f'module-{counter}'
+        counter += 1
+        records.append({
+            'id': module_id,
+            'parent': None,
+            'module': module,
+            'task': module,
+            'start': min(t['start'] for t in members),
+            'end': max(t['end'] for t in members),
+            'owner': '',
+            'progress': round(sum(t['progress'] for t in members) / len(members), PROGRESS_DIGITS),
+            'phase': members[0]['phase'],
+            'is_milestone': False,
+            'type': 'project',
+            'order': module_order,
+            'open': True,
+            'view': 'project',
+        })
+        for order, task in enumerate(members):
+            records.append(dict(task, id=f'task-{counter}', parent=module_id,
+                                type='task', order=order, open=True, view='project'))
+            counter += 1
+    return records
+
+
+def load_database(path):
+    """读取后端 SQLite 数据库（api/gantt.db）中的任务与依赖"""
+    conn = sqlite3.connect(f'file:{path}?mode=ro', uri=True)
+    conn.row_factory = sqlite3.Row
+    try:
+        tasks = [dict(row) for row in conn.execute('SELECT * FROM tasks ORDER BY "order", rowid')]
+        links = [dict(row) for row in conn.execute('SELECT * FROM task_links')]
+    finally:
+        conn.close()
+    return {'tasks': records_from_dhtmlx(tasks), 'links': links, 'source': str(path)}
+
+
+def load_plan(source):
+    """
+    按来源类型读取计划
+
+    source: 'tasks_list'（gantt_chart.py 中的数据）、.json 快照 / 导出文件、SQLite 数据库、列式快照
+    """
+    if source == 'tasks_list':
+        from gantt_chart import tasks_list
+        return {'tasks': records_from_tasks_list(tasks_list), 'links': [], 'source': 'tasks_list'}
+    with open(source, 'rb') as f:
+        header = f.read(16)
+    if header == b'SQLite format 3\x00':
+        return load_database(source)
+    return load_snapshot(source)
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+项目组合（portfolio）- 多个计划并排展示时用到的项目汇总索引与共享时间轴
+
+组合视图只画到模块一级（项目汇总行 + 各模块汇总行 + 里程碑），不需要逐任务渲染。
+每个计划的汇总（起止、进度、模块汇总、里程碑）计算一次后写入索引文件，
+按来源文件的 (mtime, size) 判断是否过期：未变化的计划直接取索引中的汇总，不再读取和解析。
+
+    项目汇总   {'name', 'source', 'start', 'end', 'progress', 'weighted_progress',
+                'task_count', 'owners', 'modules': [...], 'milestones': [...]}
+    时间轴     全部项目的最早开始 ~ 最晚结束，刻度间隔按跨度取月 / 季 / 半年 / 年
+
+用法:
+    python3 gantt_chart.py --portfolio plans/ other.gcol --today 2026-03-01
+    python3 backend/portfolio.py plans/            # 只更新索引并打印各项目汇总
+"""
+
+import argparse
+import json
+import os
+import sys
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+INDEX_VERSION = 1
+
+# 目录来源中视为计划文件的扩展名
+PLAN_EXTENSIONS = ('.json', '.gcol', '.db')
+
+# 时间轴末端在最晚结束日期之后留出的天数
+AXIS_PADDING_DAYS = 15
+
+# (跨度上限（月）, dtick, tickformat)，跨度越大刻度越稀
+TICK_STEPS = (
+    (18, 'M1', '%Y-%m'),
+    (48, 'M3', '%Y-%m'),
+    (120, 'M6', '%Y-%m'),
+    (None, 'M12', '%Y'),
+)
+
+
+def index_path(output_file):
+    """HTML 对应的项目汇总索引文件"""
+    return os.path.splitext(output_file)[0] + '.portfolio-index.json'
+
+
+def expand_sources(sources):
+    """来源列表展开为计划路径：目录取其中的计划文件（按文件名排序），'tasks_list' 原样保留"""
+    paths = []
+    for source in sources:
+        if source != 'tasks_list' and os.path.isdir(source):
+            paths.extend(sorted(
+                os.path.join(source, name) for name in os.listdir(source)
+                if name.endswith(PLAN_EXTENSIONS) and not name.endswith('.portfolio-index.json')
+            ))
+        else:
+            paths.append(source)
+    return paths
+
+
+def project_name(source):
+    if source == 'tasks_list':
+        return source
+    return os.path.splitext(os.path.basename(source))[0]
+
+
+# ======================================================================
+# 项目汇总
+# ======================================================================
+
+def summarize_plan(plan, name):
+    """计划（load_plan 的结果）-> 项目汇总（日期为 ISO 字符串，可直接写入索引）"""
+    from backend.rollup import Rollup
+    from backend.task_tree import TaskTree
+
+    tree = TaskTree(plan['tasks'])
+    leaves = [r for i, r in enumerate(tree.records) if tree.is_leaf(i)]
+    if not leaves:
+        raise ValueError(f'{name}: 计划中没有任务')
+    rollup = Rollup(leaves)
+    modules = []
+    for module in rollup.keys('module'):
+        summary = rollup.summary('module', module)
+        modules.append({
+            'module': module,
+            'start': summary['start'].isoformat(),
+            'end': summary['end'].isoformat(),
+            'progress': summary['progress'],
+            'phase': summary['phase'],
+            'owners': summary['owners'],
+            'task_count': summary['task_count'],
+        })
+
+    durations = [(date.fromisoformat(r['end'][:10]) - date.fromisoformat(r['start'][:10])).days + 1 for r in leaves]
+    progress = [float(r['progress']) for r in leaves]
+    return {
+        'name': name,
+        'source': plan['source'],
+        'timestamp': plan.get('timestamp'),
+        'start': min(m['start'] for m in modules),
+        'end': max(m['end'] for m in modules),
+        'progress': sum(progress) / len(progress),
+        'weighted_progress': sum(p * d for p, d in zip(progress, durations)) / sum(durations),
+        'task_count': len(leaves),
+        'owners': list(dict.fromkeys(owner for m in modules for owner in m['owners'])),
+        'modules': modules,
+        'milestones': [
+            {'task': r['task'], 'module': r['module'], 'date': r['start'][:10], 'progress': r['progress']}
+            for r in leaves if r['is_milestone']
+        ],
+    }
+
+
+class PortfolioIndex:
+    """
+    项目汇总索引（JSON 文件）
+
+    项目(source) 先按来源文件的 (mtime_ns, size) 查索引，命中时不读取计划；
+    未命中时读取、校验并汇总，save() 时写回。'tasks_list' 没有文件，每次都重新汇总。
+    failures 记录 load_portfolio 跳过的项目 [(来源, 原因), ...]
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        self.failures = []
+        self._dirty = False
+        if path and os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == INDEX_VERSION:
+                self.entries = data['projects']
+
+    def project(self, source, validate=True):
+        """项目汇总；读取或校验失败时抛出 ValueError，消息以项目名开头"""
+        from backend.plan_sources import load_plan
+        from backend.plan_validator import check_plan
+
+        name = project_name(source)
+        try:
+            key = None
+            if source != 'tasks_list':
+                stat = os.stat(source)
+                key = os.path.abspath(source)
+                entry = self.entries.get(key)
+                if entry and entry['mtime_ns'] == stat.st_mtime_ns and entry['size'] == stat.st_size:
+                    self.hits += 1
+                    return entry['summary']
+
+            plan = load_plan(source)
+            if validate:
+                check_plan(plan['tasks'])
+        except (OSError, ValueError) as e:
+            raise ValueError(f'{name}（{source}）: {e}') from e
+        summary = summarize_plan(plan, name)
+        self.misses += 1
+        if key is not None:
+            self.entries[key] = {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size, 'summary': summary}
+            self._dirty = True
+        return summary
+
+    def save(self):
+        if not self.path or not self._dirty:
+            return
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': INDEX_VERSION, 'projects': self.entries}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+        self._dirty = False
+
+
+def load_portfolio(sources, index_file=None, validate=True):
+    """
+    来源列表 -> 项目汇总列表（按来源顺序），以及用到的索引（含命中统计）
+
+    单个计划读取 / 校验失败时跳过，原因记入 index.failures；全部失败时抛出 ValueError
+    """
+    index = PortfolioIndex(index_file)
+    projects = []
+    for source in expand_sources(sources):
+        try:
+            projects.append(index.project(source, validate))
+        except ValueError as e:
+            index.failures.append((source, str(e)))
+    index.save()
+    if not projects:
+        if index.failures:
+            raise ValueError('没有可用的计划\n' + '\n'.join(message for _, message in index.failures))
+        raise ValueError('没有找到计划文件')
+    return projects, index
+
+
+def format_failures(failures):
+    """跳过的项目 -> 可打印的说明"""
+    return '\n'.join(f"⚠️  跳过 {message}" for _, message in failures)
+
+
+# ======================================================================
+# 共享时间轴
+# ======================================================================
+
+def time_axis(start, end):
+    """
+    日期范围 -> 横轴设置 {'range', 'dtick', 'tickformat'}
+
+    起点取开始月份的 1 日，终点在结束日期后留 AXIS_PADDING_DAYS 天
+    """
+    if isinstance(start, str):
+        start = date.fromisoformat(start[:10])
+    if isinstance(end, str):
+        end = date.fromisoformat(end[:10])
+    first = start.replace(day=1)
+    last = end + timedelta(days=AXIS_PADDING_DAYS)
+    months = (last.year - first.year) * 12 + last.month - first.month + 1
+    for limit, dtick, tickformat in TICK_STEPS:
+        if limit is None or months <= limit:
+            break
+    return {'range': [first.isoformat(), last.isoformat()], 'dtick': dtick, 'tickformat': tickformat}
+
+
+def portfolio_axis(projects):
+    """全部项目共用的时间轴"""
+    return time_axis(min(p['start'] for p in projects), max(p['end'] for p in projects))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='更新项目组合的汇总索引并打印各项目汇总')
+    parser.add_argument('sources', nargs='+', help="计划来源: 目录、JSON 快照、.gcol、gantt.db 或 'tasks_list'")
+    parser.add_argument('--index', default='portfolio.portfolio-index.json', help='索引文件路径')
+    args = parser.parse_args(argv)
+
+    try:
+        projects, index = load_portfolio(args.sources, args.index)
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}")
+        return 1
+    if index.failures:
+        print(format_failures(index.failures))
+    axis = portfolio_axis(projects)
+    print(f"📚 {len(projects)} 个项目（索引命中 {index.hits}，重新汇总 {index.misses}）")
+    print(f"   时间轴: {axis['range'][0]} ~ {axis['range'][1]}，刻度 {axis['dtick']}")
+    for p in projects:
+        print(f"   - {p['name']}: {p['start']} ~ {p['end']}，{p['task_count']} 个任务，"
+              f"{len(p['modules'])} 个模块，平均进度 {p['progress']:.0f}%")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
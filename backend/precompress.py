@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+预压缩输出 - 生成时写出 .gz / .br，服务器按 Accept-Encoding 直接发送
+
+    - 压缩只在生成（build_outputs）时做一次，请求路径上不压缩
+    - .br 需要可选依赖 brotli（pip install brotli），未安装时只生成 .gz
+    - 压缩文件比原文件旧（原文件已更新、压缩文件还没写完）时视为无效，回退到原文件
+"""
+
+import gzip
+import os
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# (Content-Encoding, 文件后缀)，按服务端偏好排序
+ENCODINGS = (
+    ('br', '.br'),
+    ('gzip', '.gz'),
+)
+
+
+def _compress(encoding, content):
+    if encoding == 'br':
+        return brotli.compress(content, quality=11)
+    # mtime=0：内容不变时压缩结果不变
+    return gzip.compress(content, compresslevel=9, mtime=0)
+
+
+def available_encodings():
+    return [(encoding, suffix) for encoding, suffix in ENCODINGS if encoding != 'br' or brotli is not None]
+
+
+def write_compressed(path, content):
+    """
+    为已写出的 path 生成预压缩文件（先写临时文件再替换），返回生成的路径列表
+
+    content: path 的内容（str 按 UTF-8 编码）
+    """
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    written = []
+    for encoding, suffix in ENCODINGS:
+        target = path + suffix
+        if encoding == 'br' and brotli is None:
+            # 删除旧的 .br，避免发送过期内容
+            if os.path.exists(target):
+                os.remove(target)
+            continue
+        tmp_path = target + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(_compress(encoding, content))
+        os.replace(tmp_path, target)
+        written.append(target)
+    return written
+
+
+def accepted_encodings(header):
+    """Accept-Encoding -> 客户端接受的编码集合（q=0 表示拒绝）"""
+    accepted = set()
+    for item in (header or '').split(','):
+        name, _, params = item.strip().partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        for param in params.split(';'):
+            key, _, value = param.strip().partition('=')
+            if key == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if q > 0:
+            accepted.add(name)
+    if '*' in accepted:
+        accepted.update(encoding for encoding, _ in ENCODINGS)
+    return accepted
+
+
+def has_variants(full_path):
+    return any(os.path.exists(full_path + suffix) for _, suffix in ENCODINGS)
+
+
+def select_variant(full_path, accept_encoding):
+    """
+    选择要发送的预压缩文件，返回 (路径, Content-Encoding)；
+    没有可用的预压缩文件时返回 (None, None)
+    """
+    accepted = accepted_encodings(accept_encoding)
+    if not accepted:
+        return None, None
+    try:
+        original_mtime = os.stat(full_path).st_mtime_ns
+    except OSError:
+        return None, None
+    for encoding, suffix in ENCODINGS:
+        if encoding not in accepted:
+            continue
+        try:
+            stat = os.stat(full_path + suffix)
+        except OSError:
+            continue
+        if stat.st_mtime_ns >= original_mtime:
+            return full_path + suffix, encoding
+    return None, None
@@ -0,0 +1,430 @@
+#!/usr/bin/env python3
+"""
+任务变更日志 - 只追加的字段变更事件 + 周期性检查点（SQLite）
+
+tasks_list 与快照中的 progress 等字段原地覆盖，历史只剩零散的备份文件。
+每次记录计划时与日志中的最新状态逐字段比较，只追加变化的字段：
+
+    events       (seq, ts, task, field, value)   只追加（触发器禁止 UPDATE / DELETE）
+                 ts 为毫秒时间戳；task / field 为字典表编号；value 为 JSON 文本，
+                 NULL 表示字段被去掉，字段 '$removed' 表示任务被删除
+    checkpoints  (seq, ts, state)                每 CHECKPOINT_INTERVAL 个事件保存一次完整状态（zlib 压缩的 JSON），
+                                                 seq 为检查点包含的最后一个事件
+
+任意时刻的状态 = 该时刻之前最近的检查点 + 其后到该时刻为止的事件，O(检查点 + 增量)。
+同一次记录的事件在一个事务中批量插入；事件时间不能早于日志中已有的最后时间。
+
+回放关键帧（keyframes）：首帧为各任务的完整取值，其后每帧只含与上一帧相比变化的字段，
+HTML 的“进度回放”标签页按帧依次应用，不需要嵌入每个时刻的完整快照。
+
+用法:
+    python3 backend/progress_log.py record progress.db local_data_backup_*.json local_data.json
+    python3 backend/progress_log.py state progress.db 2026-02-20 -o plan_0220.json
+    python3 backend/progress_log.py info progress.db
+    python3 gantt_chart.py --snapshot local_data.json --replay progress.db
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import time
+import zlib
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 每多少个事件保存一次检查点
+CHECKPOINT_INTERVAL = 5000
+
+# 表示任务被删除的字段名
+REMOVED = '$removed'
+
+# 回放用到的字段 / 最多关键帧数（事件时间点更多时均匀抽取，始终包含最后一帧）
+REPLAY_FIELDS = ('start', 'end', 'progress')
+MAX_KEYFRAMES = 200
+# 回放行的标签字段（取最后一次记录的值）
+LABEL_FIELDS = ('task', 'module', 'phase')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY,
+    task_id TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS fields (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS events (
+    seq INTEGER PRIMARY KEY,
+    ts INTEGER NOT NULL,
+    task INTEGER NOT NULL REFERENCES tasks (id),
+    field INTEGER NOT NULL REFERENCES fields (id),
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS checkpoints (
+    seq INTEGER PRIMARY KEY,
+    ts INTEGER NOT NULL,
+    state BLOB NOT NULL
+);
+CREATE TRIGGER IF NOT EXISTS events_no_update BEFORE UPDATE ON events
+BEGIN
+    SELECT RAISE(ABORT, 'events 只能追加');
+END;
+CREATE TRIGGER IF NOT EXISTS events_no_delete BEFORE DELETE ON events
+BEGIN
+    SELECT RAISE(ABORT, 'events 只能追加');
+END;
+"""
+
+
+def to_millis(value):
+    """毫秒时间戳 / datetime / date / ISO 字符串（可带 Z）-> 毫秒时间戳"""
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    elif not isinstance(value, datetime):
+        value = datetime.combine(value, datetime.min.time())
+    if value.tzinfo is None:
+        # 不带时区的时间按本地时间解释
+        value = value.astimezone()
+    return int(value.timestamp() * 1000)
+
+
+def format_millis(ms):
+    return datetime.fromtimestamp(ms / 1000, timezone.utc).isoformat(timespec='milliseconds').replace('+00:00', 'Z')
+
+
+def _encode_value(value):
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+
+
+def _same(a, b):
+    # 1 == True、1 == 1.0，类型不同也要记一次变更
+    return a == b and type(a) is type(b)
+
+
+def _apply(state, task, field, value):
+    if field == REMOVED:
+        state.pop(task, None)
+    elif value is None:
+        state.get(task, {}).pop(field, None)
+    else:
+        state.setdefault(task, {})[field] = json.loads(value)
+
+
+class ProgressLog:
+    """变更日志数据库（不存在时创建）"""
+
+    def __init__(self, path, checkpoint_interval=CHECKPOINT_INTERVAL):
+        self.path = str(path)
+        self.checkpoint_interval = checkpoint_interval
+        self.conn = sqlite3.connect(self.path)
+        self.conn.executescript(SCHEMA)
+        self.task_ids = dict(self.conn.execute('SELECT task_id, id FROM tasks'))
+        self.field_ids = dict(self.conn.execute('SELECT name, id FROM fields'))
+        self._task_names = {v: k for k, v in self.task_ids.items()}
+        self._field_names = {v: k for k, v in self.field_ids.items()}
+        # 最新状态缓存：(最后事件 seq, 状态)
+        self._latest = None
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ------------------------------------------------------------------
+    # 写入
+    # ------------------------------------------------------------------
+
+    def last_event(self):
+        """(seq, ts)，日志为空时为 (0, None)"""
+        row = self.conn.execute('SELECT seq, ts FROM events ORDER BY seq DESC LIMIT 1').fetchone()
+        return row if row else (0, None)
+
+    def _intern(self, table, column, ids, names, values):
+        missing = [v for v in dict.fromkeys(values) if v not in ids]
+        if missing:
+            self.conn.executemany(f'INSERT INTO {table} ({column}) VALUES (?)', [(v,) for v in missing])
+            for key, value in self.conn.execute(
+                    f'SELECT {column}, id FROM {table} WHERE id > ?', (max(ids.values(), default=0),)):
+                ids[key] = value
+                names[value] = key
+
+    def record(self, tasks, timestamp=None):
+        """
+        记录一次计划（任务记录列表，需含 id），追加与最新状态相比变化的字段，返回事件数
+
+        timestamp: 计划时间（默认当前时间），不能早于日志中已有的最后时间
+        """
+        ts = to_millis(timestamp) if timestamp is not None else int(time.time() * 1000)
+        _, last_ts = self.last_event()
+        if last_ts is not None and ts < last_ts:
+            raise ValueError(f'日志只能追加：{format_millis(ts)} 早于最后记录时间 {format_millis(last_ts)}')
+
+        state = self.state_at()
+        events = []
+        seen = set()
+        for record in tasks:
+            task = str(record['id'])
+            seen.add(task)
+            old = state.get(task, {})
+            for field, value in record.items():
+                if field.startswith('$'):
+                    continue
+                if field not in old or not _same(old[field], value):
+                    events.append((task, field, _encode_value(value)))
+            for field in old:
+                if field not in record:
+                    events.append((task, field, None))
+        for task in state:
+            if task not in seen:
+                events.append((task, REMOVED, None))
+        if not events:
+            return 0
+
+        with self.conn:
+            self._intern('tasks', 'task_id', self.task_ids, self._task_names, [e[0] for e in events])
+            self._intern('fields', 'name', self.field_ids, self._field_names, [e[1] for e in events])
+            self.conn.executemany(
+                'INSERT INTO events (ts, task, field, value) VALUES (?, ?, ?, ?)',
+                [(ts, self.task_ids[task], self.field_ids[field], value) for task, field, value in events],
+            )
+
+        for task, field, value in events:
+            _apply(state, task, field, value)
+        self._latest = (self.last_event()[0], state)
+
+        checkpoint_seq = self.conn.execute('SELECT COALESCE(MAX(seq), 0) FROM checkpoints').fetchone()[0]
+        if self._latest[0] - checkpoint_seq >= self.checkpoint_interval:
+            self.checkpoint()
+        return len(events)
+
+    def checkpoint(self):
+        """保存最新状态为检查点，返回检查点的 seq（日志为空时为 None）"""
+        seq, ts = self.last_event()
+        if ts is None:
+            return None
+        state = self.state_at()
+        blob = zlib.compress(json.dumps(state, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+        with self.conn:
+            self.conn.execute('INSERT OR IGNORE INTO checkpoints (seq, ts, state) VALUES (?, ?, ?)', (seq, ts, blob))
+        return seq
+
+    # ------------------------------------------------------------------
+    # 读取
+    # ------------------------------------------------------------------
+
+    def state_at(self, timestamp=None):
+        """
+        某一时刻的状态 {任务 id: 记录}（默认最新），记录中的字段顺序与首次记录时一致
+
+        从该时刻之前最近的检查点开始，只读取其后的事件
+        """
+        if timestamp is None and self._latest is not None:
+            # 返回副本，调用方修改不影响缓存
+            return {task: dict(record) for task, record in self._latest[1].items()}
+
+        ts = to_millis(timestamp) if timestamp is not None else None
+        query = 'SELECT seq, state FROM checkpoints {} ORDER BY seq DESC LIMIT 1'
+        row = (self.conn.execute(query.format(''), ()) if ts is None else
+               self.conn.execute(query.format('WHERE ts <= ?'), (ts,))).fetchone()
+        seq, state = (row[0], json.loads(zlib.decompress(row[1]))) if row else (0, {})
+
+        last = seq
+        for last, event_ts, task, field, value in self.conn.execute(
+                'SELECT seq, ts, task, field, value FROM events WHERE seq > ? ORDER BY seq', (seq,)):
+            if ts is not None and event_ts > ts:
+                break
+            _apply(state, self._task_names[task], self._field_names[field], value)
+        if ts is None:
+            self._latest = (last, state)
+            return self.state_at()
+        return state
+
+    def plan_at(self, timestamp=None):
+        """某一时刻的计划，格式与 plan_sources.load_plan 一致（日志不含依赖，links 为空）"""
+        state = self.state_at(timestamp)
+        if timestamp is None:
+            timestamp = self.last_event()[1]
+        return {
+            'tasks': list(state.values()),
+            'links': [],
+            'source': self.path,
+            'timestamp': format_millis(to_millis(timestamp)) if timestamp is not None else None,
+        }
+
+    def timestamps(self):
+        """各次记录的时间（毫秒时间戳，升序）"""
+        return [ts for ts, in self.conn.execute('SELECT DISTINCT ts FROM events ORDER BY ts')]
+
+    def keyframes(self, fields=REPLAY_FIELDS, max_frames=MAX_KEYFRAMES):
+        """
+        回放关键帧（只含叶子任务）
+
+            {'fields': [...], 'rows': [{'id', 'task', 'module', 'phase'}, ...],
+             'frames': [{'ts', 'changes': [[行号, 字段序号, 取值], ...]}, ...]}
+
+        首帧的 changes 为全部取值，其后每帧只含与上一帧相比变化的字段；任务不存在时取值为 None。
+        一次顺序扫描全部事件，O(事件数)
+        """
+        times = self.timestamps()
+        if len(times) > max_frames:
+            step = (len(times) - 1) / (max_frames - 1)
+            times = sorted({times[round(k * step)] for k in range(max_frames)})
+        wanted = {name: k for k, name in enumerate(fields)}
+
+        state = {}        # 任务 -> 当前取值
+        labels = {}       # 任务 -> 标签字段，取最后一次出现的值
+        parents = set()
+        emitted = {}      # (任务, 字段序号) -> 上一帧输出的取值
+        dirty = set()
+        frames = []
+
+        def flush(frame_ts):
+            changes = []
+            for key in sorted(dirty, key=lambda k: (order[k[0]], k[1])):
+                task, k = key
+                value = state.get(task, {}).get(fields[k])
+                if key not in emitted or not _same(emitted[key], value):
+                    emitted[key] = value
+                    changes.append([task, k, value])
+            dirty.clear()
+            frames.append({'ts': frame_ts, 'changes': changes})
+
+        order = {}
+        cursor = self.conn.execute('SELECT ts, task, field, value FROM events ORDER BY seq')
+        pending = iter(times)
+        next_frame = next(pending, None)
+        for event_ts, task_no, field_no, value in cursor:
+            while next_frame is not None and event_ts > next_frame:
+                flush(next_frame)
+                next_frame = next(pending, None)
+            task = self._task_names[task_no]
+            field = self._field_names[field_no]
+            order.setdefault(task, len(order))
+            if field == REMOVED:
+                dirty.update((task, k) for k in range(len(fields)))
+                state.pop(task, None)
+                continue
+            decoded = None if value is None else json.loads(value)
+            if field == 'parent' and decoded is not None:
+                parents.add(str(decoded))
+            elif field in LABEL_FIELDS and decoded is not None:
+                labels.setdefault(task, dict.fromkeys(LABEL_FIELDS, ''))[field] = decoded
+            if field in wanted:
+                dirty.add((task, wanted[field]))
+            if decoded is None:
+                state.get(task, {}).pop(field, None)
+            else:
+                state.setdefault(task, {})[field] = decoded
+        while next_frame is not None:
+            flush(next_frame)
+            next_frame = next(pending, None)
+
+        # 只保留叶子任务（分组的进度由叶子汇总得出），行号按首次出现的顺序
+        tasks = [task for task in order if task not in parents]
+        row_of = {task: row for row, task in enumerate(tasks)}
+        for frame in frames:
+            frame['changes'] = [[row_of[t], k, v] for t, k, v in frame['changes'] if t in row_of]
+        return {
+            'fields': list(fields),
+            'rows': [dict(id=t, **labels.get(t, dict.fromkeys(LABEL_FIELDS, ''))) for t in tasks],
+            'frames': frames,
+        }
+
+    def stats(self):
+        count, tasks, first, last = self.conn.execute(
+            'SELECT COUNT(*), COUNT(DISTINCT task), MIN(ts), MAX(ts) FROM events').fetchone()
+        checkpoints = self.conn.execute('SELECT COUNT(*) FROM checkpoints').fetchone()[0]
+        return {
+            'events': count,
+            'tasks': tasks,
+            'records': len(self.timestamps()),
+            'checkpoints': checkpoints,
+            'first': format_millis(first) if first is not None else None,
+            'last': format_millis(last) if last is not None else None,
+            'size': os.path.getsize(self.path),
+        }
+
+
+def _plan_timestamp(source, plan):
+    """计划时间：快照中的 timestamp，没有时取文件修改时间（tasks_list 取当前时间）"""
+    if plan.get('timestamp'):
+        return to_millis(plan['timestamp'])
+    if source == 'tasks_list':
+        return int(time.time() * 1000)
+    return int(os.path.getmtime(source) * 1000)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='任务变更日志（只追加的事件 + 检查点）')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('record', help='把计划记录到日志（多个来源按计划时间排序后依次记录）')
+    p.add_argument('log', help='日志数据库路径（如 progress.db）')
+    p.add_argument('sources', nargs='+', help="计划来源: 'tasks_list'、JSON 快照/导出文件、.gcol 或 gantt.db")
+
+    p = sub.add_parser('state', help='重建某一时刻的计划并写出为 JSON')
+    p.add_argument('log')
+    p.add_argument('timestamp', nargs='?', help='时刻（如 2026-02-20 或 2026-02-20T12:00:00Z），默认最新')
+    p.add_argument('-o', '--output', help='输出路径（默认打印到标准输出）')
+
+    p = sub.add_parser('checkpoint', help='立即保存一个检查点')
+    p.add_argument('log')
+
+    p = sub.add_parser('info', help='查看日志的事件数、检查点与时间范围')
+    p.add_argument('log')
+    args = parser.parse_args(argv)
+
+    with ProgressLog(args.log) as log:
+        if args.command == 'record':
+            from backend.plan_sources import load_plan
+            plans = []
+            for source in args.sources:
+                plan = load_plan(source)
+                plans.append((_plan_timestamp(source, plan), source, plan))
+            plans.sort(key=lambda item: item[0])
+            for ts, source, plan in plans:
+                try:
+                    count = log.record(plan['tasks'], ts)
+                except ValueError as e:
+                    print(f"❌ {source}: {e}")
+                    return 1
+                print(f"📝 {source} ({format_millis(ts)}): {count} 个字段变更")
+            return 0
+
+        if args.command == 'state':
+            started = time.perf_counter()
+            plan = log.plan_at(to_millis(args.timestamp) if args.timestamp else None)
+            elapsed = time.perf_counter() - started
+            content = json.dumps(plan, ensure_ascii=False, indent=2)
+            if args.output:
+                with open(args.output, 'w', encoding='utf-8') as f:
+                    f.write(content)
+                print(f"✅ 已重建 {len(plan['tasks'])} 个任务（{elapsed * 1000:.1f} ms）: {args.output}")
+            else:
+                print(content)
+            return 0
+
+        if args.command == 'checkpoint':
+            seq = log.checkpoint()
+            print(f"✅ 检查点: 事件 #{seq}" if seq else "⚠️  日志为空")
+            return 0
+
+        stats = log.stats()
+        print(f"📚 {args.log}（{stats['size'] / 1024:.1f} KB）")
+        print(f"   - 事件: {stats['events']}，涉及 {stats['tasks']} 个任务，{stats['records']} 次记录")
+        print(f"   - 检查点: {stats['checkpoints']}")
+        print(f"   - 时间范围: {stats['first'] or '-'} ~ {stats['last'] or '-'}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+只读 JSON 查询接口 - /api/tasks, /api/modules, /api/milestones, /api/search, /api/facets
+
+查询参数:
+    phase / module / owner / status   可重复或逗号分隔，同字段内为 OR
+    from / to                         日期窗口 (YYYY-MM-DD)，返回与窗口有交集的任务
+    q                                 全文检索词（/api/search，必填）
+    fields                            检索字段，默认 task,module,owner（/api/search）
+    limit                             最多返回条数，默认 50（/api/search）
+"""
+
+import hashlib
+import json
+import threading
+from datetime import date
+from urllib.parse import parse_qs
+
+from backend.metrics import metrics
+from backend.search_index import SEARCH_FIELDS
+from backend.task_index import INDEXED_FIELDS
+
+API_PREFIX = '/api/'
+
+# 各接口允许的过滤字段
+ENDPOINT_FIELDS = {
+    '/api/tasks': INDEXED_FIELDS,
+    '/api/modules': ('phase', 'module', 'status'),
+    '/api/milestones': INDEXED_FIELDS,
+    '/api/search': INDEXED_FIELDS,
+    '/api/facets': INDEXED_FIELDS,
+}
+
+# 检索结果默认 / 最大条数
+SEARCH_LIMIT = 50
+SEARCH_LIMIT_MAX = 1000
+
+# 响应缓存上限（按查询串缓存，超出后整体清空）
+CACHE_LIMIT = 512
+
+
+def etag_matches(etag, if_none_match):
+    """
+    If-None-Match 是否命中 etag
+
+    请求头是逗号分隔的 ETag 列表，逐项精确比较（弱校验前缀 W/ 忽略），'*' 命中任意
+    """
+    if not etag or not if_none_match:
+        return False
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate == '*' or candidate.removeprefix('W/') == etag:
+            return True
+    return False
+
+
+class ApiError(Exception):
+    """查询参数错误，返回给客户端的 4xx"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class QueryApi:
+    """基于 TaskIndex 的查询接口，带响应缓存与 ETag"""
+
+    def __init__(self, index_factory):
+        self._index_factory = index_factory
+        self._index = None
+        self._cache = {}
+        self._lock = threading.Lock()
+        self.version = 0
+
+    @staticmethod
+    def handles(path):
+        return path.startswith(API_PREFIX)
+
+    @property
+    def index(self):
+        with self._lock:
+            if self._index is None:
+                self._index = self._index_factory()
+            return self._index
+
+    def reset(self, index=None):
+        """任务数据变化后重建索引并清空缓存"""
+        with self._lock:
+            self._index = index
+            self._cache.clear()
+            self.version += 1
+
+    def handle(self, path, query_string=''):
+        """返回 (状态码, JSON 字节, ETag)"""
+        key = (path, query_string)
+        cached = self._cache.get(key)
+        metrics.cache_lookup('api', cached is not None)
+        if cached is not None:
+            return cached
+
+        try:
+            payload = self._dispatch(path, parse_qs(query_string))
+            status = 200
+        except ApiError as e:
+            # 错误响应不缓存
+            body = json.dumps({'error': e.message}, ensure_ascii=False).encode('utf-8')
+            return e.status, body, None
+
+        body = json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        etag = f'"{self.version}-{hashlib.sha1(body).hexdigest()[:16]}"'
+        response = (status, body, etag)
+
+        with self._lock:
+            if len(self._cache) >= CACHE_LIMIT:
+                self._cache.clear()
+            self._cache[key] = response
+        return response
+
+    def _dispatch(self, path, params):
+        if path not in ENDPOINT_FIELDS:
+            raise ApiError(404, f'未知接口: {path}')
+
+        filters = parse_filters(params, ENDPOINT_FIELDS[path])
+        date_from = parse_date(params, 'from')
+        date_to = parse_date(params, 'to')
+        index = self.index
+
+        if path == '/api/tasks':
+            tasks = index.query(filters, date_from, date_to)
+            return {'count': len(tasks), 'tasks': tasks}
+
+        if path == '/api/search':
+            text = ' '.join(params.get('q', [])).strip()
+            if not text:
+                raise ApiError(400, '缺少检索词: q')
+            fields = parse_filters(params, ('fields',)).get('fields')
+            unknown = [f for f in fields or () if f not in SEARCH_FIELDS]
+            if unknown:
+                raise ApiError(400, f"不支持的检索字段: {','.join(unknown)}")
+            limit = parse_limit(params)
+            tasks = index.search(text, filters, fields, limit, date_from, date_to)
+            return {'query': text, 'count': len(tasks), 'tasks': tasks}
+
+        if path == '/api/facets':
+            total, facets = index.facet_counts(filters)
+            return {'count': total, 'facets': facets}
+
+        if path == '/api/modules':
+            modules = [
+                m for m in index.modules(filters)
+                if (not date_from or m['end'] >= date_from)
+                and (not date_to or m['start'] <= date_to)
+            ]
+            return {'count': len(modules), 'modules': modules}
+
+        project, tasks = index.milestone_items(filters, date_from, date_to)
+        return {'count': len(project) + len(tasks), 'milestones': project, 'tasks': tasks}
+
+
+def parse_filters(params, allowed):
+    """解析等值过滤参数，支持 ?owner=a&owner=b 和 ?owner=a,b"""
+    filters = {}
+    for field in allowed:
+        values = [v.strip() for raw in params.get(field, []) for v in raw.split(',') if v.strip()]
+        if values:
+            filters[field] = values
+    return filters
+
+
+def parse_limit(params):
+    values = params.get('limit')
+    if not values:
+        return SEARCH_LIMIT
+    try:
+        limit = int(values[-1])
+    except ValueError:
+        raise ApiError(400, f'limit 应为整数: {values[-1]}')
+    return max(1, min(limit, SEARCH_LIMIT_MAX))
+
+
+def parse_date(params, name):
+    values = params.get(name)
+    if not values:
+        return None
+    try:
+        return date.fromisoformat(values[-1]).isoformat()
+    except ValueError:
+        raise ApiError(400, f'日期格式错误: {name}={values[-1]}（应为 YYYY-MM-DD）')
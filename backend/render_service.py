@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+"""
+渲染服务 - POST /render
+
+请求体为 tasks_list 格式的任务 JSON（数组，或 {"tasks": [...]}），校验后在工作进程中渲染：
+    /render              返回完整 HTML 页面
+    /render?format=json  返回图表 JSON {"summary": ..., "detail": ...}
+
+    - 同时运行的工作进程数固定，排队数有上限，超出时返回 429（带 Retry-After）
+    - 工作进程常驻（forkserver 启动，预先导入 gantt_chart），每个进程依次执行任务
+    - 每个任务有超时（从开始执行时计时，排队时间不计），超时返回 504，只终止执行该任务的进程并由新进程替换
+    - 结果按请求内容的哈希缓存；相同内容的并发请求共用同一个渲染任务
+"""
+
+import hashlib
+import json
+import multiprocessing
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import CancelledError, Future
+from urllib.parse import parse_qs
+
+from backend.metrics import metrics
+from backend.plan_validator import PlanValidationError, check_plan
+from backend.query_api import ApiError
+
+RENDER_PATH = '/render'
+
+# 默认工作进程数 / 排队上限 / 单个任务超时（秒）
+RENDER_WORKERS = 2
+RENDER_QUEUE_LIMIT = 8
+RENDER_TIMEOUT = 30
+# 请求体与任务数上限
+MAX_BODY_SIZE = 8 * 1024 * 1024
+MAX_TASKS = 20000
+# 结果缓存条数（LRU）
+CACHE_LIMIT = 32
+
+RENDER_FORMATS = {
+    'html': 'text/html; charset=utf-8',
+    'json': 'application/json; charset=utf-8',
+}
+
+# tasks_list 的字段及类型
+TASK_SCHEMA = {
+    'module': str,
+    'task': str,
+    'start': str,
+    'end': str,
+    'owner': str,
+    'progress': (int, float),
+    'phase': str,
+    'is_milestone': bool,
+}
+
+
+def parse_tasks(body):
+    """请求体 -> 任务列表（只检查结构与类型，数据规则由 check_plan 校验）"""
+    try:
+        data = json.loads(body)
+    except (UnicodeDecodeError, ValueError) as e:
+        raise ApiError(400, f'请求体不是合法的 JSON: {e}')
+    if isinstance(data, dict):
+        data = data.get('tasks')
+    if not isinstance(data, list) or not data:
+        raise ApiError(400, '请求体应为非空的任务数组，或 {"tasks": [...]}')
+    if len(data) > MAX_TASKS:
+        raise ApiError(413, f'任务数超过上限 {MAX_TASKS}')
+
+    tasks = []
+    for i, raw in enumerate(data):
+        if not isinstance(raw, dict):
+            raise ApiError(400, f'第 {i} 个任务不是对象')
+        task = {}
+        for field, types in TASK_SCHEMA.items():
+            value = raw.get(field)
+            # bool 是 int 的子类，进度不接受 true / false
+            if not isinstance(value, types) or (field == 'progress' and isinstance(value, bool)):
+                raise ApiError(400, f'第 {i} 个任务的 {field} 缺失或类型错误')
+            task[field] = value
+        tasks.append(task)
+    return tasks
+
+
+def render_job(tasks, fmt):
+    """在工作进程中渲染，返回响应字节"""
+    import gantt_chart
+    from backend.rollup import Rollup
+
+    fig_summary = gantt_chart.create_module_summary_chart(Rollup(tasks))
+    fig_detail = gantt_chart.create_gantt_chart(tasks=tasks)
+    if fmt == 'json':
+        content = f'{{"summary":{fig_summary.to_json()},"detail":{fig_detail.to_json()}}}'
+    else:
+        fig_ev = gantt_chart.create_earned_value_chart(tasks)
+        content = gantt_chart.generate_html(fig_summary, fig_detail, fig_ev)
+    return content.encode('utf-8')
+
+
+def error_response(status, payload):
+    """错误响应 -> (状态码, 响应字节, Content-Type, 额外响应头)"""
+    if isinstance(payload, str):
+        payload = {'error': payload}
+    headers = {'Retry-After': '1'} if status in (429, 503) else {}
+    body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+    return status, body, 'application/json; charset=utf-8', headers
+
+
+def body_too_large():
+    return error_response(413, f'请求体超过 {MAX_BODY_SIZE // (1024 * 1024)} MB')
+
+
+def parse_content_length(value):
+    """Content-Length 请求头 -> 字节数；缺省为 0，非整数或负数返回 None"""
+    if value is None:
+        return 0
+    value = value.strip()
+    if not value.isascii() or not value.isdigit():
+        return None
+    return int(value)
+
+
+def bad_content_length():
+    return error_response(400, 'Content-Length 必须是非负整数')
+
+
+class RenderJob:
+    """一个渲染任务：Future（同内容的并发请求共用）+ 执行它的工作进程"""
+
+    def __init__(self, tasks, fmt):
+        self.tasks = tasks
+        self.fmt = fmt
+        self.future = Future()
+        self.worker = None
+
+
+def _mp_context():
+    """
+    工作进程的启动方式：forkserver（不支持时用 spawn）
+
+    服务器是多线程的，直接 fork 会把其它线程持有的锁和事件循环状态一起复制到子进程；
+    forkserver 从一个预先导入了 gantt_chart 的干净进程派生工作进程，省去每个进程重新导入的时间
+    """
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('forkserver')
+        context.set_forkserver_preload(['gantt_chart'])
+        return context
+    return multiprocessing.get_context('spawn')
+
+
+def _worker_main(conn):
+    """工作进程入口：循环接收 (tasks, fmt)，渲染结果或异常通过管道返回；管道关闭时退出"""
+    import os
+    import signal
+    import importlib
+    import gantt_chart
+
+    # Ctrl+C 由服务器处理，工作进程随服务器停止而被终止
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    mtime = os.stat(gantt_chart.__file__).st_mtime_ns
+    while True:
+        try:
+            tasks, fmt = conn.recv()
+        except (EOFError, OSError):
+            return
+        try:
+            # --watch 模式下 gantt_chart.py 可能已被修改，与服务器进程保持一致
+            current = os.stat(gantt_chart.__file__).st_mtime_ns
+            if current != mtime:
+                importlib.reload(gantt_chart)
+                mtime = current
+            conn.send(('ok', render_job(tasks, fmt)))
+        except Exception as e:
+            conn.send(('error', f'{type(e).__name__}: {e}'))
+
+
+class RenderWorker:
+    """常驻的渲染进程，通过双向管道逐个接收任务"""
+
+    def __init__(self, context):
+        self.conn, child = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child,), daemon=True)
+        self.process.start()
+        child.close()
+
+    def kill(self):
+        # SIGKILL：正在渲染的进程不一定能及时响应 SIGTERM
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+
+class RenderService:
+    """
+    常驻渲染进程池 + 排队上限 + 结果缓存
+
+    workers 个工作进程常驻，每个任务占用一个空闲进程；
+    超时从任务开始执行时计时（排队时间不计），超时只终止执行该任务的进程并补充一个新进程，不影响其它任务
+    """
+
+    def __init__(self, workers=RENDER_WORKERS, queue_limit=RENDER_QUEUE_LIMIT, timeout=RENDER_TIMEOUT):
+        self.workers = workers
+        self.queue_limit = queue_limit
+        self.timeout = timeout
+        self._context = None
+        self._slots = None
+        self._idle = []
+        self._closed = False
+        self._lock = threading.Lock()
+        self._inflight = {}  # 缓存键 -> RenderJob
+        self._cache = OrderedDict()
+
+    @staticmethod
+    def handles(path):
+        return path == RENDER_PATH
+
+    @property
+    def pending(self):
+        """正在渲染及排队中的任务数"""
+        return len(self._inflight)
+
+    def _get_slots(self):
+        # workers 可能在构造后由命令行参数修改，首次使用时再创建
+        with self._lock:
+            if self._slots is None:
+                self._slots = threading.BoundedSemaphore(self.workers)
+                self._context = _mp_context()
+            return self._slots
+
+    def _take_worker(self):
+        """取一个空闲的工作进程，没有时启动新进程（进程数受槽位限制，不超过 workers）"""
+        with self._lock:
+            while self._idle:
+                worker = self._idle.pop()
+                if worker.process.is_alive():
+                    return worker
+                worker.kill()
+        return RenderWorker(self._context)
+
+    def _put_worker(self, worker, healthy):
+        """任务结束后归还进程；超时或异常退出的进程被终止，由下一个任务启动的新进程替换"""
+        if healthy:
+            with self._lock:
+                if not self._closed:
+                    self._idle.append(worker)
+                    return
+        worker.kill()
+
+    def shutdown(self):
+        """取消排队中的任务并终止所有工作进程"""
+        with self._lock:
+            self._closed = True
+            jobs = list(self._inflight.values())
+            idle, self._idle = self._idle, []
+        for job in jobs:
+            job.future.cancel()
+            if job.worker is not None:
+                job.worker.kill()
+        for worker in idle:
+            worker.kill()
+
+    def _submit(self, key, tasks, fmt):
+        """返回 (RenderJob, 是否由当前线程执行)；相同内容已在渲染时复用；超出排队上限时抛出 429"""
+        with self._lock:
+            if self._closed:
+                raise ApiError(503, '渲染服务已停止')
+            if key in self._inflight:
+                return self._inflight[key], False
+            if len(self._inflight) >= self.workers + self.queue_limit:
+                raise ApiError(429, f'渲染队列已满（{len(self._inflight)} 个任务），请稍后重试')
+            job = RenderJob(tasks, fmt)
+            self._inflight[key] = job
+        job.future.add_done_callback(lambda f: self._finish(key, f))
+        return job, True
+
+    def _finish(self, key, future):
+        with self._lock:
+            job = self._inflight.get(key)
+            if job is not None and job.future is future:
+                del self._inflight[key]
+            if not future.cancelled() and future.exception() is None:
+                self._cache[key] = future.result()
+                while len(self._cache) > CACHE_LIMIT:
+                    self._cache.popitem(last=False)
+
+    def _execute(self, job):
+        """在当前线程中等待空闲槽位后交给空闲的工作进程，结果（或 ApiError）写入 job.future"""
+        slots = self._get_slots()
+        slots.acquire()
+        try:
+            # 排队期间服务已停止（Future 已取消）
+            if not job.future.set_running_or_notify_cancel():
+                return
+            try:
+                job.worker = self._take_worker()
+            except Exception as e:
+                job.future.set_exception(ApiError(503, f'渲染进程启动失败: {e}'))
+                return
+            healthy = False
+            try:
+                job.worker.conn.send((job.tasks, job.fmt))
+                # 超时从任务交给工作进程时计时
+                if not job.worker.conn.poll(self.timeout):
+                    raise ApiError(504, f'渲染超时（{self.timeout} 秒）')
+                status, payload = job.worker.conn.recv()
+                healthy = True
+            except (EOFError, OSError):
+                job.future.set_exception(ApiError(503, '渲染进程异常退出，请重试'))
+            except ApiError as e:
+                job.future.set_exception(e)
+            else:
+                if status == 'ok':
+                    job.future.set_result(payload)
+                else:
+                    job.future.set_exception(ApiError(500, f'渲染失败: {payload}'))
+            finally:
+                self._put_worker(job.worker, healthy)
+        finally:
+            slots.release()
+
+    def render(self, body, query_string=''):
+        """返回 (内容字节, Content-Type)，失败时抛出 ApiError / PlanValidationError"""
+        params = parse_qs(query_string)
+        fmt = (params.get('format') or ['html'])[-1]
+        if fmt not in RENDER_FORMATS:
+            raise ApiError(400, f"format 应为 {' / '.join(RENDER_FORMATS)}: {fmt}")
+        tasks = parse_tasks(body)
+        canonical = json.dumps(tasks, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+        key = hashlib.sha256(f'{fmt}\n{canonical}'.encode('utf-8')).hexdigest()
+
+        with self._lock:
+            content = self._cache.get(key)
+            if content is not None:
+                self._cache.move_to_end(key)
+        metrics.cache_lookup('render', content is not None)
+        if content is None:
+            from gantt_chart import COLORS, milestones
+            check_plan(tasks, milestones, [k for k, v in COLORS.items() if isinstance(v, dict)])
+
+            started = time.perf_counter()
+            job, owner = self._submit(key, tasks, fmt)
+            if owner:
+                self._execute(job)
+            try:
+                # 执行任务的线程负责超时，其它共用该任务的请求等待同一个 Future
+                content = job.future.result()
+            except CancelledError:
+                raise ApiError(503, '渲染任务被取消，请重试')
+            metrics.render_finished('render', time.perf_counter() - started)
+        return content, RENDER_FORMATS[fmt]
+
+    def handle(self, body, query_string=''):
+        """返回 (状态码, 响应字节, Content-Type, 额外响应头)"""
+        try:
+            content, content_type = self.render(body, query_string)
+            return 200, content, content_type, {}
+        except PlanValidationError as e:
+            return error_response(422, {'error': str(e).splitlines()[0], 'violations': e.violations})
+        except ApiError as e:
+            return error_response(e.status, e.message)
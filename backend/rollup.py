@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+模块 / 阶段汇总 (rollup) - 甘特图概览、数据导出与查询接口共用
+
+每个分组（模块、阶段）维护一棵线段树，叶子为该组内的任务：
+    (最早开始, 最晚结束, 进度和, 计数, 工期加权进度和, 工期和)
+单个任务新增 / 修改 / 删除时只更新一条根路径，O(log n)。
+分组顺序按任务数据中首次出现的顺序得出，不再依赖写死的模块列表。
+"""
+
+from collections import Counter
+from datetime import date
+
+# 线段树空节点
+_EMPTY = (float('inf'), float('-inf'), 0.0, 0, 0.0, 0)
+
+# 默认维护的分组字段
+GROUP_FIELDS = ('module', 'phase')
+
+
+def _combine(a, b):
+    return (
+        min(a[0], b[0]),
+        max(a[1], b[1]),
+        a[2] + b[2],
+        a[3] + b[3],
+        a[4] + b[4],
+        a[5] + b[5],
+    )
+
+
+def _ordinal(value):
+    """'YYYY-MM-DD' / date / datetime -> 日序号"""
+    if isinstance(value, str):
+        return date.fromisoformat(value[:10]).toordinal()
+    return value.toordinal()
+
+
+def task_leaf(task):
+    """任务 -> 线段树叶子节点"""
+    start = _ordinal(task['start'])
+    end = _ordinal(task['end'])
+    duration = max(end - start, 0) + 1
+    progress = float(task['progress'])
+    return (start, end, progress, 1, progress * duration, duration)
+
+
+class SegmentTree:
+    """可扩容的汇总线段树，槽位可复用"""
+
+    def __init__(self, capacity=8):
+        self.size = 1
+        while self.size < capacity:
+            self.size *= 2
+        self.nodes = [_EMPTY] * (2 * self.size)
+        self.free = list(range(self.size - 1, -1, -1))
+
+    def _grow(self):
+        leaves = self.nodes[self.size:]
+        self.size *= 2
+        self.nodes = [_EMPTY] * self.size + leaves + [_EMPTY] * (self.size - len(leaves))
+        for i in range(self.size - 1, 0, -1):
+            self.nodes[i] = _combine(self.nodes[2 * i], self.nodes[2 * i + 1])
+        self.free = list(range(self.size - 1, len(leaves) - 1, -1)) + self.free
+
+    def allocate(self):
+        if not self.free:
+            self._grow()
+        return self.free.pop()
+
+    def release(self, slot):
+        self.set(slot, _EMPTY)
+        self.free.append(slot)
+
+    def set(self, slot, leaf):
+        i = slot + self.size
+        self.nodes[i] = leaf
+        i //= 2
+        while i:
+            self.nodes[i] = _combine(self.nodes[2 * i], self.nodes[2 * i + 1])
+            i //= 2
+
+    @property
+    def total(self):
+        return self.nodes[1]
+
+
+class _Group:
+    """单个分组：线段树 + 成员顺序 + 负责人 / 阶段计数"""
+
+    def __init__(self):
+        self.tree = SegmentTree()
+        self.slots = {}          # 任务键 -> 槽位（插入顺序即成员顺序）
+        self.owners = Counter()  # 负责人 -> 任务数（插入顺序即首次出现顺序）
+        self.phases = Counter()
+
+
+class Rollup:
+    """按模块 / 阶段增量维护的汇总结构"""
+
+    def __init__(self, tasks=(), fields=GROUP_FIELDS):
+        self.fields = tuple(fields)
+        self.tasks = {}
+        self.groups = {field: {} for field in self.fields}
+        for key, task in (tasks.items() if isinstance(tasks, dict) else enumerate(tasks)):
+            self.add(key, task)
+
+    def __len__(self):
+        return len(self.tasks)
+
+    def add(self, key, task):
+        if key in self.tasks:
+            raise KeyError(f'任务已存在: {key}')
+        self.tasks[key] = task
+        leaf = task_leaf(task)
+        for field in self.fields:
+            group = self.groups[field].setdefault(task[field], _Group())
+            slot = group.tree.allocate()
+            group.slots[key] = slot
+            group.tree.set(slot, leaf)
+            group.owners[task['owner']] += 1
+            group.phases[task['phase']] += 1
+
+    def remove(self, key):
+        task = self.tasks.pop(key)
+        for field in self.fields:
+            group = self.groups[field][task[field]]
+            group.tree.release(group.slots.pop(key))
+            for counter, value in ((group.owners, task['owner']), (group.phases, task['phase'])):
+                counter[value] -= 1
+                if not counter[value]:
+                    del counter[value]
+            if not group.slots:
+                del self.groups[field][task[field]]
+        return task
+
+    def update(self, key, task):
+        """修改单个任务；分组不变时只更新叶子与计数"""
+        old = self.tasks[key]
+        if any(old[f] != task[f] for f in self.fields):
+            # 分组变化：先删后加（成员顺序移到新组末尾）
+            self.remove(key)
+            self.add(key, task)
+            return
+        self.tasks[key] = task
+        leaf = task_leaf(task)
+        for field in self.fields:
+            group = self.groups[field][task[field]]
+            group.tree.set(group.slots[key], leaf)
+            for counter, attr in ((group.owners, 'owner'), (group.phases, 'phase')):
+                if old[attr] != task[attr]:
+                    counter[old[attr]] -= 1
+                    if not counter[old[attr]]:
+                        del counter[old[attr]]
+                    counter[task[attr]] += 1
+
+    def keys(self, field='module'):
+        """分组取值，按任务数据中首次出现的顺序"""
+        return list(self.groups[field])
+
+    def members(self, field, value):
+        """组内任务键，按加入顺序"""
+        return list(self.groups[field][value].slots)
+
+    def summary(self, field, value, weighted=False):
+        """
+        分组汇总
+
+        weighted=True 时进度按工期（天）加权，否则为任务进度的算术平均
+        """
+        group = self.groups[field][value]
+        start, end, progress_sum, count, weighted_sum, duration_sum = group.tree.total
+        progress = weighted_sum / duration_sum if weighted else progress_sum / count
+        return {
+            field: value,
+            'start': date.fromordinal(start),
+            'end': date.fromordinal(end),
+            'progress': progress,
+            'phase': next(iter(group.phases)),
+            'owners': list(group.owners),
+            'task_count': count,
+        }
+
+    def summaries(self, field='module', weighted=False):
+        return [self.summary(field, value, weighted) for value in self.groups[field]]
@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+进度风险模拟 (Monte Carlo) - 里程碑的 P50 / P80 / P95 日期
+
+模型:
+    - 每个任务的剩余工期 = 计划工期 × (1 - 进度) × 抽样系数，系数服从可配置分布
+    - 同一模块内按任务顺序传递延误：前一任务完成晚了多少天，后一任务整体顺延多少天
+      （保留计划中的搭接）；模块内的里程碑须等该模块此前的任务全部完成
+    - 依赖链接（finish-to-start）：后继任务不早于前驱完成的次日开始（里程碑可在前驱完成当天）
+    - 总里程碑（gantt_chart.milestones）须等同阶段、计划在其之前结束的任务全部完成
+
+任务按拓扑层次逐层计算，每层对全部样本做一次数组运算；样本分批处理以控制内存。
+
+用法:
+    python3 backend/schedule_risk.py                    # tasks_list，10000 个样本
+    python3 backend/schedule_risk.py local_data.json --samples 20000 --distribution pert
+"""
+
+import argparse
+import os
+import sys
+import time
+from collections import deque
+from datetime import date
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 工期系数分布（相对计划剩余工期）
+DISTRIBUTIONS = {
+    'triangular': {'low': 0.9, 'mode': 1.0, 'high': 1.5},
+    'pert': {'low': 0.9, 'mode': 1.0, 'high': 1.6},
+    'lognormal': {'sigma': 0.2},
+}
+DEFAULT_DISTRIBUTION = 'triangular'
+
+# 团队（owner）单独使用的分布，如 {'研发团队': ('pert', {'low': 0.9, 'mode': 1.1, 'high': 2.0})}
+TEAM_DISTRIBUTIONS = {}
+
+PERCENTILES = (50, 80, 95)
+
+# 每批样本数（任务数 × 批大小个 int32）
+BATCH_SIZE = 2000
+
+# DHTMLX 链接类型 '0' 为 finish-to-start
+FINISH_TO_START = ('0', 0, None, '')
+
+
+def sample_factors(rng, kind, params, shape):
+    """按分布抽样工期系数"""
+    if kind == 'triangular':
+        return rng.triangular(params['low'], params['mode'], params['high'], shape)
+    if kind == 'pert':
+        low, mode, high = params['low'], params['mode'], params['high']
+        lam = params.get('lambda', 4.0)
+        span = (high - low) or 1.0
+        alpha = 1 + lam * (mode - low) / span
+        beta = 1 + lam * (high - mode) / span
+        return low + rng.beta(alpha, beta, shape) * (high - low)
+    if kind == 'lognormal':
+        sigma = params['sigma']
+        # 均值为 1 的对数正态
+        return rng.lognormal(-sigma ** 2 / 2, sigma, shape)
+    raise ValueError(f'未知的工期分布: {kind}')
+
+
+def _segments(edges):
+    """
+    [(层内下标, 前驱), ...] -> (目标下标, 按目标排序的前驱, 每段起点)，供 maximum.reduceat 分段取最大值
+
+    无边时返回 None
+    """
+    if not edges:
+        return None
+    edges.sort()
+    targets = np.array([k for k, _ in edges], dtype=np.int64)
+    sources = np.array([src for _, src in edges], dtype=np.int64)
+    offsets = np.flatnonzero(np.r_[True, targets[1:] != targets[:-1]])
+    return targets[offsets], sources, offsets
+
+
+class ScheduleModel:
+    """任务网络：计划日期（日序号）、剩余工期、模块内顺延关系与依赖链接"""
+
+    def __init__(self, records, links=(), milestones=()):
+        # 只模拟叶子任务（分组节点的起止由子任务决定）
+        records = list(records)
+        parents = {r.get('parent') for r in records}
+        self.records = [r for r in records if r.get('id') not in parents and r.get('type') != 'project']
+        n = len(self.records)
+        self.start = np.array([date.fromisoformat(r['start']).toordinal() for r in self.records], dtype=np.int64)
+        self.end = np.array([date.fromisoformat(r['end']).toordinal() for r in self.records], dtype=np.int64)
+        self.is_milestone = np.array([bool(r['is_milestone']) for r in self.records])
+        duration = np.where(self.is_milestone, 0, self.end - self.start + 1)
+        progress = np.clip(np.array([float(r['progress']) for r in self.records]), 0, 100) / 100
+        self.done = duration * progress
+        self.remaining = duration - self.done
+        self.owners = [r.get('owner') or '' for r in self.records]
+        self.milestones = list(milestones)
+
+        position = {r['id']: i for i, r in enumerate(self.records) if 'id' in r}
+
+        # 模块内：按顺序传递延误；里程碑等待此前全部任务
+        self.slip_edges = []
+        self.finish_edges = []
+        last_in_module = {}
+        module_tasks = {}
+        for i, r in enumerate(self.records):
+            module = r['module']
+            if module in last_in_module:
+                self.slip_edges.append((last_in_module[module], i))
+            if self.is_milestone[i]:
+                self.finish_edges.extend((j, i) for j in module_tasks.get(module, ()))
+            else:
+                module_tasks.setdefault(module, []).append(i)
+            last_in_module[module] = i
+
+        for link in links:
+            src = position.get(str(link.get('source')))
+            dst = position.get(str(link.get('target')))
+            if src is not None and dst is not None and src != dst and link.get('type') in FINISH_TO_START:
+                self.finish_edges.append((src, dst))
+
+        self.levels = self._levels(n)
+
+        # 总里程碑的前置任务：同阶段、计划在里程碑当天或之前结束
+        self.milestone_gates = []
+        for ms in self.milestones:
+            ms_day = date.fromisoformat(ms['date']).toordinal()
+            gate = [
+                i for i, r in enumerate(self.records)
+                if r['phase'] == ms['phase'] and self.end[i] <= ms_day
+            ]
+            self.milestone_gates.append((ms_day, np.array(gate, dtype=np.int64), bool(ms.get('completed'))))
+
+    def _levels(self, n):
+        """拓扑分层；环上的边被忽略"""
+        preds = [[] for _ in range(n)]
+        succs = [[] for _ in range(n)]
+        for kind, edges in (('slip', self.slip_edges), ('finish', self.finish_edges)):
+            for src, dst in edges:
+                preds[dst].append((src, kind))
+                succs[src].append(dst)
+        indegree = [len(p) for p in preds]
+        level = [0] * n
+        queue = deque(i for i in range(n) if indegree[i] == 0)
+        order = []
+        while queue:
+            i = queue.popleft()
+            order.append(i)
+            for j in succs[i]:
+                level[j] = max(level[j], level[i] + 1)
+                indegree[j] -= 1
+                if indegree[j] == 0:
+                    queue.append(j)
+        if len(order) < n:
+            # 环中的任务（及其下游）不再受前驱约束
+            placed = set(order)
+            for i in range(n):
+                if i not in placed:
+                    preds[i] = []
+                    level[i] = 0
+
+        levels = {}
+        for i in range(n):
+            levels.setdefault(level[i], []).append(i)
+        result = []
+        for lv in sorted(levels):
+            nodes = np.array(levels[lv], dtype=np.int64)
+            edges = {
+                kind: _segments([(k, src) for k, i in enumerate(levels[lv]) for src, e in preds[i] if e == kind])
+                for kind in ('slip', 'finish')
+            }
+            result.append((nodes, edges['slip'], edges['finish']))
+        return result
+
+    def sample_durations(self, rng, samples, distribution=DEFAULT_DISTRIBUTION, params=None):
+        """抽样实际工期（天），形状 (任务数, 样本数)"""
+        params = params or DISTRIBUTIONS[distribution]
+        factors = np.empty((len(self.records), samples))
+        owners = np.array(self.owners, dtype=object)
+        custom = np.zeros(len(self.records), dtype=bool)
+        for owner, (kind, owner_params) in TEAM_DISTRIBUTIONS.items():
+            rows = owners == owner
+            if rows.any():
+                factors[rows] = sample_factors(rng, kind, owner_params, (int(rows.sum()), samples))
+                custom |= rows
+        factors[~custom] = sample_factors(rng, distribution, params, (int((~custom).sum()), samples))
+        return np.ceil(self.done[:, None] + self.remaining[:, None] * factors).astype(np.int32)
+
+    def propagate(self, durations):
+        """按拓扑层传播，返回各任务模拟完成日（日序号偏移），形状同 durations"""
+        base = self.start.min() if len(self.start) else 0
+        start = (self.start - base).astype(np.int32)
+        end = (self.end - base).astype(np.int32)
+        finish = np.empty_like(durations)
+        slip = np.empty_like(durations)
+
+        for nodes, slip_edges, finish_edges in self.levels:
+            begin = np.repeat(start[nodes][:, None], durations.shape[1], axis=1)
+            if slip_edges is not None:
+                targets, sources, offsets = slip_edges
+                begin[targets] += np.maximum(np.maximum.reduceat(slip[sources], offsets, axis=0), 0)
+            if finish_edges is not None:
+                targets, sources, offsets = finish_edges
+                # 普通任务在前驱完成的次日开始；里程碑工期为 0，可落在前驱完成当天
+                gap = np.where(self.is_milestone[nodes[targets]], 0, 1)[:, None]
+                begin[targets] = np.maximum(begin[targets], np.maximum.reduceat(finish[sources], offsets, axis=0) + gap)
+            # 里程碑工期为 0：完成日即开始日
+            length = np.maximum(durations[nodes] - 1, 0)
+            finish[nodes] = begin + length
+            slip[nodes] = np.maximum(finish[nodes] - end[nodes][:, None], 0)
+
+        return finish + base
+
+
+class RiskForecast:
+    """模拟结果：任务级里程碑与总里程碑的分位日期"""
+
+    def __init__(self, model, tasks, milestones, samples, percentiles):
+        self.model = model
+        self.tasks = tasks
+        self.milestones = milestones
+        self.samples = samples
+        self.percentiles = percentiles
+
+
+def simulate(records, links=(), milestones=(), samples=10000, distribution=DEFAULT_DISTRIBUTION,
+             params=None, percentiles=PERCENTILES, seed=None, batch_size=BATCH_SIZE):
+    """
+    运行模拟，返回 RiskForecast
+
+    records: 任务记录（plan_sources 格式，含 id / module / task / start / end / progress / phase / is_milestone）
+    """
+    model = ScheduleModel(records, links, milestones)
+    rng = np.random.default_rng(seed)
+    milestone_rows = np.flatnonzero(model.is_milestone)
+
+    task_finishes = []
+    gate_finishes = [[] for _ in model.milestone_gates]
+    for offset in range(0, samples, batch_size):
+        count = min(batch_size, samples - offset)
+        finish = model.propagate(model.sample_durations(rng, count, distribution, params))
+        task_finishes.append(finish[milestone_rows])
+        for k, (ms_day, gate, completed) in enumerate(model.milestone_gates):
+            if completed or not len(gate):
+                gate_finishes[k].append(np.full(count, ms_day))
+            else:
+                gate_finishes[k].append(np.maximum(finish[gate].max(axis=0), ms_day))
+
+    def to_dates(values):
+        return {p: date.fromordinal(int(np.ceil(v))) for p, v in zip(percentiles, values)}
+
+    tasks = {}
+    if len(milestone_rows):
+        points = np.percentile(np.concatenate(task_finishes, axis=1), percentiles, axis=1).T
+        for row, values in zip(milestone_rows, points):
+            record = model.records[row]
+            tasks[(record['module'], record['task'])] = dict(
+                to_dates(values), planned=date.fromordinal(int(model.start[row])))
+
+    project = []
+    for ms, (ms_day, _, _), finishes in zip(model.milestones, model.milestone_gates, gate_finishes):
+        values = np.percentile(np.concatenate(finishes), percentiles)
+        project.append(dict(to_dates(values), name=ms['name'], planned=date.fromordinal(ms_day)))
+
+    return RiskForecast(model, tasks, project, samples, percentiles)
+
+
+def format_forecast(forecast):
+    header = '   ' + '里程碑'.ljust(24) + '计划'.ljust(12) + ''.join(f'P{p}'.ljust(12) for p in forecast.percentiles)
+    lines = [f"🎲 Monte Carlo 进度风险（{forecast.samples} 个样本）", '', '📍 总里程碑:', header]
+    for ms in forecast.milestones:
+        lines.append('   ' + ms['name'].ljust(20) + str(ms['planned']).ljust(12)
+                     + ''.join(str(ms[p]).ljust(12) for p in forecast.percentiles))
+    lines += ['', '◆ 模块里程碑:', header]
+    for (module, task), item in forecast.tasks.items():
+        lines.append('   ' + f'{module} / {task}'.ljust(20) + str(item['planned']).ljust(12)
+                     + ''.join(str(item[p]).ljust(12) for p in forecast.percentiles))
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='里程碑进度风险模拟')
+    parser.add_argument('source', nargs='?', default='tasks_list',
+                        help="计划来源: 'tasks_list'（默认）、JSON 快照/导出文件或 gantt.db")
+    parser.add_argument('--samples', type=int, default=10000, help='样本数')
+    parser.add_argument('--distribution', choices=sorted(DISTRIBUTIONS), default=DEFAULT_DISTRIBUTION,
+                        help='工期系数分布')
+    parser.add_argument('--seed', type=int, help='随机种子（便于复现）')
+    args = parser.parse_args(argv)
+
+    from backend.plan_sources import load_plan
+    from gantt_chart import milestones
+
+    plan = load_plan(args.source)
+    started = time.perf_counter()
+    forecast = simulate(plan['tasks'], plan['links'], milestones, args.samples, args.distribution, seed=args.seed)
+    elapsed = time.perf_counter() - started
+    print(format_forecast(forecast))
+    print(f"\n⏱️  {len(forecast.model.records)} 个任务 × {args.samples} 个样本，耗时 {elapsed:.2f} 秒")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+任务全文检索 - 倒排索引
+
+分词:
+    中日韩文字按字切分，索引单字与相邻双字（bigram）
+    英文 / 数字按单词切分并转小写
+
+    查询串中两个字以上的中文片段只用 bigram 匹配，单字查询用单字匹配。
+
+结构:
+    postings[字段][词] = {任务ID: 词频}
+    combined[词]       = {任务ID: Σ 字段权重 × 词频}（不限字段检索时直接使用）
+    检索时取最短的倒排表开始求交集，得分 = Σ 加权词频 × idf，取前 limit 条
+
+支持按任务增删改（add / remove / update / sync），无需整体重建。
+"""
+
+import heapq
+import math
+import re
+import threading
+
+# 参与检索的字段及权重
+SEARCH_FIELDS = {
+    'task': 3.0,
+    'module': 2.0,
+    'owner': 1.0,
+}
+
+_TOKEN_RE = re.compile(r'[㐀-䶿一-鿿豈-﫿]+|[0-9A-Za-z]+')
+_CJK_RE = re.compile(r'[㐀-䶿一-鿿豈-﫿]')
+
+
+def _runs(text):
+    return _TOKEN_RE.findall(str(text or '').lower())
+
+
+def tokenize(text):
+    """文本 -> 索引词列表（中文单字 + 双字，英文单词）"""
+    terms = []
+    for run in _runs(text):
+        if not _CJK_RE.match(run):
+            terms.append(run)
+            continue
+        terms.extend(run)
+        terms.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return terms
+
+
+def query_terms(text):
+    """查询串 -> 检索词（去重，保持顺序）"""
+    terms = []
+    for run in _runs(text):
+        if _CJK_RE.match(run) and len(run) > 1:
+            terms.extend(run[i:i + 2] for i in range(len(run) - 1))
+        else:
+            terms.append(run)
+    return list(dict.fromkeys(terms))
+
+
+class SearchIndex:
+    """按字段的倒排索引，支持增量更新"""
+
+    def __init__(self, tasks=(), fields=SEARCH_FIELDS):
+        self.fields = dict(fields)
+        self.postings = {field: {} for field in self.fields}
+        self.combined = {}
+        self.docs = {}
+        self._lock = threading.Lock()
+        for doc_id, task in enumerate(tasks):
+            self.add(doc_id, task)
+
+    def __len__(self):
+        return len(self.docs)
+
+    def _doc_fields(self, task):
+        return tuple(str(task.get(field) or '') for field in self.fields)
+
+    def add(self, doc_id, task):
+        with self._lock:
+            self._add(doc_id, self._doc_fields(task))
+
+    def remove(self, doc_id):
+        with self._lock:
+            self._remove(doc_id)
+
+    def update(self, doc_id, task):
+        with self._lock:
+            self._remove(doc_id)
+            self._add(doc_id, self._doc_fields(task))
+
+    def sync(self, tasks):
+        """
+        与新的任务列表（任务ID = 下标）对齐，只重建内容变化的任务
+
+        返回变化的任务数
+        """
+        changed = 0
+        with self._lock:
+            for doc_id, task in enumerate(tasks):
+                values = self._doc_fields(task)
+                if self.docs.get(doc_id) != values:
+                    self._remove(doc_id)
+                    self._add(doc_id, values)
+                    changed += 1
+            for doc_id in [d for d in self.docs if d >= len(tasks)]:
+                self._remove(doc_id)
+                changed += 1
+        return changed
+
+    def _add(self, doc_id, values):
+        self.docs[doc_id] = values
+        for field, value in zip(self.fields, values):
+            postings = self.postings[field]
+            weight = self.fields[field]
+            for term in tokenize(value):
+                entry = postings.setdefault(term, {})
+                entry[doc_id] = entry.get(doc_id, 0) + 1
+                entry = self.combined.setdefault(term, {})
+                entry[doc_id] = entry.get(doc_id, 0.0) + weight
+
+    def _remove(self, doc_id):
+        values = self.docs.pop(doc_id, None)
+        if values is None:
+            return
+        for field, value in zip(self.fields, values):
+            for term in set(tokenize(value)):
+                for postings in (self.postings[field], self.combined):
+                    entry = postings.get(term)
+                    if entry is None:
+                        continue
+                    entry.pop(doc_id, None)
+                    if not entry:
+                        del postings[term]
+
+    def _term_hits(self, term, fields):
+        """检索词在所选字段中的 {任务ID: 加权词频}"""
+        if fields is None:
+            return self.combined.get(term, {})
+        hits = {}
+        for field in fields:
+            weight = self.fields[field]
+            for doc_id, tf in self.postings[field].get(term, {}).items():
+                hits[doc_id] = hits.get(doc_id, 0.0) + weight * tf
+        return hits
+
+    def search(self, text, fields=None, candidates=None, limit=None):
+        """
+        检索，返回按得分降序的 [(任务ID, 得分), ...]
+
+        fields: 限定检索的字段（默认全部）
+        candidates: 预先过滤出的任务ID集合（如字段过滤结果），只在其中排序
+        limit: 只取得分最高的前 limit 条
+        所有检索词都须出现在所选字段之一中
+        """
+        terms = query_terms(text)
+        if fields is not None:
+            fields = [f for f in fields if f in self.fields]
+            if len(fields) == len(self.fields):
+                fields = None
+            elif not fields:
+                return []
+        if not terms:
+            return []
+
+        with self._lock:
+            total = len(self.docs) or 1
+            per_term = []
+            for term in terms:
+                hits = self._term_hits(term, fields)
+                if not hits:
+                    return []
+                per_term.append((hits, math.log(1 + total / len(hits))))
+
+            # 从最短的倒排表开始求交集
+            per_term.sort(key=lambda item: len(item[0]))
+            first, first_idf = per_term[0]
+            if candidates is None and len(per_term) == 1:
+                scores = {doc_id: tf * first_idf for doc_id, tf in first.items()}
+            else:
+                scores = {}
+                for doc_id, tf in first.items():
+                    if candidates is not None and doc_id not in candidates:
+                        continue
+                    score = tf * first_idf
+                    for hits, idf in per_term[1:]:
+                        other = hits.get(doc_id)
+                        if other is None:
+                            break
+                        score += other * idf
+                    else:
+                        scores[doc_id] = score
+
+        ranked = ((-score, doc_id) for doc_id, score in scores.items())
+        top = heapq.nsmallest(limit, ranked) if limit is not None else sorted(ranked)
+        return [(doc_id, -neg) for neg, doc_id in top]
@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+内容寻址快照库 - 替代仓库里一份份完整的备份文件
+
+    - 每条任务记录按内容哈希只存一次（zlib + 预置字典压缩）
+    - 每个快照只是一份记录哈希清单（manifest）
+    - 存储增长取决于变化的记录数，而不是 计划大小 × 快照数
+
+支持的快照来源:
+    - JSON（local_data*.json、localstorage*.json 等）：顶层及嵌套的记录数组逐条入库
+    - SQLite 数据库（gantt.db）及含数据库的 .tar.gz 备份：逐表逐行入库，恢复为 .db 文件
+
+DHTMLX 以 '$' 开头的运行时字段（$index、$level 等）每次渲染都会变化，入库时默认去掉。
+
+用法:
+    python3 backend/snapshot_store.py save local_data_*.json gantt.db.backup_*.tar.gz
+    python3 backend/snapshot_store.py list
+    python3 backend/snapshot_store.py restore 3 restored.json
+    python3 backend/snapshot_store.py stats
+"""
+
+import argparse
+import base64
+import hashlib
+import json
+import os
+import sqlite3
+import tarfile
+import tempfile
+import zlib
+from datetime import datetime
+
+DEFAULT_STORE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'snapshots', 'store.db')
+
+# 任务记录中反复出现的片段，作为 zlib 预置字典提升小对象的压缩率
+ZDICT = (
+    b'"id":"text":"type":"task","parent":"module-"start_date":"end_date":"duration":'
+    b'"progress":"owner":"phase":"H1","H2","is_milestone":false,true,"priority":"medium",'
+    b'"status":"planned","in-progress","completed","description":"","open":true,"order":'
+    b'"view":"project","product",T16:00:00.000Z","created_at":"updated_at":"user_id":null'
+)
+
+SQLITE_MAGIC = b'SQLite format 3\x00'
+
+# 嵌套对象展开的最大深度（更深的部分整体作为一个对象存储）
+MAX_DEPTH = 3
+
+
+def object_hash(canonical):
+    return hashlib.blake2b(canonical, digest_size=16).hexdigest()
+
+
+def compress(data):
+    c = zlib.compressobj(9, zdict=ZDICT)
+    return c.compress(data) + c.flush()
+
+
+def decompress(blob):
+    d = zlib.decompressobj(zdict=ZDICT)
+    return d.decompress(blob) + d.flush()
+
+
+def strip_runtime_fields(record):
+    return {k: v for k, v in record.items() if not k.startswith('$')}
+
+
+def _jsonable(value):
+    """SQLite 行中的 bytes 以 base64 标记保存"""
+    if isinstance(value, bytes):
+        return {'$b64': base64.b64encode(value).decode('ascii')}
+    return value
+
+
+def _from_jsonable(value):
+    if isinstance(value, dict) and set(value) == {'$b64'}:
+        return base64.b64decode(value['$b64'])
+    return value
+
+
+class SnapshotStore:
+    """基于 SQLite 的内容寻址快照库"""
+
+    def __init__(self, path=DEFAULT_STORE, strip_runtime=True):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.strip_runtime = strip_runtime
+        self.db = sqlite3.connect(path)
+        self.db.executescript('''
+            CREATE TABLE IF NOT EXISTS objects (
+                hash TEXT PRIMARY KEY,
+                data BLOB NOT NULL
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS snapshots (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL,
+                source TEXT,
+                kind TEXT NOT NULL,
+                created_at TEXT NOT NULL,
+                record_count INTEGER NOT NULL,
+                raw_size INTEGER NOT NULL,
+                manifest BLOB NOT NULL
+            );
+        ''')
+        self._pending = {}
+
+    def close(self):
+        self.db.close()
+
+    # ------------------------------------------------------------------
+    # 对象
+    # ------------------------------------------------------------------
+
+    def put_object(self, value):
+        """存入一个 JSON 值，返回内容哈希（已存在则跳过）"""
+        canonical = json.dumps(value, ensure_ascii=False, sort_keys=True, separators=(',', ':')).encode('utf-8')
+        digest = object_hash(canonical)
+        if digest not in self._pending:
+            data = json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+            self._pending[digest] = compress(data)
+        return digest
+
+    def _flush_objects(self):
+        self.db.executemany(
+            'INSERT OR IGNORE INTO objects (hash, data) VALUES (?, ?)', self._pending.items())
+        self._pending.clear()
+
+    def get_objects(self, hashes):
+        """批量读取对象，返回 {hash: value}"""
+        wanted = list(dict.fromkeys(hashes))
+        found = {}
+        for i in range(0, len(wanted), 900):
+            chunk = wanted[i:i + 900]
+            rows = self.db.execute(
+                f'SELECT hash, data FROM objects WHERE hash IN ({",".join("?" * len(chunk))})', chunk)
+            for digest, blob in rows:
+                found[digest] = json.loads(decompress(blob))
+        missing = set(wanted) - set(found)
+        if missing:
+            raise KeyError(f'快照库缺少对象: {sorted(missing)[:3]}')
+        return found
+
+    # ------------------------------------------------------------------
+    # 编码：JSON 值 -> manifest 节点
+    #   {"L": [hash, ...]}         记录数组（每条记录一个对象）
+    #   {"D": [[key, node], ...]}  展开的字典（保持键顺序）
+    #   {"O": hash}                整体存储的值
+    # ------------------------------------------------------------------
+
+    def _encode(self, value, depth=0):
+        if isinstance(value, list) and value and all(isinstance(v, dict) for v in value):
+            if self.strip_runtime:
+                value = [strip_runtime_fields(v) for v in value]
+            return {'L': [self.put_object(v) for v in value]}
+        if isinstance(value, dict) and depth < MAX_DEPTH:
+            return {'D': [[k, self._encode(v, depth + 1)] for k, v in value.items()]}
+        return {'O': self.put_object(value)}
+
+    @staticmethod
+    def _collect(node, out):
+        if 'L' in node:
+            out.extend(node['L'])
+        elif 'D' in node:
+            for _, child in node['D']:
+                SnapshotStore._collect(child, out)
+        else:
+            out.append(node['O'])
+        return out
+
+    @staticmethod
+    def _decode(node, objects):
+        if 'L' in node:
+            return [objects[h] for h in node['L']]
+        if 'D' in node:
+            return {k: SnapshotStore._decode(child, objects) for k, child in node['D']}
+        return objects[node['O']]
+
+    # ------------------------------------------------------------------
+    # 快照
+    # ------------------------------------------------------------------
+
+    def save(self, source, name=None):
+        """导入一个快照文件，返回快照 id"""
+        raw_size = os.path.getsize(source)
+        if source.endswith(('.tar.gz', '.tgz')):
+            kind, manifest = 'sqlite', self._encode_tarball(source)
+        elif _is_sqlite(source):
+            kind, manifest = 'sqlite', self._encode_sqlite(source)
+        else:
+            with open(source, encoding='utf-8') as f:
+                kind, manifest = 'json', self._encode(json.load(f))
+
+        record_count = len(self._collect(manifest, []))
+        blob = compress(json.dumps(manifest, separators=(',', ':')).encode('utf-8'))
+        with self.db:
+            self._flush_objects()
+            cursor = self.db.execute(
+                'INSERT INTO snapshots (name, source, kind, created_at, record_count, raw_size, manifest) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (name or os.path.basename(source), os.path.abspath(source), kind,
+                 datetime.now().isoformat(timespec='seconds'), record_count, raw_size, blob))
+        return cursor.lastrowid
+
+    def _encode_sqlite(self, path):
+        conn = sqlite3.connect(f'file:{path}?mode=ro', uri=True)
+        try:
+            schema = conn.execute(
+                "SELECT type, name, tbl_name, sql FROM sqlite_master "
+                "WHERE sql IS NOT NULL AND name NOT LIKE 'sqlite_%' ORDER BY rowid").fetchall()
+            tables = []
+            for obj_type, name, _, sql in schema:
+                if obj_type != 'table':
+                    continue
+                cursor = conn.execute(f'SELECT * FROM "{name}"')
+                columns = [c[0] for c in cursor.description]
+                rows = [{c: _jsonable(v) for c, v in zip(columns, row)} for row in cursor]
+                tables.append([name, self._encode(rows) if rows else {'L': []}])
+            return {'D': [
+                ['schema', {'O': self.put_object([list(s) for s in schema])}],
+                ['tables', {'D': tables}],
+            ]}
+        finally:
+            conn.close()
+
+    def _encode_tarball(self, path):
+        with tarfile.open(path, 'r:gz') as tar:
+            for member in tar.getmembers():
+                if not member.isfile() or os.path.basename(member.name).startswith('._'):
+                    continue
+                data = tar.extractfile(member).read()
+                if data.startswith(SQLITE_MAGIC):
+                    with tempfile.NamedTemporaryFile(suffix='.db', delete=False) as tmp:
+                        tmp.write(data)
+                    try:
+                        return self._encode_sqlite(tmp.name)
+                    finally:
+                        os.unlink(tmp.name)
+        raise ValueError(f'{path} 中没有 SQLite 数据库')
+
+    def snapshots(self):
+        return self.db.execute(
+            'SELECT id, name, kind, created_at, record_count, raw_size FROM snapshots ORDER BY id').fetchall()
+
+    def manifest(self, snapshot_id):
+        row = self.db.execute('SELECT kind, manifest FROM snapshots WHERE id = ?', (snapshot_id,)).fetchone()
+        if row is None:
+            raise KeyError(f'快照不存在: {snapshot_id}')
+        return row[0], json.loads(decompress(row[1]))
+
+    def load(self, snapshot_id):
+        """取回快照内容：JSON 快照返回原结构，数据库快照返回 {'schema', 'tables'}"""
+        kind, manifest = self.manifest(snapshot_id)
+        objects = self.get_objects(self._collect(manifest, []))
+        return kind, self._decode(manifest, objects)
+
+    def restore(self, snapshot_id, dest):
+        """将快照还原为文件（JSON 或 SQLite 数据库）"""
+        kind, content = self.load(snapshot_id)
+        if kind == 'json':
+            with open(dest, 'w', encoding='utf-8') as f:
+                json.dump(content, f, indent=2, ensure_ascii=False)
+            return dest
+
+        if os.path.exists(dest):
+            raise FileExistsError(dest)
+        conn = sqlite3.connect(dest)
+        try:
+            with conn:
+                schema = content['schema']
+                for obj_type, _, _, sql in schema:
+                    if obj_type == 'table':
+                        conn.execute(sql)
+                for table, rows in content['tables'].items():
+                    if rows:
+                        columns = list(rows[0])
+                        conn.executemany(
+                            f'INSERT INTO "{table}" ({", ".join(_quote(c) for c in columns)}) '
+                            f'VALUES ({",".join("?" * len(columns))})',
+                            [[_from_jsonable(r[c]) for c in columns] for r in rows])
+                for obj_type, _, _, sql in schema:
+                    if obj_type != 'table':
+                        conn.execute(sql)
+        finally:
+            conn.close()
+        return dest
+
+    def stats(self):
+        objects, stored = self.db.execute('SELECT COUNT(*), COALESCE(SUM(LENGTH(data)), 0) FROM objects').fetchone()
+        snapshots, raw, manifests = self.db.execute(
+            'SELECT COUNT(*), COALESCE(SUM(raw_size), 0), COALESCE(SUM(LENGTH(manifest)), 0) FROM snapshots').fetchone()
+        return {
+            'snapshots': snapshots,
+            'objects': objects,
+            'object_bytes': stored,
+            'manifest_bytes': manifests,
+            'source_bytes': raw,
+            'file_bytes': os.path.getsize(self.path),
+        }
+
+
+def _quote(identifier):
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+def _is_sqlite(path):
+    with open(path, 'rb') as f:
+        return f.read(len(SQLITE_MAGIC)) == SQLITE_MAGIC
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='内容寻址快照库')
+    parser.add_argument('--store', default=DEFAULT_STORE, help='快照库路径')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p_save = sub.add_parser('save', help='导入快照文件')
+    p_save.add_argument('files', nargs='+')
+    p_save.add_argument('--name', help='快照名称（仅导入单个文件时使用）')
+
+    sub.add_parser('list', help='列出快照')
+
+    p_restore = sub.add_parser('restore', help='还原快照')
+    p_restore.add_argument('snapshot_id', type=int)
+    p_restore.add_argument('dest')
+
+    sub.add_parser('stats', help='存储统计')
+    args = parser.parse_args(argv)
+
+    store = SnapshotStore(args.store)
+    try:
+        if args.command == 'save':
+            for path in args.files:
+                snapshot_id = store.save(path, args.name if len(args.files) == 1 else None)
+                print(f"✅ 已保存快照 #{snapshot_id}: {path}")
+        elif args.command == 'list':
+            for snapshot_id, name, kind, created_at, count, raw_size in store.snapshots():
+                print(f"#{snapshot_id:<4} {created_at}  {kind:<6} {count:>6} 条记录  {raw_size / 1024:>8.1f} KB  {name}")
+        elif args.command == 'restore':
+            print(f"✅ 已还原到: {store.restore(args.snapshot_id, args.dest)}")
+        else:
+            s = store.stats()
+            print(f"📦 快照数: {s['snapshots']}，对象数: {s['objects']}")
+            print(f"   原始文件合计: {s['source_bytes'] / 1024:.1f} KB")
+            print(f"   快照库文件:   {s['file_bytes'] / 1024:.1f} KB "
+                  f"(对象 {s['object_bytes'] / 1024:.1f} KB + 清单 {s['manifest_bytes'] / 1024:.1f} KB)")
+    finally:
+        store.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+任务内存索引 - 一次构建，供 JSON 查询接口使用
+
+结构:
+    - 字段查找表: phase / module / owner / status -> 任务ID列表
+    - 按开始日期排序的数组: 用于日期区间查询 (bisect)
+    - 倒排索引: task / module / owner 全文检索
+    - 分面位图: 筛选侧栏的各取值计数
+"""
+
+import bisect
+from datetime import date
+
+from backend.data_exporter import determine_status
+from backend.facet_index import FacetIndex
+from backend.rollup import Rollup
+from backend.search_index import SearchIndex
+
+# 支持等值过滤的字段
+INDEXED_FIELDS = ('phase', 'module', 'owner', 'status')
+
+
+def to_ordinal(date_str):
+    """'YYYY-MM-DD' -> 日序号"""
+    return date.fromisoformat(date_str[:10]).toordinal()
+
+
+class TaskIndex:
+    """任务索引：字段查找表 + 开始日期排序数组"""
+
+    def __init__(self, tasks, milestones=(), search_index=None):
+        self.tasks = []
+        self.milestones = list(milestones)
+        self.lookup = {field: {} for field in INDEXED_FIELDS}
+
+        for task_id, task in enumerate(tasks):
+            record = dict(task)
+            record['id'] = task_id
+            record['status'] = determine_status(task['progress'])
+            self.tasks.append(record)
+            for field in INDEXED_FIELDS:
+                self.lookup[field].setdefault(record[field], []).append(task_id)
+
+        # 按开始日期排序，区间查询时用 bisect 截取候选
+        self._starts = [to_ordinal(t['start']) for t in self.tasks]
+        self._ends = [to_ordinal(t['end']) for t in self.tasks]
+        self._by_start = sorted(range(len(self.tasks)), key=lambda i: self._starts[i])
+        self._start_keys = [self._starts[i] for i in self._by_start]
+        self._max_span = max((e - s for s, e in zip(self._starts, self._ends)), default=0)
+
+        self._module_summaries = self._summarize_modules()
+
+        # 倒排索引可跨数据版本复用，只同步变化的任务
+        if search_index is None:
+            search_index = SearchIndex(self.tasks)
+        else:
+            search_index.sync(self.tasks)
+        self.search_index = search_index
+        self.facets = FacetIndex(self.tasks)
+
+    def _summarize_modules(self):
+        """预先计算模块汇总（保持任务中的出现顺序）"""
+        rollup = Rollup(self.tasks)
+        summaries = []
+        for summary in rollup.summaries('module'):
+            members = rollup.members('module', summary['module'])
+            summaries.append({
+                'module': summary['module'],
+                'phase': summary['phase'],
+                'start': summary['start'].isoformat(),
+                'end': summary['end'].isoformat(),
+                'progress': round(summary['progress'], 2),
+                'status': determine_status(summary['progress']),
+                'owners': summary['owners'],
+                'task_count': summary['task_count'],
+                'milestone_count': sum(1 for i in members if self.tasks[i]['is_milestone']),
+            })
+        return summaries
+
+    def _ids_in_window(self, date_from=None, date_to=None):
+        """返回与 [date_from, date_to] 有交集的任务ID集合"""
+        lo_key = to_ordinal(date_from) if date_from else None
+        hi_key = to_ordinal(date_to) if date_to else None
+
+        # 开始日期 <= date_to 的任务是有序数组的前缀
+        hi = bisect.bisect_right(self._start_keys, hi_key) if hi_key is not None else len(self._by_start)
+        # 结束日期 >= date_from 的任务，其开始日期一定 >= date_from - 最长工期
+        lo = bisect.bisect_left(self._start_keys, lo_key - self._max_span) if lo_key is not None else 0
+
+        return {
+            i for i in self._by_start[lo:hi]
+            if lo_key is None or self._ends[i] >= lo_key
+        }
+
+    def query(self, filters=None, date_from=None, date_to=None):
+        """
+        按字段与日期窗口查询任务
+
+        filters: {字段: [取值, ...]}，同字段内为 OR，字段间为 AND
+        """
+        candidates = None
+        for field, values in (filters or {}).items():
+            if field not in self.lookup:
+                raise KeyError(field)
+            ids = set()
+            for value in values:
+                ids.update(self.lookup[field].get(value, ()))
+            candidates = ids if candidates is None else candidates & ids
+
+        if date_from or date_to:
+            window = self._ids_in_window(date_from, date_to)
+            candidates = window if candidates is None else candidates & window
+
+        if candidates is None:
+            return list(self.tasks)
+        return [self.tasks[i] for i in sorted(candidates)]
+
+    def search(self, text, filters=None, fields=None, limit=None, date_from=None, date_to=None):
+        """
+        全文检索，结果按相关度排序，可叠加字段过滤与日期窗口（同 query）
+
+        返回任务记录副本，附带 score
+        """
+        candidates = None
+        if filters or date_from or date_to:
+            candidates = {t['id'] for t in self.query(filters, date_from, date_to)}
+        hits = self.search_index.search(text, fields, candidates, limit)
+        return [dict(self.tasks[i], score=round(score, 4)) for i, score in hits]
+
+    def facet_counts(self, filters=None):
+        """满足条件的任务数及各分面取值的任务数"""
+        total = self.facets.resolve(filters).bit_count()
+        return total, self.facets.counts(filters)
+
+    def modules(self, filters=None):
+        """模块汇总，可按 phase / module 过滤"""
+        filters = filters or {}
+        return [
+            m for m in self._module_summaries
+            if all(m.get(field) in values for field, values in filters.items())
+        ]
+
+    def milestone_items(self, filters=None, date_from=None, date_to=None):
+        """
+        总里程碑 + 任务级里程碑
+
+        总里程碑只有 phase 与 completed（status 按 completed / planned 计），不属于任何模块和负责人：
+        按 module / owner 过滤时不返回总里程碑
+        """
+        filters = filters or {}
+
+        def matches(ms):
+            values = {'phase': ms.get('phase'), 'status': 'completed' if ms.get('completed') else 'planned'}
+            return all(values.get(field) in allowed for field, allowed in filters.items())
+
+        project = [
+            ms for ms in self.milestones
+            if matches(ms)
+            and (not date_from or ms['date'] >= date_from)
+            and (not date_to or ms['date'] <= date_to)
+        ]
+        tasks = [t for t in self.query(filters, date_from, date_to) if t['is_milestone']]
+        return project, tasks
+
+    def values(self, field):
+        """某个字段的全部取值（用于前端下拉框）"""
+        return list(self.lookup[field])
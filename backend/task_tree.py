@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+任务层级索引 - 任意深度的 parent -> children 树
+
+    children   邻接表（同级按 order、再按出现顺序）
+    depth      节点深度（根为 0）
+    tin/tout   欧拉序区间：节点 i 的子树即 preorder[tin[i]:tout[i]]
+
+子树查询、汇总、展开/折叠行计算都只访问相关子树，不再扫描全部任务。
+"""
+
+from datetime import date
+
+
+class TaskTree:
+    """由任务记录（含 id / parent）构建的层级索引"""
+
+    def __init__(self, records):
+        self.records = list(records)
+        n = len(self.records)
+        self.index = {}
+        for i, record in enumerate(self.records):
+            self.index.setdefault(record['id'], i)
+
+        self.parent = [-1] * n
+        self.children = [[] for _ in range(n)]
+        for i, record in enumerate(self.records):
+            p = self.index.get(record.get('parent'), -1)
+            if p != i:
+                self.parent[i] = p
+        for i in range(n):
+            if self.parent[i] >= 0:
+                self.children[self.parent[i]].append(i)
+        for kids in self.children:
+            kids.sort(key=lambda c: self.records[c].get('order', 0))
+
+        self.roots = [i for i in range(n) if self.parent[i] < 0]
+        self.depth = [0] * n
+        self.tin = [0] * n
+        self.tout = [0] * n
+        self.preorder = []
+        self._euler_tour()
+        self._rollups = None
+
+    def _euler_tour(self):
+        """迭代 DFS 计算先序、深度与欧拉区间；环上的节点提升为根"""
+        visited = [False] * len(self.records)
+
+        def walk(root):
+            stack = [(root, False)]
+            while stack:
+                node, done = stack.pop()
+                if done:
+                    self.tout[node] = len(self.preorder)
+                    continue
+                visited[node] = True
+                self.tin[node] = len(self.preorder)
+                self.preorder.append(node)
+                stack.append((node, True))
+                for child in reversed(self.children[node]):
+                    if not visited[child]:
+                        self.depth[child] = self.depth[node] + 1
+                        stack.append((child, False))
+
+        for root in self.roots:
+            walk(root)
+        # 处于环中的节点从任何根都不可达
+        for i in range(len(self.records)):
+            if not visited[i]:
+                if self.parent[i] >= 0:
+                    self.children[self.parent[i]].remove(i)
+                self.parent[i] = -1
+                self.depth[i] = 0
+                self.roots.append(i)
+                walk(i)
+
+    @classmethod
+    def from_tasks_list(cls, tasks):
+        """tasks_list（扁平 module -> task）-> 两层树"""
+        from backend.plan_sources import records_from_tasks_list
+        return cls(records_from_tasks_list(tasks))
+
+    def __len__(self):
+        return len(self.records)
+
+    def node(self, task_id):
+        return self.index[task_id]
+
+    def is_leaf(self, node):
+        return not self.children[node]
+
+    def subtree(self, task_id):
+        """子树中的节点（含自身，先序），O(子树大小)"""
+        node = self.index[task_id]
+        return self.preorder[self.tin[node]:self.tout[node]]
+
+    def ancestors(self, task_id):
+        node = self.parent[self.index[task_id]]
+        chain = []
+        while node >= 0:
+            chain.append(node)
+            node = self.parent[node]
+        return chain
+
+    def is_descendant(self, node, ancestor):
+        return self.tin[ancestor] <= self.tin[node] < self.tout[ancestor]
+
+    def closed_nodes(self):
+        """记录中标记为收起（open=False）的分组节点"""
+        return {i for i, r in enumerate(self.records) if self.children[i] and r.get('open') is False}
+
+    def visible(self, collapsed=()):
+        """
+        展开/折叠后的可见行（先序）
+
+        collapsed: 收起的节点集合（节点下标）；收起的节点本身可见，其子树整体跳过
+        """
+        rows = []
+        pos = 0
+        while pos < len(self.preorder):
+            node = self.preorder[pos]
+            rows.append(node)
+            pos = self.tout[node] if node in collapsed else pos + 1
+        return rows
+
+    def rollup(self, node):
+        """
+        节点汇总：叶子任务的最早开始、最晚结束、平均进度、负责人
+
+        全部节点的汇总按逆先序一次算出（O(n)）并缓存
+        """
+        if self._rollups is None:
+            self._rollups = self._compute_rollups()
+        return self._rollups[node]
+
+    def subtree_rollup(self, task_id):
+        """只扫描单个子树的汇总，O(子树大小)，适合数据变化后的局部刷新"""
+        leaves = [i for i in self.subtree(task_id) if not self.children[i]]
+        return _summarize(self.records[i] for i in leaves)
+
+    def invalidate(self):
+        """任务字段（不含层级）变化后清除汇总缓存"""
+        self._rollups = None
+
+    def _compute_rollups(self):
+        acc = [None] * len(self.records)
+        for node in reversed(self.preorder):
+            if not self.children[node]:
+                r = self.records[node]
+                acc[node] = (
+                    date.fromisoformat(r['start']), date.fromisoformat(r['end']),
+                    float(r['progress']), 1, dict.fromkeys([r['owner']] if r['owner'] else []),
+                )
+                continue
+            parts = [acc[c] for c in self.children[node]]
+            owners = {}
+            for part in parts:
+                owners.update(part[4])
+            acc[node] = (
+                min(p[0] for p in parts), max(p[1] for p in parts),
+                sum(p[2] for p in parts), sum(p[3] for p in parts), owners,
+            )
+        return [_as_summary(a) for a in acc]
+
+
+def _summarize(records):
+    records = list(records)
+    owners = dict.fromkeys(r['owner'] for r in records if r['owner'])
+    return _as_summary((
+        min(date.fromisoformat(r['start']) for r in records),
+        max(date.fromisoformat(r['end']) for r in records),
+        sum(float(r['progress']) for r in records), len(records), owners,
+    ))
+
+
+def _as_summary(acc):
+    start, end, progress_sum, count, owners = acc
+    return {
+        'start': start,
+        'end': end,
+        'progress': progress_sum / count,
+        'owners': list(owners),
+        'leaf_count': count,
+    }
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+工作日历 - 按团队区分的工作日、法定节假日与调休
+
+NumPy 的 busdaycalendar 只能去掉节假日，无法表示周末调休上班，
+因此每个日历编译为一张覆盖 FIRST_YEAR ~ LAST_YEAR 的工作日累计数组（数据超出时按数据的年份扩展）：
+
+    cum[i] = 基准日起前 i 天中的工作日数
+
+    工作日数(start..end)   = cum[end + 1] - cum[start]
+    第 k 个工作日的日期     = searchsorted(cum, k + 1) - 1
+
+所有计算都是整列数组运算，编译结果按 (日历名, 年份范围) 缓存。
+没有节假日表的年份只按工作周掩码计算（只休周末），并提示一次。
+"""
+
+from functools import lru_cache
+
+import numpy as np
+
+# 默认编译范围（年）；数据中的日期超出时按数据的年份范围扩展
+FIRST_YEAR = 2015
+LAST_YEAR = 2040
+
+DEFAULT_CALENDAR = 'cn'
+
+# 中国法定节假日（国务院办公厅公布的放假安排）
+CN_HOLIDAYS = {
+    2025: {
+        'holidays': [
+            '2025-01-01',                                                  # 元旦
+            '2025-01-28', '2025-01-29', '2025-01-30', '2025-01-31',        # 春节
+            '2025-02-01', '2025-02-02', '2025-02-03', '2025-02-04',
+            '2025-04-04', '2025-04-05', '2025-04-06',                      # 清明节
+            '2025-05-01', '2025-05-02', '2025-05-03', '2025-05-04', '2025-05-05',  # 劳动节
+            '2025-05-31', '2025-06-01', '2025-06-02',                      # 端午节
+            '2025-10-01', '2025-10-02', '2025-10-03', '2025-10-04',        # 国庆节、中秋节
+            '2025-10-05', '2025-10-06', '2025-10-07', '2025-10-08',
+        ],
+        'workdays': [
+            '2025-01-26', '2025-02-08', '2025-04-27', '2025-09-28', '2025-10-11',
+        ],
+    },
+    2026: {
+        'holidays': [
+            '2026-01-01', '2026-01-02', '2026-01-03',                      # 元旦
+            '2026-02-15', '2026-02-16', '2026-02-17', '2026-02-18',        # 春节
+            '2026-02-19', '2026-02-20', '2026-02-21', '2026-02-22', '2026-02-23',
+            '2026-04-04', '2026-04-05', '2026-04-06',                      # 清明节
+            '2026-05-01', '2026-05-02', '2026-05-03', '2026-05-04', '2026-05-05',  # 劳动节
+            '2026-06-19', '2026-06-20', '2026-06-21',                      # 端午节
+            '2026-09-25', '2026-09-26', '2026-09-27',                      # 中秋节
+            '2026-10-01', '2026-10-02', '2026-10-03', '2026-10-04',        # 国庆节
+            '2026-10-05', '2026-10-06', '2026-10-07',
+        ],
+        # 调休上班的周末
+        'workdays': [
+            '2026-01-04', '2026-02-14', '2026-02-28', '2026-05-09', '2026-09-20', '2026-10-10',
+        ],
+    },
+}
+
+# 日历定义：工作周掩码（周一..周日）+ 节假日表；holiday_years 为有节假日表的年份（None 表示不区分节假日）
+CALENDARS = {
+    'cn': {
+        'weekmask': '1111100',
+        'holidays': [d for year in CN_HOLIDAYS.values() for d in year['holidays']],
+        'workdays': [d for year in CN_HOLIDAYS.values() for d in year['workdays']],
+        'holiday_years': set(CN_HOLIDAYS),
+    },
+    # 不休周末与节假日（如 7x24 值守）
+    'continuous': {
+        'weekmask': '1111111',
+        'holidays': [],
+        'workdays': [],
+        'holiday_years': None,
+    },
+}
+
+# 团队（owner）使用的日历，未列出的团队使用 DEFAULT_CALENDAR
+TEAM_CALENDARS = {
+    # 7x24 在线客服的值守排班不休周末与节假日
+    '客服值守': 'continuous',
+}
+
+
+class WorkCalendar:
+    """编译后的工作日历"""
+
+    def __init__(self, name, weekmask='1111100', holidays=(), workdays=(),
+                 first=f'{FIRST_YEAR}-01-01', last=f'{LAST_YEAR}-12-31'):
+        self.name = name
+        self.base = np.datetime64(first, 'D')
+        days = np.arange(self.base, np.datetime64(last, 'D') + 1)
+        self.size = len(days)
+
+        # 1970-01-01 是周四，换算为周一 = 0
+        weekday = (days.astype(np.int64) + 3) % 7
+        work = np.array([c == '1' for c in weekmask])[weekday]
+        if len(holidays):
+            work[self._index(holidays)] = False
+        if len(workdays):
+            work[self._index(workdays)] = True
+
+        self.workday = work
+        self.cum = np.concatenate([[0], np.cumsum(work, dtype=np.int64)])
+
+    def _index(self, dates):
+        index = (np.asarray(dates, dtype='datetime64[D]') - self.base).astype(np.int64)
+        if index.size and (index.min() < 0 or index.max() >= self.size):
+            raise ValueError(f'日期超出工作日历范围 {self.base} ~ {self.base + self.size - 1}')
+        return index
+
+    def to_dates(self, index):
+        return self.base + np.asarray(index, dtype=np.int64)
+
+    def is_workday(self, dates):
+        return self.workday[self._index(dates)]
+
+    def count(self, starts, ends):
+        """[start, end] 闭区间内的工作日数（end < start 时为 0）"""
+        s = self._index(starts)
+        e = self._index(ends)
+        return np.maximum(self.cum[e + 1] - self.cum[s], 0)
+
+    def offset(self, starts, n):
+        """从 start（非工作日先顺延）起第 n 个工作日的日期，等价于 busday_offset(roll='forward')"""
+        k = self.cum[self._index(starts)] + np.asarray(n, dtype=np.int64)
+        return self.to_dates(np.searchsorted(self.cum, k + 1) - 1)
+
+    def progress_end(self, starts, ends, progress):
+        """
+        进度条终点：按工作日折算已完成的部分
+
+        已完成 done 个工作日时，进度条画到第 done 个工作日结束（次日零点），不超过任务结束日
+        """
+        s = self._index(starts)
+        e = self._index(ends)
+        total = np.maximum(self.cum[e + 1] - self.cum[s], 0)
+        done = np.floor(total * np.asarray(progress, dtype=float) / 100 + 1e-9).astype(np.int64)
+        last_done = np.searchsorted(self.cum, self.cum[s] + done) - 1
+        end_index = np.where(done > 0, np.minimum(last_done + 1, e), s)
+        return self.to_dates(end_index)
+
+    def planned_progress(self, starts, ends, today):
+        """截至 today（不含）计划应完成的工作日比例，0-100"""
+        s = self._index(starts)
+        e = self._index(ends)
+        t = np.clip(self._index([today])[0], s, e + 1)
+        total = self.cum[e + 1] - self.cum[s]
+        elapsed = self.cum[t] - self.cum[s]
+        return np.where(total > 0, elapsed * 100.0 / np.maximum(total, 1), (t > e) * 100.0)
+
+
+# 已提示过缺少节假日表的 (日历名, 年份)
+_warned_years = set()
+
+
+@lru_cache(maxsize=None)
+def get_calendar(name=DEFAULT_CALENDAR, first_year=FIRST_YEAR, last_year=LAST_YEAR):
+    """按名称与年份范围取编译好的日历（只编译一次）"""
+    spec = CALENDARS[name]
+    return WorkCalendar(name, spec['weekmask'], spec['holidays'], spec['workdays'],
+                        f'{first_year}-01-01', f'{last_year}-12-31')
+
+
+def calendar_for(name, starts, ends, today=None, padding=0):
+    """
+    覆盖任务日期（及 today）的日历：默认范围之外的年份按数据扩展编译范围
+
+    padding: 编译范围在任务日期两端另外放宽的天数（平移日期时用，不参与节假日表检查）
+    任务跨越的年份中没有节假日表的，这些年份只休周末，每个年份提示一次
+    """
+    start_years = np.asarray(starts, dtype='datetime64[D]').astype('datetime64[Y]').astype(np.int64) + 1970
+    end_years = np.asarray(ends, dtype='datetime64[D]').astype('datetime64[Y]').astype(np.int64) + 1970
+    if not start_years.size:
+        return get_calendar(name)
+    first = int(min(start_years.min(), end_years.min()))
+    last = int(max(start_years.max(), end_years.max()))
+
+    holiday_years = CALENDARS[name]['holiday_years']
+    if holiday_years is not None:
+        # 任务覆盖的年份（跨年任务包括中间的整年）
+        spans = np.unique(start_years * 10000 + end_years).tolist()
+        years = sorted({y for key in spans for y in range(key // 10000, key % 10000 + 1)})
+        missing = [y for y in years if y not in holiday_years and (name, y) not in _warned_years]
+        if missing:
+            _warned_years.update((name, y) for y in missing)
+            print(f"⚠️  日历 {name} 没有 {'、'.join(map(str, missing))} 年的节假日表，这些年份只按周末休息计算")
+
+    bounds = []
+    if today is not None:
+        bounds.append(np.datetime64(today, 'D'))
+    if padding:
+        bounds.append(np.asarray(starts, dtype='datetime64[D]').min() - np.timedelta64(padding, 'D'))
+        bounds.append(np.asarray(ends, dtype='datetime64[D]').max() + np.timedelta64(padding, 'D'))
+    for day in bounds:
+        year = int(day.astype('datetime64[Y]').astype(np.int64)) + 1970
+        first, last = min(first, year), max(last, year)
+    return get_calendar(name, min(first, FIRST_YEAR), max(last, LAST_YEAR))
+
+
+def calendar_names(owners):
+    """每行任务使用的日历名"""
+    return np.array([TEAM_CALENDARS.get(o, DEFAULT_CALENDAR) for o in owners], dtype=object)
+
+
+def working_days(starts, ends, owners=None):
+    """整列计算工期（工作日，含首尾），owners 决定每行使用的日历"""
+    starts = np.asarray(starts, dtype='datetime64[D]')
+    ends = np.asarray(ends, dtype='datetime64[D]')
+    names = calendar_names(owners) if owners is not None else np.full(len(starts), DEFAULT_CALENDAR, dtype=object)
+    result = np.zeros(len(starts), dtype=np.int64)
+    for name in np.unique(names):
+        rows = names == name
+        result[rows] = calendar_for(name, starts[rows], ends[rows]).count(starts[rows], ends[rows])
+    return result
+
+
+def shift_work_days(starts, ends, owners, n):
+    """
+    整列平移 n 个工作日（负数为提前），返回 (新开始日期, 新结束日期)
+
+    开始日期按各行的日历平移 n 个工作日（落在非工作日时先顺延）；
+    结束日期从新开始日期起按原工期（工作日数）推算，跨过的周末、节假日不计入工期
+    """
+    starts = np.asarray(starts, dtype='datetime64[D]')
+    ends = np.asarray(ends, dtype='datetime64[D]')
+    names = calendar_names(owners)
+    # 编译范围按平移后可能到达的日期放宽（n 个工作日不超过 2n + 30 个日历天）
+    padding = 2 * abs(int(n)) + 30
+    new_starts = starts.copy()
+    new_ends = ends.copy()
+    for name in np.unique(names):
+        rows = names == name
+        calendar = calendar_for(name, starts[rows], ends[rows], padding=padding)
+        work_days = calendar.count(starts[rows], ends[rows])
+        new_starts[rows] = calendar.offset(starts[rows], n)
+        new_ends[rows] = np.where(work_days > 0, calendar.offset(new_starts[rows], np.maximum(work_days - 1, 0)),
+                                  new_starts[rows])
+    return new_starts, new_ends
+
+
+def apply_calendar(df, today=None):
+    """
+    为任务表（start / end 为日期列）整列计算工作日字段
+
+        work_days         工期（工作日，含首尾）
+        progress_end      按工作日折算的进度条终点
+        planned_progress  截至 today 的计划进度（提供 today 时）
+
+    按日历分组，每个日历一次数组运算
+    """
+    df = df.copy()
+    starts = df['start'].values.astype('datetime64[D]')
+    ends = df['end'].values.astype('datetime64[D]')
+    progress = df['progress'].to_numpy(dtype=float)
+    names = calendar_names(df['owner']) if 'owner' in df else np.full(len(df), DEFAULT_CALENDAR, dtype=object)
+
+    work_days = np.zeros(len(df), dtype=np.int64)
+    progress_end = starts.copy()
+    planned = np.zeros(len(df))
+    for name in np.unique(names):
+        rows = names == name
+        calendar = calendar_for(name, starts[rows], ends[rows], today)
+        work_days[rows] = calendar.count(starts[rows], ends[rows])
+        progress_end[rows] = calendar.progress_end(starts[rows], ends[rows], progress[rows])
+        if today is not None:
+            planned[rows] = calendar.planned_progress(starts[rows], ends[rows], np.datetime64(today, 'D'))
+
+    df['work_days'] = work_days
+    df['progress_end'] = progress_end.astype('datetime64[ns]')
+    if today is not None:
+        df['planned_progress'] = planned
+    return df
@@ -4,8 +4,9 @@
 
 import { create } from 'zustand';
 import type { GanttTask, TaskLink, GanttConfig, GanttStore } from '@/types/gantt';
-import initialData from '@/data/initial-data.json';
+import rawInitialData from '@/data/initial-data.json';
 import { validateGanttData } from '@/utils/dataConverter';
+import { decodeInitialData } from '@/utils/compactData';
 import api from '@/services/api';
 
 // 存储版本控制
@@ -15,6 +16,9 @@ const STORAGE_KEY = 'gantt-storage-v3';
 // 配置：是否使用后端API（true=使用API，false=使用localStorage）
 const USE_API = true;
 
+// 初始数据（data_exporter.py --format compact 导出的紧凑格式在此解码）
+const initialData = decodeInitialData(rawInitialData);
+
 // 存储数据结构
 interface StorageData {
   version: number;
@@ -0,0 +1,106 @@
+/**
+ * 紧凑列式数据解码（backend/compact_json.py，data_exporter.py --format compact）
+ *
+ * 格式标记 format: "gantt-compact/1"；tasks 为按列存放的任务表：
+ *   - 普通列：原值数组，null 表示该任务没有这个字段
+ *   - { ref, root }：父任务的行号，-1 取 root
+ *   - { days }：距 base_date 的天数
+ *   - { dict, codes }：字典编码
+ *   - { bool }：0 / 1
+ * 整列都等于缺省值的字段放在 defaults 中；derived 中的 duration 为 end_date - start_date + 1（日历天）
+ */
+
+import type { GanttData } from '@/types/gantt';
+
+export const COMPACT_FORMAT = 'gantt-compact';
+export const COMPACT_VERSION = 1;
+
+type CompactColumn =
+  | unknown[]
+  | { ref: number[]; root: unknown }
+  | { days: number[] }
+  | { dict: unknown[]; codes: number[] }
+  | { bool: (number | null)[] };
+
+interface CompactTable {
+  rows: number;
+  base_date: string | null;
+  defaults: Record<string, unknown>;
+  derived: string[];
+  columns: Record<string, CompactColumn>;
+}
+
+const DAY_MS = 24 * 60 * 60 * 1000;
+
+export function isCompactData(data: unknown): boolean {
+  const format = (data as { format?: unknown } | null)?.format;
+  return typeof format === 'string' && format.startsWith(`${COMPACT_FORMAT}/`);
+}
+
+// 'YYYY-MM-DD' <-> UTC 天数（与时区无关）
+function toDay(date: string): number {
+  return Date.UTC(Number(date.slice(0, 4)), Number(date.slice(5, 7)) - 1, Number(date.slice(8, 10))) / DAY_MS;
+}
+
+function fromDay(day: number): string {
+  return new Date(day * DAY_MS).toISOString().slice(0, 10);
+}
+
+function decodeColumn(column: CompactColumn, baseDate: string | null): unknown[] {
+  if (Array.isArray(column)) return column;
+  if ('ref' in column) return column.ref;
+  if ('days' in column) {
+    const base = toDay(baseDate as string);
+    return column.days.map(d => fromDay(base + d));
+  }
+  if ('dict' in column) return column.codes.map(c => column.dict[c]);
+  if ('bool' in column) return column.bool.map(v => (v === null ? null : v === 1));
+  throw new Error(`未知的列编码: ${Object.keys(column).join(', ')}`);
+}
+
+/**
+ * 紧凑格式 -> 普通数据对象（每个任务一个对象）
+ */
+export function decodeCompactData(data: Record<string, unknown>): GanttData {
+  if (data.format !== `${COMPACT_FORMAT}/${COMPACT_VERSION}`) {
+    throw new Error(`不支持的紧凑格式版本: ${String(data.format)}`);
+  }
+  const table = data.tasks as CompactTable;
+  const tasks: Record<string, unknown>[] = Array.from({ length: table.rows }, () => ({}));
+  const ids = decodeColumn(table.columns.id, table.base_date);
+
+  for (const [name, column] of Object.entries(table.columns)) {
+    const values = decodeColumn(column, table.base_date);
+    if (name === 'parent' && !Array.isArray(column) && 'ref' in column) {
+      values.forEach((row, i) => {
+        tasks[i].parent = (row as number) >= 0 ? ids[row as number] : column.root;
+      });
+      continue;
+    }
+    values.forEach((value, i) => {
+      if (value !== null) tasks[i][name] = value;
+    });
+  }
+
+  for (const [name, value] of Object.entries(table.defaults)) {
+    for (const task of tasks) {
+      if (!(name in task)) task[name] = value;
+    }
+  }
+  if (table.derived.includes('duration')) {
+    for (const task of tasks) {
+      task.duration = toDay(task.end_date as string) - toDay(task.start_date as string) + 1;
+    }
+  }
+
+  const output: Record<string, unknown> = { ...data, tasks };
+  delete output.format;
+  return output as unknown as GanttData;
+}
+
+/**
+ * 初始数据：紧凑格式时解码，普通格式原样返回
+ */
+export function decodeInitialData(data: unknown): GanttData {
+  return isCompactData(data) ? decodeCompactData(data as Record<string, unknown>) : (data as GanttData);
+}
@@ -7,12 +7,30 @@ Interactive Gantt Chart for AI Project Planning 2026
 风格: 极简现代浅色系 (Gemini/GPT 风格)
 """
 
+import numpy as np
 import pandas as pd
-import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 from datetime import datetime, timedelta
+import argparse
+import json
+import time
 import webbrowser
 import os
+import sys
+
+from backend.earned_value import earned_value, load_history
+from backend.facet_index import FACET_FIELDS, FacetIndex, parse_filter_args
+from backend.figure_builder import Bar, Figure, Scatter
+from backend.plan_columns import ColumnRecords, ColumnRollup, ColumnTree
+from backend.plan_sources import load_plan, records_from_tasks_list
+from backend.plan_validator import check_plan
+from backend.portfolio import format_failures, index_path, load_portfolio, portfolio_axis, time_axis
+from backend.precompress import write_compressed
+from backend.progress_log import ProgressLog
+from backend.rollup import Rollup
+from backend.schedule_risk import FINISH_TO_START, simulate
+from backend.task_tree import TaskTree
+from backend.work_calendar import apply_calendar
 
 # ============================================================================
 # 📝 可编辑数据区 - 在此处修改任务数据
@@ -442,6 +460,14 @@ COLORS = {
     },
     "today": "rgba(239, 83, 80, 0.9)",          # 红色虚线
     "milestone_marker": "rgba(255, 193, 7, 1)", # 金色菱形
+    "risk_band": "rgba(255, 193, 7, 0.15)",     # 里程碑 P50-P95 区间
+    "risk_line": "rgba(255, 160, 0, 0.7)",
+    "scope": "rgba(117, 117, 117, 0.6)",        # 燃起图范围线
+    "planned_value": "rgba(99, 149, 237, 1)",
+    "earned_value": "rgba(102, 187, 106, 1)",
+    "link": "rgba(97, 97, 97, 0.6)",            # 任务依赖连线
+    "project_bar": "rgba(120, 144, 156, 0.8)",  # 组合视图的项目汇总行
+    "project_bar_light": "rgba(120, 144, 156, 0.3)",
     "background": "#FAFAFA",                    # 极简浅灰
     "grid": "rgba(0, 0, 0, 0.06)",
     "text": "#424242",
@@ -452,24 +478,196 @@ COLORS = {
 # 📊 图表生成函数
 # ============================================================================
 
-def create_gantt_chart():
-    """生成交互式甘特图"""
+# 日期轴上横向条形的长度以毫秒计
+MS_PER_DAY = 24 * 60 * 60 * 1000
 
-    df = pd.DataFrame(tasks_list)
+# 依赖连线在任务条两端水平伸出的长度（天）
+LINK_GAP_DAYS = 2
+
+# 单计划视图的“今日”与时间轴；组合视图（--portfolio）按全部项目计算一次后传入
+TODAY = datetime(2026, 2, 9)
+TIME_AXIS = {'range': ['2026-01-01', '2027-01-15'], 'dtick': 'M1'}
+
+# 组合视图每一可见行的高度（像素）
+PORTFOLIO_ROW_HEIGHT = 28
+
+
+def calendar_hover(work_days, planned_progress):
+    """工作日历相关的悬停信息"""
+    text = ''
+    if work_days is not None:
+        text += f"<br><b>工期:</b> {work_days} 个工作日"
+    if planned_progress is not None:
+        text += f"<br><b>计划进度:</b> {planned_progress:.0f}%"
+    return text
+
+
+def add_task_traces(fig, y, module, task_name, start, end, owner, progress, phase, is_milestone,
+                    work_days=None, progress_end=None, planned_progress=None, forecast=None):
+    """
+    为单个任务添加任务条（背景 + 进度）或里程碑菱形
+
+    work_days / progress_end / planned_progress: 工作日历计算结果（backend.work_calendar.apply_calendar），
+    提供 progress_end 时进度条按工作日折算，否则按日历天比例
+    forecast: 里程碑的模拟分位日期（backend.schedule_risk），在该行画出 P50-P95 区间
+    """
+    if not is_milestone:
+        # 任务条
+        duration = (end - start).days
+        if duration == 0:
+            duration = 1
+
+        # 悬停信息
+        hover_text = (
+            f"<b>{module}</b><br>"
+            f"<b>任务:</b> {task_name}<br>"
+            f"<b>开始:</b> {start.strftime('%Y-%m-%d')}<br>"
+            f"<b>结束:</b> {end.strftime('%Y-%m-%d')}<br>"
+            f"<b>负责人:</b> {owner}<br>"
+            f"<b>进度:</b> {progress}%"
+        ) + calendar_hover(work_days, planned_progress)
+
+        # 背景条（总长度）
+        fig.add_trace(Bar(
+            x=[duration * MS_PER_DAY],
+            y=[y],
+            orientation='h',
+            base=start,
+            marker=dict(
+                color=COLORS[phase]['bar_light'],
+                line=dict(width=0)
+            ),
+            hoverinfo='skip',
+            showlegend=False,
+            name=f'{module} - {task_name} (背景)'
+        ))
+
+        # 进度条
+        if progress_end is not None:
+            progress_duration = min((progress_end - start).days, duration)
+        else:
+            progress_duration = duration * progress / 100
+        if progress_duration > 0:
+            fig.add_trace(Bar(
+                x=[progress_duration * MS_PER_DAY],
+                y=[y],
+                orientation='h',
+                base=start,
+                marker=dict(
+                    color=COLORS[phase]['bar'],
+                    line=dict(width=0)
+                ),
+                hovertemplate=hover_text + "<extra></extra>",
+                showlegend=False,
+                name=f'{module} - {task_name}'
+            ))
+        else:
+            # 添加一个透明的trace用于hover
+            fig.add_trace(Bar(
+                x=[duration * MS_PER_DAY],
+                y=[y],
+                orientation='h',
+                base=start,
+                marker=dict(
+                    color='rgba(0,0,0,0)',
+                ),
+                hovertemplate=hover_text + "<extra></extra>",
+                showlegend=False,
+                name=f'{module} - {task_name} (hover)'
+            ))
+    else:
+        # 里程碑标记（菱形）
+        hover_text = (
+            f"<b>🎯 里程碑</b><br>"
+            f"<b>{module}</b><br>"
+            f"<b>{task_name}</b><br>"
+            f"<b>日期:</b> {start.strftime('%Y-%m-%d')}<br>"
+            f"<b>负责人:</b> {owner}"
+        )
+
+        if forecast is not None:
+            add_forecast_whisker(fig, y, f"{module} / {task_name}", forecast)
+
+        fig.add_trace(Scatter(
+            x=[start],
+            y=[y],
+            mode='markers',
+            marker=dict(
+                symbol='diamond',
+                size=14,
+                color=COLORS['milestone_marker'],
+                line=dict(width=2, color='rgba(255, 160, 0, 1)')
+            ),
+            hovertemplate=hover_text + "<extra></extra>",
+            showlegend=False,
+            name=f'{module} - {task_name} (里程碑)'
+        ))
+
+
+def forecast_hover(name, forecast):
+    return (
+        f"<b>🎲 {name}</b><br>"
+        f"<b>计划:</b> {forecast['planned']}<br>"
+        f"<b>P50:</b> {forecast[50]}<br>"
+        f"<b>P80:</b> {forecast[80]}<br>"
+        f"<b>P95:</b> {forecast[95]}"
+    )
+
+
+def add_forecast_whisker(fig, y, name, forecast):
+    """里程碑行上的 P50-P95 区间线，P80 处加标记"""
+    fig.add_trace(Scatter(
+        x=[forecast[50], forecast[95]],
+        y=[y, y],
+        mode='lines',
+        line=dict(color=COLORS['risk_line'], width=6),
+        opacity=0.5,
+        hoverinfo='skip',
+        showlegend=False,
+        name=f'{name} (P50-P95)',
+    ))
+    fig.add_trace(Scatter(
+        x=[forecast[80]],
+        y=[y],
+        mode='markers',
+        marker=dict(symbol='line-ns-open', size=12, line=dict(width=2, color=COLORS['risk_line'])),
+        hovertemplate=forecast_hover(name, forecast) + "<extra></extra>",
+        showlegend=False,
+        name=f'{name} (P80)',
+    ))
+
+
+def add_risk_bands(fig, risk):
+    """总里程碑的 P50-P95 区间（纵向色带）"""
+    for ms in risk.milestones:
+        if ms[95] <= ms['planned']:
+            continue
+        fig.add_vrect(
+            x0=datetime.combine(ms[50], datetime.min.time()).timestamp() * 1000,
+            x1=(datetime.combine(ms[95], datetime.min.time()) + timedelta(days=1)).timestamp() * 1000,
+            fillcolor=COLORS['risk_band'],
+            line_width=0,
+            layer='below',
+            annotation=dict(
+                text=f"P80 {ms[80].strftime('%m-%d')}",
+                font=dict(size=9, color=COLORS['text_light']),
+            ),
+            annotation_position='bottom left',
+        )
+
+
+def add_module_rows(fig, tasks, today=None, risk=None):
+    """扁平 module -> task 两层数据：每个任务一行，返回行数"""
+
+    df = pd.DataFrame(tasks)
     df['start'] = pd.to_datetime(df['start'])
     df['end'] = pd.to_datetime(df['end'])
+    df = apply_calendar(df, today)
 
     # 获取所有模块（保持顺序）
     modules = df['module'].unique().tolist()
 
-    # 创建图表
-    fig = go.Figure()
-
-    # 当前日期
-    today = datetime(2026, 2, 9)  # 使用指定的当前日期
-
     # 为每个模块创建任务条
-    y_positions = {}
     y_counter = 0
 
     for module in reversed(modules):  # 反转以使第一个模块在顶部
@@ -480,94 +678,219 @@ def create_gantt_chart():
             task_name = task['task']
             y_label = f"{module}<br>  └ {task_name}" if not task['is_milestone'] else f"{module}<br>  ◆ {task_name}"
 
-            if not task['is_milestone']:
-                # 任务条
-                duration = (task['end'] - task['start']).days
-                if duration == 0:
-                    duration = 1
-
-                # 悬停信息
-                hover_text = (
-                    f"<b>{module}</b><br>"
-                    f"<b>任务:</b> {task_name}<br>"
-                    f"<b>开始:</b> {task['start'].strftime('%Y-%m-%d')}<br>"
-                    f"<b>结束:</b> {task['end'].strftime('%Y-%m-%d')}<br>"
-                    f"<b>负责人:</b> {task['owner']}<br>"
-                    f"<b>进度:</b> {task['progress']}%"
-                )
-
-                # 背景条（总长度）
-                fig.add_trace(go.Bar(
-                    x=[duration],
-                    y=[y_label],
-                    orientation='h',
-                    base=task['start'],
-                    marker=dict(
-                        color=COLORS[phase]['bar_light'],
-                        line=dict(width=0)
-                    ),
-                    hoverinfo='skip',
-                    showlegend=False,
-                    name=f'{module} - {task_name} (背景)'
-                ))
-
-                # 进度条
-                progress_duration = duration * task['progress'] / 100
-                if progress_duration > 0:
-                    fig.add_trace(go.Bar(
-                        x=[progress_duration],
-                        y=[y_label],
-                        orientation='h',
-                        base=task['start'],
-                        marker=dict(
-                            color=COLORS[phase]['bar'],
-                            line=dict(width=0)
-                        ),
-                        hovertemplate=hover_text + "<extra></extra>",
-                        showlegend=False,
-                        name=f'{module} - {task_name}'
-                    ))
-                else:
-                    # 添加一个透明的trace用于hover
-                    fig.add_trace(go.Bar(
-                        x=[duration],
-                        y=[y_label],
-                        orientation='h',
-                        base=task['start'],
-                        marker=dict(
-                            color='rgba(0,0,0,0)',
-                        ),
-                        hovertemplate=hover_text + "<extra></extra>",
-                        showlegend=False,
-                        name=f'{module} - {task_name} (hover)'
-                    ))
-            else:
-                # 里程碑标记（菱形）
-                hover_text = (
-                    f"<b>🎯 里程碑</b><br>"
-                    f"<b>{module}</b><br>"
-                    f"<b>{task_name}</b><br>"
-                    f"<b>日期:</b> {task['start'].strftime('%Y-%m-%d')}<br>"
-                    f"<b>负责人:</b> {task['owner']}"
-                )
-
-                fig.add_trace(go.Scatter(
-                    x=[task['start']],
-                    y=[y_label],
-                    mode='markers',
-                    marker=dict(
-                        symbol='diamond',
-                        size=14,
-                        color=COLORS['milestone_marker'],
-                        line=dict(width=2, color='rgba(255, 160, 0, 1)')
-                    ),
-                    hovertemplate=hover_text + "<extra></extra>",
-                    showlegend=False,
-                    name=f'{module} - {task_name} (里程碑)'
-                ))
-
+            add_task_traces(
+                fig, y_label, module, task_name, task['start'], task['end'],
+                task['owner'], task['progress'], phase, task['is_milestone'],
+                task['work_days'], task['progress_end'], task.get('planned_progress'),
+                risk.tasks.get((module, task_name)) if risk is not None and task['is_milestone'] else None,
+            )
             y_counter += 1
 
+    return y_counter
+
+
+def add_tree_rows(fig, tree, collapsed=None, today=None, risk=None):
+    """
+    层级数据：按先序逐行渲染可见节点，返回行数
+
+    y 轴使用数值行号 + ticktext，避免不同分支下同名任务的标签冲突
+    """
+    if collapsed is None:
+        collapsed = tree.closed_nodes()
+    rows = tree.visible(collapsed)
+    labels = []
+
+    # 可见行的工作日字段整列计算（分组节点取汇总起止与进度）
+    spans = []
+    for node in rows:
+        if tree.is_leaf(node):
+            record = tree.records[node]
+            spans.append((record['start'], record['end'], record['progress'], record['owner']))
+        else:
+            summary = tree.rollup(node)
+            spans.append((summary['start'].isoformat(), summary['end'].isoformat(), summary['progress'], ''))
+    calendar = pd.DataFrame(spans, columns=['start', 'end', 'progress', 'owner'])
+    calendar['start'] = pd.to_datetime(calendar['start'])
+    calendar['end'] = pd.to_datetime(calendar['end'])
+    calendar = apply_calendar(calendar, today)
+    work_days = calendar['work_days'].tolist()
+    progress_end = list(calendar['progress_end'])
+    planned = calendar['planned_progress'].tolist() if today is not None else [None] * len(rows)
+
+    for pos, node in enumerate(rows):
+        record = tree.records[node]
+        y = len(rows) - 1 - pos
+        indent = '　' * tree.depth[node]
+        phase = record['phase']
+
+        if tree.is_leaf(node):
+            marker = '◆' if record['is_milestone'] else '└'
+            labels.append(f"{indent}{marker} {record['task']}")
+            add_task_traces(
+                fig, y, record['module'], record['task'],
+                pd.Timestamp(record['start']), pd.Timestamp(record['end']),
+                record['owner'], record['progress'], phase, record['is_milestone'],
+                work_days[pos], progress_end[pos], planned[pos],
+                risk.tasks.get((record['module'], record['task']))
+                if risk is not None and record['is_milestone'] else None,
+            )
+            continue
+
+        # 分组节点：汇总条（起止取子树叶子任务的最早/最晚日期）
+        summary = tree.rollup(node)
+        marker = '▸' if node in collapsed else '▾'
+        labels.append(f"{indent}<b>{marker} {record['task']}</b>")
+        start = pd.Timestamp(summary['start'])
+        duration = max((summary['end'] - summary['start']).days, 1)
+        hover_text = (
+            f"<b>{record['task']}</b><br>"
+            f"<b>开始:</b> {summary['start'].strftime('%Y-%m-%d')}<br>"
+            f"<b>结束:</b> {summary['end'].strftime('%Y-%m-%d')}<br>"
+            f"<b>负责人:</b> {', '.join(summary['owners'])}<br>"
+            f"<b>平均进度:</b> {summary['progress']:.0f}%<br>"
+            f"<b>子任务:</b> {summary['leaf_count']}"
+        ) + calendar_hover(work_days[pos], planned[pos])
+        fig.add_trace(Bar(
+            x=[duration * MS_PER_DAY],
+            y=[y],
+            orientation='h',
+            base=start,
+            marker=dict(
+                color=COLORS[phase]['bar_light'],
+                line=dict(width=1, color=COLORS[phase]['bar'])
+            ),
+            hovertemplate=hover_text + "<extra></extra>",
+            showlegend=False,
+            name=record['task'],
+        ))
+        fig.add_trace(Bar(
+            x=[min((progress_end[pos] - start).days, duration) * MS_PER_DAY],
+            y=[y],
+            orientation='h',
+            base=start,
+            marker=dict(color=COLORS[phase]['bar']),
+            hoverinfo='skip',
+            showlegend=False,
+            name=f"{record['task']} (进度)",
+        ))
+
+    fig.update_yaxes(
+        tickmode='array',
+        tickvals=list(range(len(rows))),
+        ticktext=list(reversed(labels)),
+        range=[-0.5, len(rows) - 0.5],
+    )
+    return len(rows)
+
+
+def add_link_traces(fig, tree, links, collapsed=None):
+    """
+    完成-开始依赖连线：前置任务条末端 -> 后续任务条起点的折线，返回绘制的连线数
+
+    所有连线的路径按列一次算出，用 None 分隔后合成一条折线 trace，箭头合成一条标记 trace
+    （每条连线一个 shape / annotation 时，几百条就会明显卡顿）。
+    路径：向右伸出 -> 竖直到两行之间 -> 水平到后续任务左侧 -> 竖直到后续任务行 -> 向右进入；
+    后续任务开始得足够晚时两段水平线重合，即普通的直角折线。端点不在可见行（被折叠 / 过滤）的连线跳过。
+    """
+    if collapsed is None:
+        collapsed = tree.closed_nodes()
+    rows = tree.visible(collapsed)
+    row_of = {tree.records[node]['id']: pos for pos, node in enumerate(rows)}
+
+    pairs = []
+    for link in links:
+        src = row_of.get(str(link.get('source')))
+        dst = row_of.get(str(link.get('target')))
+        if src is not None and dst is not None and src != dst and link.get('type') in FINISH_TO_START:
+            pairs.append((src, dst))
+    if not pairs:
+        return 0
+
+    # 可见行的任务条起止（毫秒）：叶子取记录日期，分组取汇总日期
+    starts = np.empty(len(rows), dtype=np.int64)
+    ends = np.empty(len(rows), dtype=np.int64)
+    for pos, node in enumerate(rows):
+        if tree.is_leaf(node):
+            record = tree.records[node]
+            start, end, milestone = record['start'], record['end'], record['is_milestone']
+        else:
+            summary = tree.rollup(node)
+            start, end, milestone = summary['start'].isoformat(), summary['end'].isoformat(), False
+        starts[pos] = np.datetime64(start[:10], 'D').astype(np.int64)
+        # 任务条长度与 add_task_traces 一致：至少 1 天；里程碑画在当天
+        ends[pos] = starts[pos] if milestone else max(np.datetime64(end[:10], 'D').astype(np.int64), starts[pos] + 1)
+    starts *= MS_PER_DAY
+    ends *= MS_PER_DAY
+
+    src, dst = np.array(pairs, dtype=np.int64).T
+    gap = LINK_GAP_DAYS * MS_PER_DAY
+    x_from = ends[src]
+    x_to = starts[dst]
+    y_from = (len(rows) - 1 - src).astype(float)
+    y_to = (len(rows) - 1 - dst).astype(float)
+
+    # 后续任务开始得晚：在前置任务末端外侧直接拐向目标行；否则在两行之间横向折回
+    forward = x_to >= x_from + 2 * gap
+    elbow_out = x_from + gap
+    elbow_in = np.where(forward, elbow_out, x_to - gap)
+    y_between = np.where(forward, y_to, y_to + np.where(y_from > y_to, 0.5, -0.5))
+
+    xs = np.column_stack([x_from, elbow_out, elbow_out, elbow_in, elbow_in, x_to, np.full(len(src), np.nan)])
+    ys = np.column_stack([y_from, y_from, y_between, y_between, y_to, y_to, np.full(len(src), np.nan)])
+
+    fig.add_trace(Scatter(
+        x=xs.ravel(),
+        y=ys.ravel(),
+        mode='lines',
+        line=dict(color=COLORS['link'], width=1),
+        hoverinfo='skip',
+        showlegend=False,
+        name='依赖连线',
+    ))
+    names = [tree.records[rows[i]]['task'] for i in range(len(rows))]
+    fig.add_trace(Scatter(
+        x=x_to,
+        y=y_to,
+        mode='markers',
+        marker=dict(symbol='triangle-right', size=7, color=COLORS['link']),
+        hovertext=[f"{names[a]} → {names[b]}" for a, b in pairs],
+        hoverinfo='text',
+        showlegend=False,
+        name='依赖箭头',
+    ))
+    return len(pairs)
+
+
+def create_gantt_chart(tree=None, collapsed=None, tasks=None, risk=None, links=None, today=None, axis=None):
+    """
+    生成交互式甘特图
+
+    tree: 任务层级索引（backend.task_tree.TaskTree，列式快照为 backend.plan_columns.ColumnTree），提供时按任意深度渲染
+    collapsed: 收起的节点下标集合，默认取记录中 open=False 的分组
+    tasks: 扁平任务列表（如分面过滤后的子集），默认 tasks_list
+    risk: 进度风险模拟结果（backend.schedule_risk.simulate），叠加里程碑的 P50-P95 区间
+    links: 任务依赖（DHTMLX links / task_links），按层级渲染时画出完成-开始连线
+    today: 当前日期（datetime），默认 TODAY
+    axis: 横轴设置 {'range', 'dtick'[, 'tickformat']}（backend.portfolio.time_axis），默认 TIME_AXIS
+    """
+
+    # 创建图表
+    fig = Figure()
+
+    # 当前日期与时间轴
+    today = TODAY if today is None else today
+    axis = TIME_AXIS if axis is None else axis
+
+    if tree is not None:
+        y_counter = add_tree_rows(fig, tree, collapsed, today, risk)
+        if links:
+            add_link_traces(fig, tree, links, collapsed)
+    else:
+        y_counter = add_module_rows(fig, tasks_list if tasks is None else tasks, today, risk)
+
+    if risk is not None:
+        add_risk_bands(fig, risk)
+
     # 添加总里程碑标注
     for ms in milestones:
         ms_date = datetime.strptime(ms['date'], '%Y-%m-%d')
@@ -614,9 +937,9 @@ def create_gantt_chart():
         xaxis=dict(
             title="时间轴",
             type='date',
-            tickformat='%Y-%m',
-            dtick='M1',
-            range=['2026-01-01', '2027-01-15'],
+            tickformat=axis.get('tickformat', '%Y-%m'),
+            dtick=axis['dtick'],
+            range=axis['range'],
             gridcolor=COLORS['grid'],
             showline=True,
             linecolor=COLORS['grid'],
@@ -642,59 +965,71 @@ def create_gantt_chart():
     )
 
     # 添加图例说明
-    fig.add_trace(go.Bar(
+    fig.add_trace(Bar(
         x=[None], y=[None],
         marker=dict(color=COLORS['H1']['bar']),
         name='H1 增长飞轮 (1-6月)',
         showlegend=True
     ))
-    fig.add_trace(go.Bar(
+    fig.add_trace(Bar(
         x=[None], y=[None],
         marker=dict(color=COLORS['H2']['bar']),
         name='H2 效率利剑 (7-12月)',
         showlegend=True
     ))
-    fig.add_trace(go.Scatter(
+    fig.add_trace(Scatter(
         x=[None], y=[None],
         mode='markers',
         marker=dict(symbol='diamond', size=12, color=COLORS['milestone_marker']),
         name='里程碑',
         showlegend=True
     ))
+    if risk is not None:
+        fig.add_trace(Scatter(
+            x=[None], y=[None],
+            mode='lines',
+            line=dict(color=COLORS['risk_line'], width=6),
+            name=f'里程碑 P50-P95 ({risk.samples} 次模拟)',
+            showlegend=True
+        ))
 
     return fig
 
 
-def create_module_summary_chart():
-    """创建模块概览图（第一层级视图）"""
+def create_module_summary_chart(rollup=None, weighted_progress=False, today=None, axis=None):
+    """
+    创建模块概览图（第一层级视图）
 
-    df = pd.DataFrame(tasks_list)
-    df['start'] = pd.to_datetime(df['start'])
-    df['end'] = pd.to_datetime(df['end'])
+    rollup: 共享的模块汇总结构（默认由 tasks_list 构建）
+    weighted_progress: 模块进度按任务工期加权
+    today / axis: 当前日期与横轴设置，默认 TODAY / TIME_AXIS
+    """
 
-    # 按模块汇总
-    module_summary = df.groupby('module').agg({
-        'start': 'min',
-        'end': 'max',
-        'progress': 'mean',
-        'phase': 'first',
-        'owner': lambda x: ', '.join(x.unique())
-    }).reset_index()
-
-    # 保持模块顺序
-    module_order = [
-        "AI 客服 (7x24h)", "产品智能推荐", "订单进度查询",
-        "AI 商机识别", "智能问数助手",
-        "内部知识库", "AI 补货提醒", "AI 付款提示",
-        "AI 合同审核", "AI 用户行为分析", "AI 系统监控告警"
-    ]
-    module_summary['order'] = module_summary['module'].apply(lambda x: module_order.index(x) if x in module_order else 999)
-    module_summary = module_summary.sort_values('order', ascending=False)
+    if rollup is None:
+        rollup = Rollup(tasks_list)
 
-    fig = go.Figure()
-    today = datetime(2026, 2, 9)
+    # 模块顺序取自任务数据中的出现顺序，反转以使第一个模块在顶部
+    module_summary = [
+        rollup.summary('module', module, weighted=weighted_progress)
+        for module in reversed(rollup.keys('module'))
+    ]
 
-    for _, row in module_summary.iterrows():
+    fig = Figure()
+    axis_title = "时间轴 (2026)" if axis is None else "时间轴"
+    today = TODAY if today is None else today
+    axis = TIME_AXIS if axis is None else axis
+
+    calendar = apply_calendar(pd.DataFrame({
+        'start': pd.to_datetime([row['start'] for row in module_summary]),
+        'end': pd.to_datetime([row['end'] for row in module_summary]),
+        'progress': [row['progress'] for row in module_summary],
+    }), today)
+
+    for row, work_days, progress_end, planned in zip(
+            module_summary, calendar['work_days'], calendar['progress_end'], calendar['planned_progress']):
+        row['start'] = datetime.combine(row['start'], datetime.min.time())
+        row['end'] = datetime.combine(row['end'], datetime.min.time())
+        row['owner'] = ', '.join(row['owners'])
         duration = (row['end'] - row['start']).days
         phase = row['phase']
 
@@ -704,13 +1039,14 @@ def create_module_summary_chart():
             f"<b>开始:</b> {row['start'].strftime('%Y-%m-%d')}<br>"
             f"<b>结束:</b> {row['end'].strftime('%Y-%m-%d')}<br>"
             f"<b>负责人:</b> {row['owner']}<br>"
-            f"<b>平均进度:</b> {row['progress']:.0f}%<br>"
+            f"<b>平均进度:</b> {row['progress']:.0f}%"
+            f"{calendar_hover(work_days, planned)}<br>"
             f"<i>点击查看详细任务</i>"
         )
 
         # 背景条
-        fig.add_trace(go.Bar(
-            x=[duration],
+        fig.add_trace(Bar(
+            x=[duration * MS_PER_DAY],
             y=[row['module']],
             orientation='h',
             base=row['start'],
@@ -723,10 +1059,10 @@ def create_module_summary_chart():
         ))
 
         # 进度条
-        progress_duration = duration * row['progress'] / 100
+        progress_duration = min((progress_end - row['start']).days, duration)
         if progress_duration > 0:
-            fig.add_trace(go.Bar(
-                x=[progress_duration],
+            fig.add_trace(Bar(
+                x=[progress_duration * MS_PER_DAY],
                 y=[row['module']],
                 orientation='h',
                 base=row['start'],
@@ -776,17 +1112,435 @@ def create_module_summary_chart():
         font=dict(family="system-ui, -apple-system, sans-serif", color=COLORS['text']),
         height=600,
         margin=dict(l=200, r=50, t=120, b=80),
+        xaxis=dict(
+            title=axis_title,
+            type='date',
+            tickformat=axis.get('tickformat', '%m月'),
+            dtick=axis['dtick'],
+            range=axis['range'],
+            gridcolor=COLORS['grid'],
+        ),
+        yaxis=dict(
+            title="",
+            tickfont=dict(size=12),
+            gridcolor=COLORS['grid'],
+        ),
+        hoverlabel=dict(
+            bgcolor='white',
+            font_size=12,
+        ),
+    )
+
+    # 图例
+    fig.add_trace(Bar(x=[None], y=[None], marker=dict(color=COLORS['H1']['bar']), name='H1 增长飞轮', showlegend=True))
+    fig.add_trace(Bar(x=[None], y=[None], marker=dict(color=COLORS['H2']['bar']), name='H2 效率利剑', showlegend=True))
+
+    return fig
+
+
+def create_earned_value_chart(tasks=None, history=None, today=None):
+    """
+    创建挣值 / 燃起图：范围、计划值 (PV)、挣值 (EV) 的逐日累计曲线（单位: 人天）
+
+    tasks: 任务记录（默认 tasks_list）
+    history: 历史快照 [(日期, 任务记录), ...]，提供时 EV 按快照进度插值
+    today: 当前日期（datetime），默认 TODAY
+    下拉菜单切换 总计 / 阶段 / 模块
+    """
+    if tasks is None:
+        tasks = tasks_list
+    today = (TODAY if today is None else today).date()
+    series = earned_value(tasks, today, history or ())
+
+    # 逐日等距：横轴用 x0 + dx 代替日期数组，纵轴保留 1 位小数（与悬停精度一致），EV 截到今日；
+    # 范围在分组内是常数，只画首尾两点
+    x0 = series.days[0].isoformat()
+    ev_days = series.today_index + 1
+    span = (len(series.days) - 1) * MS_PER_DAY
+
+    def group_ys(field, value):
+        curves = series.group(field, value)
+        return [
+            [round(float(curves['scope'][0]), 1)] * 2,
+            curves['pv'].round(1).tolist(),
+            curves['ev'][:ev_days].round(1).tolist(),
+        ]
+
+    # 只建一组三条曲线；下拉菜单切换分组时用 update 替换各曲线的 y，不按分组复制 trace
+    fig = Figure()
+    initial = group_ys(*series.groups[0])
+    for y, (key, name, dash, dx) in zip(initial, (('scope', '范围', 'dot', span),
+                                                  ('pv', '计划值 PV', 'dash', MS_PER_DAY),
+                                                  ('ev', '挣值 EV', 'solid', MS_PER_DAY))):
+        fig.add_trace(Scatter(
+            x0=x0,
+            dx=dx,
+            y=y,
+            mode='lines',
+            name=name,
+            line=dict(color=COLORS[{'scope': 'scope', 'pv': 'planned_value', 'ev': 'earned_value'}[key]],
+                      width=2, dash=dash),
+            hovertemplate=f"{name}: %{{y:.1f}} 人天<extra></extra>",
+        ))
+
+    buttons = []
+    for k, (field, value) in enumerate(series.groups):
+        ys = initial if k == 0 else group_ys(field, value)
+        label = value if field != 'phase' else f"{value} {'增长飞轮' if value == 'H1' else '效率利剑'}"
+        status = series.status(field, value)
+        spi = f"{status['spi']:.2f}" if status['spi'] is not None else '-'
+        buttons.append(dict(
+            label=label,
+            method='update',
+            args=[
+                {'y': ys},
+                {'title.text': f"<b>挣值 / 燃起</b> - {label}<br>"
+                               f"<sub>范围 {ys[0][0]:.0f} 人天 · 今日 PV {status['pv']:.0f} 人天 · "
+                               f"EV {status['ev']:.0f} 人天 · SPI {spi}</sub>"},
+            ],
+        ))
+
+    # 当前日期
+    fig.add_vline(
+        x=datetime.combine(today, datetime.min.time()).timestamp() * 1000,
+        line=dict(color=COLORS['today'], width=2, dash='dash'),
+        annotation=dict(
+            text=f"📍 今日",
+            font=dict(size=11, color=COLORS['today']),
+        )
+    )
+
+    fig.update_layout(
+        title=dict(
+            text=buttons[0]['args'][1]['title.text'],
+            font=dict(size=20, color=COLORS['text']),
+            x=0.5,
+        ),
+        updatemenus=[dict(buttons=buttons, direction='down', x=0, xanchor='left', y=1.15, yanchor='top')],
+        plot_bgcolor=COLORS['background'],
+        paper_bgcolor='white',
+        font=dict(family="system-ui, -apple-system, sans-serif", color=COLORS['text']),
+        height=600,
+        margin=dict(l=80, r=50, t=120, b=80),
+        hovermode='x unified',
         xaxis=dict(
             title="时间轴 (2026)",
             type='date',
             tickformat='%m月',
             dtick='M1',
-            range=['2026-01-01', '2027-01-15'],
+            gridcolor=COLORS['grid'],
+        ),
+        yaxis=dict(
+            title="工作量（人天）",
+            gridcolor=COLORS['grid'],
+            rangemode='tozero',
+        ),
+        hoverlabel=dict(
+            bgcolor='white',
+            font_size=12,
+        ),
+    )
+
+    return fig
+
+
+def phase_colors(phase):
+    """阶段配色，未知阶段按 H1"""
+    colors = COLORS.get(phase)
+    return colors if isinstance(colors, dict) else COLORS['H1']
+
+
+def replay_state(keyframes, frame=None):
+    """依次应用关键帧，返回第 frame 帧（默认最后一帧）时各行的取值"""
+    state = [[None] * len(keyframes['fields']) for _ in keyframes['rows']]
+    frames = keyframes['frames']
+    for keyframe in frames[:len(frames) if frame is None else frame + 1]:
+        for row, field, value in keyframe['changes']:
+            state[row][field] = value
+    return state
+
+
+def replay_bars(state):
+    """各行取值 [start, end, progress] -> (起点, 工期, 进度长度, 进度)；任务在该时刻不存在时全为 None"""
+    bars = []
+    for start, end, progress in state:
+        if start is None or end is None:
+            bars.append((None, None, None, None))
+            continue
+        duration = ((pd.Timestamp(end) - pd.Timestamp(start)).days + 1) * MS_PER_DAY
+        progress = progress or 0
+        bars.append((start, duration, duration * progress / 100, progress))
+    return bars
+
+
+def create_replay_chart(keyframes):
+    """
+    进度回放图：每个叶子任务一行，滑块选择记录时刻（backend.progress_log.ProgressLog.keyframes）
+
+    图表按最后一帧生成；页面脚本在滑块变化时按帧应用变更，只更新两条任务条 trace 与回放时刻线
+    """
+    rows = keyframes['rows']
+    frames = keyframes['frames']
+    fields = keyframes['fields']
+    dates = [value for keyframe in frames for _, field, value in keyframe['changes']
+             if fields[field] in ('start', 'end') and value is not None]
+    axis = time_axis(min(dates), max(dates))
+    bars = replay_bars(replay_state(keyframes))
+    labels = [f"{row['module']} / {row['task']}" if row['module'] and row['module'] != row['task'] else row['task']
+              for row in rows]
+    y = list(range(len(rows)))
+    moment = frames[-1]['ts']
+
+    fig = Figure()
+    fig.add_trace(Bar(
+        x=[b[1] for b in bars], y=y, base=[b[0] for b in bars], orientation='h',
+        marker=dict(color=[phase_colors(row['phase'])['bar_light'] for row in rows],
+                    line=dict(width=1, color=[phase_colors(row['phase'])['bar'] for row in rows])),
+        text=labels, customdata=[b[3] for b in bars], textposition='none',
+        hovertemplate="<b>%{text}</b><br><b>进度:</b> %{customdata}%<extra></extra>",
+        showlegend=False, name='计划',
+    ))
+    fig.add_trace(Bar(
+        x=[b[2] for b in bars], y=y, base=[b[0] for b in bars], orientation='h',
+        marker=dict(color=[phase_colors(row['phase'])['bar'] for row in rows]),
+        hoverinfo='skip', showlegend=False, name='进度',
+    ))
+
+    # 回放时刻（shapes[0] / annotations[0]，页面脚本随滑块移动）
+    fig.add_vline(
+        x=moment,
+        line=dict(color=COLORS['today'], width=2, dash='dash'),
+        annotation=dict(
+            text=f"⏱ {datetime.fromtimestamp(moment / 1000).strftime('%Y-%m-%d')}",
+            font=dict(size=11, color=COLORS['today']),
+            yanchor='bottom'
+        )
+    )
+
+    fig.update_layout(
+        title=dict(
+            text=f"<b>进度回放</b> - {len(frames)} 个记录时刻<br><sub>拖动滑块查看各时刻的任务进度</sub>",
+            font=dict(size=20, color=COLORS['text']),
+            x=0.5,
+        ),
+        barmode='overlay',
+        plot_bgcolor=COLORS['background'],
+        paper_bgcolor='white',
+        font=dict(family="system-ui, -apple-system, sans-serif", color=COLORS['text']),
+        height=max(600, len(rows) * 22 + 260),
+        margin=dict(l=300, r=50, t=120, b=140),
+        xaxis=dict(
+            title="时间轴",
+            type='date',
+            tickformat=axis['tickformat'],
+            dtick=axis['dtick'],
+            range=axis['range'],
             gridcolor=COLORS['grid'],
         ),
         yaxis=dict(
             title="",
-            tickfont=dict(size=12),
+            tickmode='array',
+            tickvals=y,
+            ticktext=labels,
+            range=[len(rows) - 0.5, -0.5],
+            automargin=True,
+            tickfont=dict(size=10),
+            gridcolor=COLORS['grid'],
+        ),
+        hoverlabel=dict(
+            bgcolor='white',
+            font_size=12,
+        ),
+        # 滑块只负责选择时刻（method='skip'），取值变化由页面脚本处理
+        sliders=[dict(
+            active=len(frames) - 1,
+            currentvalue=dict(prefix="回放时刻: "),
+            pad=dict(t=40),
+            steps=[
+                dict(method='skip', label=datetime.fromtimestamp(keyframe['ts'] / 1000).strftime('%Y-%m-%d %H:%M'))
+                for keyframe in frames
+            ],
+        )],
+    )
+    return fig
+
+
+def portfolio_label(name, expanded):
+    return f"<b>{'▾' if expanded else '▸'} {name}</b>"
+
+
+def create_portfolio_chart(projects, axis, today, expanded=()):
+    """
+    项目组合图：每个项目一组（项目汇总行 + 可展开的模块汇总行），里程碑画在项目行上
+
+    projects: 项目汇总列表（backend.portfolio.load_portfolio），不再逐任务渲染
+    axis / today: 全部项目共用的横轴设置与当前日期，只算一次
+    expanded: 初始展开的项目下标（True 为全部展开），其余项目只显示汇总行
+
+    各项目汇总行合成两条 trace（背景 + 进度），每个项目的模块行各两条，展开 / 收起只切换可见性。
+    返回 (fig, groups)，groups[i] = {'key', 'name', 'expanded', 'rows', 'labels', 'traces'} 供页面脚本使用
+    """
+    expanded = set(range(len(projects))) if expanded is True else set(expanded)
+    fig = Figure()
+
+    # 全部行（项目行在前，随后按项目顺序排列模块行）的工作日字段一次算出
+    spans = [(p['start'], p['end'], p['progress']) for p in projects]
+    spans += [(m['start'], m['end'], m['progress']) for p in projects for m in p['modules']]
+    calendar = pd.DataFrame(spans, columns=['start', 'end', 'progress'])
+    calendar['start'] = pd.to_datetime(calendar['start'])
+    calendar['end'] = pd.to_datetime(calendar['end'])
+    calendar = apply_calendar(calendar, today)
+    columns = list(zip(calendar['start'], calendar['end'], calendar['work_days'],
+                       calendar['progress_end'], calendar['planned_progress']))
+
+    def bars(rows):
+        """行 -> (起点, 工期, 进度长度) 列表，长度单位为毫秒"""
+        result = []
+        for start, end, work_days, progress_end, planned in rows:
+            duration = max((end - start).days, 1)
+            result.append((start, duration * MS_PER_DAY,
+                           max(min((progress_end - start).days, duration), 0) * MS_PER_DAY))
+        return result
+
+    # 项目汇总行
+    project_rows = columns[:len(projects)]
+    keys = [f"p{i}" for i in range(len(projects))]
+    hover = [
+        f"<b>{p['name']}</b><br>"
+        f"<b>开始:</b> {p['start']}<br>"
+        f"<b>结束:</b> {p['end']}<br>"
+        f"<b>任务 / 模块:</b> {p['task_count']} / {len(p['modules'])}<br>"
+        f"<b>平均进度:</b> {p['progress']:.0f}%（工期加权 {p['weighted_progress']:.0f}%）"
+        f"{calendar_hover(row[2], row[4])}<br>"
+        f"<i>点击展开 / 收起模块</i>"
+        for p, row in zip(projects, project_rows)
+    ]
+    spans = bars(project_rows)
+    fig.add_trace(Bar(
+        x=[s[1] for s in spans], y=keys, base=[s[0] for s in spans], orientation='h',
+        marker=dict(color=COLORS['project_bar_light'], line=dict(width=1, color=COLORS['project_bar'])),
+        hovertext=hover, hovertemplate="%{hovertext}<extra></extra>",
+        showlegend=False, name='项目',
+    ))
+    fig.add_trace(Bar(
+        x=[s[2] for s in spans], y=keys, base=[s[0] for s in spans], orientation='h',
+        marker=dict(color=COLORS['project_bar']),
+        hoverinfo='skip', showlegend=False, name='项目 (进度)',
+    ))
+
+    # 各项目的模块行：每个项目两条 trace，收起时隐藏
+    groups = []
+    offset = len(projects)
+    for i, project in enumerate(projects):
+        modules = project['modules']
+        rows = columns[offset:offset + len(modules)]
+        offset += len(modules)
+        row_keys = [f"p{i}.{j}" for j in range(len(modules))]
+        spans = bars(rows)
+        light = [phase_colors(m['phase'])['bar_light'] for m in modules]
+        solid = [phase_colors(m['phase'])['bar'] for m in modules]
+        hover = [
+            f"<b>{project['name']} / {m['module']}</b><br>"
+            f"<b>阶段:</b> {m['phase']}<br>"
+            f"<b>开始:</b> {m['start']}<br>"
+            f"<b>结束:</b> {m['end']}<br>"
+            f"<b>负责人:</b> {', '.join(m['owners'])}<br>"
+            f"<b>平均进度:</b> {m['progress']:.0f}%<br>"
+            f"<b>任务:</b> {m['task_count']}"
+            f"{calendar_hover(row[2], row[4])}"
+            for m, row in zip(modules, rows)
+        ]
+        visible = i in expanded
+        fig.add_trace(Bar(
+            x=[s[1] for s in spans], y=row_keys, base=[s[0] for s in spans], orientation='h',
+            marker=dict(color=light, line=dict(width=1, color=solid)),
+            hovertext=hover, hovertemplate="%{hovertext}<extra></extra>",
+            visible=visible, showlegend=False, name=project['name'],
+        ))
+        fig.add_trace(Bar(
+            x=[s[2] for s in spans], y=row_keys, base=[s[0] for s in spans], orientation='h',
+            marker=dict(color=solid),
+            hoverinfo='skip', visible=visible, showlegend=False, name=f"{project['name']} (进度)",
+        ))
+        groups.append({
+            'key': keys[i],
+            'name': project['name'],
+            'expanded': visible,
+            'rows': row_keys,
+            'labels': [f"　└ {m['module']}" for m in modules],
+            'traces': [len(fig.data) - 2, len(fig.data) - 1],
+        })
+
+    # 各项目的里程碑合成一条 trace，画在项目行上
+    points = [(keys[i], ms, p['name']) for i, p in enumerate(projects) for ms in p['milestones']]
+    if points:
+        fig.add_trace(Scatter(
+            x=[ms['date'] for _, ms, _ in points],
+            y=[key for key, _, _ in points],
+            mode='markers',
+            marker=dict(symbol='diamond', size=12, color=COLORS['milestone_marker'],
+                        line=dict(width=2, color='rgba(255, 160, 0, 1)')),
+            hovertext=[
+                f"<b>🎯 {name}</b><br><b>{ms['module']}</b><br><b>{ms['task']}</b><br><b>日期:</b> {ms['date']}"
+                for _, ms, name in points
+            ],
+            hovertemplate="%{hovertext}<extra></extra>",
+            showlegend=False,
+            name='里程碑',
+        ))
+
+    fig.add_vline(
+        x=today.timestamp() * 1000,  # 转换为毫秒时间戳
+        line=dict(color=COLORS['today'], width=2, dash='dash'),
+        annotation=dict(
+            text=f"📍 今日 ({today.strftime('%Y-%m-%d')})",
+            font=dict(size=11, color=COLORS['today']),
+            yanchor='bottom'
+        )
+    )
+
+    visible_keys, labels = [], []
+    for group in groups:
+        visible_keys.append(group['key'])
+        labels.append(portfolio_label(group['name'], group['expanded']))
+        if group['expanded']:
+            visible_keys += group['rows']
+            labels += group['labels']
+
+    fig.update_layout(
+        title=dict(
+            text=f"<b>项目组合</b> - {len(projects)} 个项目<br>"
+                 f"<sub>{axis['range'][0]} ~ {axis['range'][1]} | 点击项目行展开 / 收起模块</sub>",
+            font=dict(size=20, color=COLORS['text']),
+            x=0.5,
+        ),
+        barmode='overlay',
+        plot_bgcolor=COLORS['background'],
+        paper_bgcolor='white',
+        font=dict(family="system-ui, -apple-system, sans-serif", color=COLORS['text']),
+        height=portfolio_height(len(visible_keys)),
+        margin=dict(l=250, r=50, t=120, b=80),
+        xaxis=dict(
+            title="时间轴",
+            type='date',
+            tickformat=axis['tickformat'],
+            dtick=axis['dtick'],
+            range=axis['range'],
+            gridcolor=COLORS['grid'],
+            showline=True,
+            linecolor=COLORS['grid'],
+        ),
+        yaxis=dict(
+            title="",
+            type='category',
+            categoryorder='array',
+            categoryarray=visible_keys,
+            tickmode='array',
+            tickvals=visible_keys,
+            ticktext=labels,
+            autorange='reversed',
+            automargin=True,
+            tickfont=dict(size=11),
             gridcolor=COLORS['grid'],
         ),
         hoverlabel=dict(
@@ -796,68 +1550,69 @@ def create_module_summary_chart():
     )
 
     # 图例
-    fig.add_trace(go.Bar(x=[None], y=[None], marker=dict(color=COLORS['H1']['bar']), name='H1 增长飞轮', showlegend=True))
-    fig.add_trace(go.Bar(x=[None], y=[None], marker=dict(color=COLORS['H2']['bar']), name='H2 效率利剑', showlegend=True))
+    fig.add_trace(Bar(x=[None], y=[None], marker=dict(color=COLORS['project_bar']), name='项目', showlegend=True))
+    fig.add_trace(Bar(x=[None], y=[None], marker=dict(color=COLORS['H1']['bar']), name='H1 模块', showlegend=True))
+    fig.add_trace(Bar(x=[None], y=[None], marker=dict(color=COLORS['H2']['bar']), name='H2 模块', showlegend=True))
 
-    return fig
+    return fig, groups
 
 
-def generate_html():
-    """生成包含两层视图的交互式HTML"""
+def portfolio_height(rows):
+    """组合图高度随可见行数变化（页面脚本展开 / 收起时按同一规则调整）"""
+    return max(600, rows * PORTFOLIO_ROW_HEIGHT + 200)
 
-    fig_summary = create_module_summary_chart()
-    fig_detail = create_gantt_chart()
 
-    # 将两个图表合并到一个HTML中
-    html_content = f"""
-<!DOCTYPE html>
-<html lang="zh-CN">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>中源生物 AI 项目甘特图 2026</title>
-    <script src="https://cdn.plot.ly/plotly-latest.min.js"></script>
-    <style>
-        * {{
+OUTPUT_FILE = "AI_Project_Gantt_2026.html"
+PORTFOLIO_OUTPUT_FILE = "Portfolio_Gantt.html"
+
+
+def figures_path(output_file):
+    """HTML 对应的图表数据文件（热更新时页面只拉取此文件）"""
+    return os.path.splitext(output_file)[0] + '.figures.json'
+
+
+# 页面样式（单计划页与组合页共用）
+PAGE_STYLE = """\
+        * {
             margin: 0;
             padding: 0;
             box-sizing: border-box;
-        }}
-        body {{
+        }
+        body {
             font-family: system-ui, -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
             background: linear-gradient(135deg, #f5f7fa 0%, #e4e8ec 100%);
             min-height: 100vh;
             padding: 20px;
-        }}
-        .container {{
+        }
+        .container {
             max-width: 1600px;
             margin: 0 auto;
-        }}
-        .header {{
+        }
+        .header {
             text-align: center;
             padding: 30px 20px;
             background: white;
             border-radius: 16px;
             box-shadow: 0 2px 12px rgba(0,0,0,0.08);
             margin-bottom: 24px;
-        }}
-        .header h1 {{
+        }
+        .header h1 {
             color: #1a1a2e;
             font-size: 28px;
             font-weight: 600;
             margin-bottom: 8px;
-        }}
-        .header p {{
+        }
+        .header p {
             color: #666;
             font-size: 14px;
-        }}
-        .tabs {{
+        }
+        .tabs {
             display: flex;
             gap: 12px;
             margin-bottom: 20px;
             justify-content: center;
-        }}
-        .tab {{
+        }
+        .tab {
             padding: 12px 28px;
             border: none;
             border-radius: 8px;
@@ -868,29 +1623,29 @@ def generate_html():
             background: white;
             color: #666;
             box-shadow: 0 2px 8px rgba(0,0,0,0.06);
-        }}
-        .tab:hover {{
+        }
+        .tab:hover {
             transform: translateY(-1px);
             box-shadow: 0 4px 12px rgba(0,0,0,0.1);
-        }}
-        .tab.active {{
+        }
+        .tab.active {
             background: linear-gradient(135deg, #6395ed 0%, #5a85d9 100%);
             color: white;
-        }}
-        .chart-container {{
+        }
+        .chart-container {
             background: white;
             border-radius: 16px;
             padding: 20px;
             box-shadow: 0 2px 12px rgba(0,0,0,0.08);
             margin-bottom: 20px;
-        }}
-        .chart {{
+        }
+        .chart {
             display: none;
-        }}
-        .chart.active {{
+        }
+        .chart.active {
             display: block;
-        }}
-        .legend-bar {{
+        }
+        .legend-bar {
             display: flex;
             justify-content: center;
             gap: 32px;
@@ -899,55 +1654,161 @@ def generate_html():
             border-radius: 12px;
             margin-bottom: 20px;
             box-shadow: 0 2px 8px rgba(0,0,0,0.06);
-        }}
-        .legend-item {{
+        }
+        .legend-item {
             display: flex;
             align-items: center;
             gap: 8px;
             font-size: 13px;
             color: #555;
-        }}
-        .legend-color {{
+        }
+        .legend-color {
             width: 20px;
             height: 12px;
             border-radius: 3px;
-        }}
-        .legend-color.h1 {{ background: rgba(99, 149, 237, 0.8); }}
-        .legend-color.h2 {{ background: rgba(102, 187, 106, 0.8); }}
-        .legend-color.milestone {{ background: rgba(255, 193, 7, 1); width: 12px; height: 12px; transform: rotate(45deg); }}
-        .legend-color.today {{ background: transparent; border: 2px dashed rgba(239, 83, 80, 0.9); width: 0; height: 16px; }}
-        .footer {{
+        }
+        .legend-color.h1 { background: rgba(99, 149, 237, 0.8); }
+        .legend-color.h2 { background: rgba(102, 187, 106, 0.8); }
+        .legend-color.milestone { background: rgba(255, 193, 7, 1); width: 12px; height: 12px; transform: rotate(45deg); }
+        .legend-color.today { background: transparent; border: 2px dashed rgba(239, 83, 80, 0.9); width: 0; height: 16px; }
+        .footer {
             text-align: center;
             padding: 20px;
             color: #999;
             font-size: 12px;
-        }}
-        .stats {{
+        }
+        .stats {
             display: grid;
             grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
             gap: 16px;
             margin-bottom: 20px;
-        }}
-        .stat-card {{
+        }
+        .stat-card {
             background: white;
             padding: 20px;
             border-radius: 12px;
             box-shadow: 0 2px 8px rgba(0,0,0,0.06);
             text-align: center;
-        }}
-        .stat-value {{
+        }
+        .stat-value {
             font-size: 32px;
             font-weight: 600;
             color: #1a1a2e;
-        }}
-        .stat-label {{
+        }
+        .stat-label {
             font-size: 13px;
             color: #888;
             margin-top: 4px;
-        }}
-        .stat-card.h1 .stat-value {{ color: #6395ed; }}
-        .stat-card.h2 .stat-value {{ color: #66bb6a; }}
-    </style>
+        }
+        .stat-card.h1 .stat-value { color: #6395ed; }
+        .stat-card.h2 .stat-value { color: #66bb6a; }
+"""
+
+
+# 进度回放脚本：按帧应用关键帧中的变更，每 REPLAY_ANCHOR 帧缓存一次完整取值，向回拖动时从最近的缓存重放
+REPLAY_ANCHOR = 32
+REPLAY_SCRIPT = """
+    <script>
+        var replay = JSON.parse(document.getElementById('replay-frames').textContent);
+        var replayState = null;
+        var replayFrame = -1;
+        var replayAnchors = {};
+        var DAY_MS = 24 * 60 * 60 * 1000;
+
+        function replayCopy(state) {
+            return state.map(function (row) { return row.slice(); });
+        }
+
+        function replaySeek(frame) {
+            if (replayState === null || frame < replayFrame) {
+                var anchor = Math.floor(frame / %(anchor)d) * %(anchor)d;
+                while (anchor >= 0 && !replayAnchors[anchor]) anchor -= %(anchor)d;
+                if (anchor >= 0) {
+                    replayState = replayCopy(replayAnchors[anchor]);
+                    replayFrame = anchor;
+                } else {
+                    replayState = replay.rows.map(function () { return replay.fields.map(function () { return null; }); });
+                    replayFrame = -1;
+                }
+            }
+            while (replayFrame < frame) {
+                replayFrame++;
+                replay.frames[replayFrame].changes.forEach(function (c) { replayState[c[0]][c[1]] = c[2]; });
+                if (replayFrame %% %(anchor)d === 0 && !replayAnchors[replayFrame]) {
+                    replayAnchors[replayFrame] = replayCopy(replayState);
+                }
+            }
+            replayRender();
+        }
+
+        // 与 replay_bars 一致：工期含结束日，任务在该时刻不存在时不画
+        function replayRender() {
+            var base = [], length = [], done = [], progress = [];
+            replayState.forEach(function (row) {
+                if (row[0] === null || row[1] === null) {
+                    base.push(null); length.push(null); done.push(null); progress.push(null);
+                    return;
+                }
+                var duration = Date.parse(row[1]) - Date.parse(row[0]) + DAY_MS;
+                var value = row[2] || 0;
+                base.push(row[0]); length.push(duration); done.push(duration * value / 100); progress.push(value);
+            });
+            Plotly.restyle('replay-chart', {x: [length, done], base: [base, base], customdata: [progress, null]}, [0, 1]);
+            var ts = replay.frames[replayFrame].ts;
+            var day = new Date(ts);
+            Plotly.relayout('replay-chart', {
+                'shapes[0].x0': ts, 'shapes[0].x1': ts, 'annotations[0].x': ts,
+                'annotations[0].text': '⏱ ' + day.getFullYear() + '-' + ('0' + (day.getMonth() + 1)).slice(-2) +
+                    '-' + ('0' + day.getDate()).slice(-2)
+            });
+        }
+
+        afterPlot.replay = function () {
+            replaySeek(replay.frames.length - 1);
+            document.getElementById('replay-chart').on('plotly_sliderchange', function (e) {
+                replaySeek(e.slider.active);
+            });
+        };
+    </script>""" % {'anchor': REPLAY_ANCHOR}
+
+
+def generate_html(fig_summary=None, fig_detail=None, fig_ev=None, fig_replay=None, keyframes=None):
+    """
+    生成包含两层视图及挣值 / 燃起图的交互式HTML
+
+    fig_replay / keyframes: 进度回放图及其关键帧（create_replay_chart），提供时增加“进度回放”标签页
+    """
+
+    if fig_summary is None:
+        fig_summary = create_module_summary_chart()
+    if fig_detail is None:
+        fig_detail = create_gantt_chart()
+    if fig_ev is None:
+        fig_ev = create_earned_value_chart()
+
+    replay_tab = replay_chart = replay_data = replay_script = ''
+    if fig_replay is not None:
+        replay_tab = """
+            <button class="tab" onclick="showChart('replay')">进度回放</button>"""
+        replay_chart = """
+            <div id="replay-chart" class="chart"></div>"""
+        frames_json = json.dumps(keyframes, ensure_ascii=False, separators=(',', ':')).replace('</', '<\\/')
+        replay_data = f"""
+    <script type="application/json" id="replay-data">{fig_replay.to_json()}</script>
+    <script type="application/json" id="replay-frames">{frames_json}</script>"""
+        replay_script = REPLAY_SCRIPT
+
+    # 将两个图表合并到一个HTML中
+    html_content = f"""
+<!DOCTYPE html>
+<html lang="zh-CN">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>中源生物 AI 项目甘特图 2026</title>
+    <script src="https://cdn.plot.ly/plotly-latest.min.js"></script>
+    <style>
+{PAGE_STYLE}    </style>
 </head>
 <body>
     <div class="container">
@@ -997,11 +1858,13 @@ def generate_html():
         <div class="tabs">
             <button class="tab active" onclick="showChart('summary')">模块概览</button>
             <button class="tab" onclick="showChart('detail')">详细任务</button>
+            <button class="tab" onclick="showChart('ev')">挣值 / 燃起</button>{replay_tab}
         </div>
 
         <div class="chart-container">
             <div id="summary-chart" class="chart active"></div>
             <div id="detail-chart" class="chart"></div>
+            <div id="ev-chart" class="chart"></div>{replay_chart}
         </div>
 
         <div class="footer">
@@ -1009,14 +1872,40 @@ def generate_html():
         </div>
     </div>
 
+    <!-- 图表数据：浏览器不执行 application/json，首次切换到对应标签页时才解析并绘制 -->
+    <script type="application/json" id="summary-data">{fig_summary.to_json()}</script>
+    <script type="application/json" id="detail-data">{fig_detail.to_json()}</script>
+    <script type="application/json" id="ev-data">{fig_ev.to_json()}</script>{replay_data}
+
     <script>
-        // 模块概览图
-        var summaryData = {fig_summary.to_json()};
-        Plotly.newPlot('summary-chart', summaryData.data, summaryData.layout, {{responsive: true}});
+        // 已绘制的图表；热更新拉取到、但标签页还没打开过的图表数据
+        var plotted = {{}};
+        var pending = {{}};
+        // 标签页首次绘制后的初始化（如进度回放）
+        var afterPlot = {{}};
+
+        function figureData(chartType) {{
+            if (pending[chartType]) {{
+                var fig = pending[chartType];
+                delete pending[chartType];
+                return fig;
+            }}
+            var payload = document.getElementById(chartType + '-data');
+            var data = JSON.parse(payload.textContent);
+            // 解析后释放原始文本
+            payload.textContent = '';
+            return data;
+        }}
+
+        function plotChart(chartType) {{
+            var fig = figureData(chartType);
+            Plotly.newPlot(chartType + '-chart', fig.data, fig.layout, {{responsive: true}});
+            plotted[chartType] = true;
+            if (afterPlot[chartType]) afterPlot[chartType]();
+        }}
 
-        // 详细任务图
-        var detailData = {fig_detail.to_json()};
-        Plotly.newPlot('detail-chart', detailData.data, detailData.layout, {{responsive: true}});
+        // 首屏只绘制模块概览图，打开速度与详细任务图的大小无关
+        plotChart('summary');
 
         function showChart(chartType) {{
             document.querySelectorAll('.chart').forEach(c => c.classList.remove('active'));
@@ -1025,10 +1914,37 @@ def generate_html():
             document.getElementById(chartType + '-chart').classList.add('active');
             event.target.classList.add('active');
 
-            // 触发resize以确保图表正确渲染
-            window.dispatchEvent(new Event('resize'));
+            if (plotted[chartType]) {{
+                // 隐藏期间窗口尺寸可能变化，只调整当前图表
+                Plotly.Plots.resize(chartType + '-chart');
+            }} else {{
+                // 首次显示：容器已可见，直接按当前尺寸绘制
+                plotChart(chartType);
+            }}
         }}
-    </script>
+
+        // 热更新：server.py --watch 通过 SSE 推送重新生成通知，只拉取图表数据原地刷新
+        // 已绘制的图表原地更新，未打开过的标签页保存新数据，打开时再绘制
+        if (window.EventSource && location.protocol.indexOf('http') === 0) {{
+            var source = new EventSource('/events');
+            source.addEventListener('reload', function (e) {{
+                var info = JSON.parse(e.data);
+                fetch(info.figures + '?v=' + info.version, {{cache: 'no-store'}})
+                    .then(function (r) {{ return r.json(); }})
+                    .then(function (figs) {{
+                        ['summary', 'detail', 'ev'].forEach(function (chartType) {{
+                            var fig = figs[chartType];
+                            if (!fig) return;
+                            if (plotted[chartType]) {{
+                                Plotly.react(chartType + '-chart', fig.data, fig.layout, {{responsive: true}});
+                            }} else {{
+                                pending[chartType] = fig;
+                            }}
+                        }});
+                    }});
+            }});
+        }}
+    </script>{replay_script}
 </body>
 </html>
 """
@@ -1036,27 +1952,311 @@ def generate_html():
     return html_content
 
 
-def main():
+def generate_portfolio_html(fig, groups, projects, title="项目组合甘特图"):
+    """项目组合页：单张组合图，点击项目行（或工具栏按钮）展开 / 收起模块"""
+    task_count = sum(p['task_count'] for p in projects)
+    milestone_count = sum(len(p['milestones']) for p in projects)
+    progress = sum(p['progress'] * p['task_count'] for p in projects) / task_count
+    groups_json = json.dumps(groups, ensure_ascii=False).replace('</', '<\\/')
+
+    return f"""
+<!DOCTYPE html>
+<html lang="zh-CN">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>{title}</title>
+    <script src="https://cdn.plot.ly/plotly-latest.min.js"></script>
+    <style>
+{PAGE_STYLE}    </style>
+</head>
+<body>
+    <div class="container">
+        <div class="header">
+            <h1>{title}</h1>
+            <p>{len(projects)} 个项目 | 共享时间轴与今日基准</p>
+        </div>
+
+        <div class="stats">
+            <div class="stat-card">
+                <div class="stat-value">{len(projects)}</div>
+                <div class="stat-label">项目数</div>
+            </div>
+            <div class="stat-card h1">
+                <div class="stat-value">{task_count}</div>
+                <div class="stat-label">任务总数</div>
+            </div>
+            <div class="stat-card">
+                <div class="stat-value">{milestone_count}</div>
+                <div class="stat-label">里程碑</div>
+            </div>
+            <div class="stat-card h2">
+                <div class="stat-value">{progress:.0f}%</div>
+                <div class="stat-label">平均进度</div>
+            </div>
+        </div>
+
+        <div class="tabs">
+            <button class="tab" onclick="setAll(true)">全部展开</button>
+            <button class="tab" onclick="setAll(false)">全部收起</button>
+        </div>
+
+        <div class="chart-container">
+            <div id="portfolio-chart"></div>
+        </div>
+
+        <div class="footer">
+            <p>生成时间: {datetime.now().strftime('%Y-%m-%d %H:%M')} | 数据来源: AI项目管理系统</p>
+        </div>
+    </div>
+
+    <script type="application/json" id="portfolio-data">{fig.to_json()}</script>
+    <script type="application/json" id="portfolio-groups">{groups_json}</script>
+
+    <script>
+        var chart = document.getElementById('portfolio-chart');
+        var groups = JSON.parse(document.getElementById('portfolio-groups').textContent);
+        var fig = JSON.parse(document.getElementById('portfolio-data').textContent);
+
+        // 可见行：项目行 + 已展开项目的模块行（与 create_portfolio_chart 的初始布局一致）
+        function rowLayout() {{
+            var keys = [], labels = [];
+            groups.forEach(function (g) {{
+                keys.push(g.key);
+                labels.push('<b>' + (g.expanded ? '▾ ' : '▸ ') + g.name + '</b>');
+                if (g.expanded) {{
+                    keys = keys.concat(g.rows);
+                    labels = labels.concat(g.labels);
+                }}
+            }});
+            return {{
+                'yaxis.categoryarray': keys,
+                'yaxis.tickvals': keys,
+                'yaxis.ticktext': labels,
+                height: Math.max(600, keys.length * {PORTFOLIO_ROW_HEIGHT} + 200)
+            }};
+        }}
+
+        // 只切换对应模块 trace 的可见性并调整 y 轴，不重新生成图表
+        function setExpanded(targets, expanded) {{
+            var traces = [];
+            targets.forEach(function (g) {{
+                g.expanded = expanded;
+                traces = traces.concat(g.traces);
+            }});
+            if (traces.length) {{
+                Plotly.update(chart, {{visible: expanded}}, rowLayout(), traces);
+            }}
+        }}
+
+        function setAll(expanded) {{
+            setExpanded(groups.filter(function (g) {{ return g.expanded !== expanded; }}), expanded);
+        }}
+
+        Plotly.newPlot(chart, fig.data, fig.layout, {{responsive: true}}).then(function () {{
+            chart.on('plotly_click', function (e) {{
+                var key = e.points[0].y;
+                var group = groups.find(function (g) {{ return g.key === key; }});
+                if (group) setExpanded([group], !group.expanded);
+            }});
+        }});
+    </script>
+</body>
+</html>
+"""
+
+
+def filter_tree(tree, filters):
+    """只保留满足分面过滤条件的叶子任务及其祖先分组，返回新的层级索引"""
+    leaves = [i for i in range(len(tree)) if tree.is_leaf(i)]
+    facets = FacetIndex([tree.records[i] for i in leaves])
+    keep = set()
+    for row in facets.rows(facets.resolve(filters)):
+        node = leaves[row]
+        keep.add(node)
+        keep.update(tree.ancestors(tree.records[node]['id']))
+    return TaskTree([r for i, r in enumerate(tree.records) if i in keep])
+
+
+def plan_tree(plan, filters=None):
+    """
+    计划 -> (层级索引, 叶子任务)，有过滤条件时只保留满足条件的叶子任务及其祖先
+
+    列式快照（ColumnRecords）按列建索引与过滤（ColumnTree），叶子任务也是 ColumnRecords
+    """
+    if isinstance(plan['tasks'], ColumnRecords):
+        tree = ColumnTree(plan['tasks'])
+        if filters:
+            tree = tree.filtered(tree.records.mask(filters))
+        return tree, tree.leaf_records()
+    tree = TaskTree(plan['tasks'])
+    if filters:
+        tree = filter_tree(tree, filters)
+    return tree, [r for i, r in enumerate(tree.records) if tree.is_leaf(i)]
+
+
+def rendered_tasks(plan=None, filters=None):
+    """图表实际渲染的任务：计划的叶子任务（无计划时为 tasks_list），按分面过滤"""
+    if plan is None:
+        return FacetIndex(tasks_list).select(filters) if filters else tasks_list
+    return plan_tree(plan, filters)[1]
+
+
+def build_outputs(output_file=OUTPUT_FILE, snapshot=None, filters=None, risk_samples=None, history=None, plan=None,
+                  validate=True, today=None, replay=None):
+    """
+    生成 HTML 及图表数据文件（另有预压缩的 .gz / .br），返回 HTML 路径
+
+    snapshot: 计划来源路径（DHTMLX 快照如 local_data.json、.gcol、gantt.db 等，见 load_plan），提供时按其任务层级渲染
+    filters: 分面过滤条件（backend.facet_index.FacetIndex.resolve 的格式），两张图只渲染满足条件的任务
+    risk_samples: Monte Carlo 样本数，提供时在详细图上叠加里程碑的 P50-P95 区间
+    history: 历史快照路径列表，提供时挣值曲线按各快照的进度计算
+    plan: 已读取的计划（load_plan 的结果），代替 snapshot 路径
+    validate: 渲染前先校验数据（backend.plan_validator），有错误时抛出 PlanValidationError；
+              调用方已校验过时可传 False
+    today: 当前日期（datetime），默认 TODAY
+    replay: 任务变更日志路径（backend.progress_log），提供时增加“进度回放”标签页（只嵌入关键帧）
+    """
+    phases = [k for k, v in COLORS.items() if isinstance(v, dict)]
+    risk = None
+    history = load_history(history) if history else None
+    if snapshot and plan is None:
+        plan = load_plan(snapshot)
+    if plan is not None:
+        if validate:
+            check_plan(plan['tasks'], milestones, phases)
+        tree, leaves = plan_tree(plan, filters)
+        if not leaves:
+            raise ValueError('没有符合过滤条件的任务')
+        if risk_samples:
+            risk = simulate(tree.records, plan['links'], milestones, risk_samples)
+        rollup = ColumnRollup(leaves) if isinstance(leaves, ColumnRecords) else Rollup(leaves)
+        fig_summary = create_module_summary_chart(rollup, today=today)
+        fig_detail = create_gantt_chart(tree=tree, risk=risk, links=plan['links'], today=today)
+        fig_ev = create_earned_value_chart(leaves, history, today)
+    else:
+        if validate:
+            check_plan(tasks_list, milestones, phases)
+        tasks = rendered_tasks(None, filters)
+        if not tasks:
+            raise ValueError('没有符合过滤条件的任务')
+        if risk_samples:
+            risk = simulate(records_from_tasks_list(tasks), (), milestones, risk_samples)
+        if filters:
+            fig_summary = create_module_summary_chart(Rollup(tasks), today=today)
+        else:
+            fig_summary = create_module_summary_chart(today=today)
+        fig_detail = create_gantt_chart(tasks=tasks, risk=risk, today=today)
+        fig_ev = create_earned_value_chart(tasks, history, today)
+
+    fig_replay = keyframes = None
+    if replay:
+        if not os.path.exists(replay):
+            raise ValueError(f'变更日志不存在: {replay}')
+        with ProgressLog(replay) as log:
+            keyframes = log.keyframes()
+        if not keyframes['frames']:
+            raise ValueError(f'变更日志为空: {replay}')
+        fig_replay = create_replay_chart(keyframes)
+
+    html_content = generate_html(fig_summary, fig_detail, fig_ev, fig_replay, keyframes)
+    figures_json = (f'{{"summary":{fig_summary.to_json()},"detail":{fig_detail.to_json()},'
+                    f'"ev":{fig_ev.to_json()}}}')
+
+    for path, content in ((output_file, html_content), (figures_path(output_file), figures_json)):
+        write_page(path, content)
+
+    return output_file
+
+
+def write_page(path, content):
+    """先写临时文件再替换，避免服务器读到写了一半的文件；随后写出预压缩的 .gz / .br"""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+    write_compressed(path, content)
+
+
+def build_portfolio(sources, output_file=PORTFOLIO_OUTPUT_FILE, today=None, title=None, expanded=(), validate=True):
+    """
+    生成项目组合 HTML，返回 (HTML 路径, 项目汇总列表, 汇总索引)
+
+    sources: 计划来源（目录、JSON 快照、.gcol、gantt.db、'tasks_list'）
+    today: 当前日期（datetime），默认取系统日期；全部项目共用
+    expanded: 初始展开的项目下标（True 为全部展开）
+    各项目的汇总取自索引文件（backend.portfolio.index_path），只有新增或变化的计划才重新读取；
+    读取或校验失败的计划被跳过，见 index.failures
+    """
+    projects, index = load_portfolio(sources, index_path(output_file), validate)
+    if today is None:
+        today = datetime.combine(datetime.now().date(), datetime.min.time())
+    fig, groups = create_portfolio_chart(projects, portfolio_axis(projects), today, expanded)
+    write_page(output_file, generate_portfolio_html(fig, groups, projects, title or "项目组合甘特图"))
+    return output_file, projects, index
+
+
+def main(argv=None):
     """主函数：生成并打开甘特图"""
-    print("🚀 正在生成 AI 项目甘特图...")
+    parser = argparse.ArgumentParser(description='生成 AI 项目甘特图 HTML')
+    parser.add_argument('-o', '--output',
+                        help=f'输出 HTML 路径（默认 {OUTPUT_FILE}，--portfolio 时默认 {PORTFOLIO_OUTPUT_FILE}）')
+    parser.add_argument('--no-open', action='store_true', help='生成后不自动打开浏览器')
+    parser.add_argument('--snapshot',
+                        help='从 DHTMLX 快照（如 local_data.json）、列式快照（.gcol）或 gantt.db（含 task_links 依赖）按任务层级渲染')
+    parser.add_argument('--filter', action='append', default=[], metavar='字段=取值',
+                        help=f"分面过滤（可重复，取值可逗号分隔），字段: {', '.join(FACET_FIELDS)}")
+    parser.add_argument('--facets', action='store_true', help='打印各分面取值的任务数')
+    parser.add_argument('--risk', type=int, nargs='?', const=10000, metavar='样本数',
+                        help='Monte Carlo 模拟里程碑日期并叠加 P50-P95 区间（默认 10000 个样本）')
+    parser.add_argument('--check-figures', action='store_true',
+                        help='调试：用 plotly 完整校验生成的图表，并确认与直接构建的结果一致')
+    parser.add_argument('--history', nargs='+', metavar='快照',
+                        help='历史快照（含 timestamp 的 DHTMLX JSON），挣值曲线按各快照的进度插值')
+    parser.add_argument('--today', type=datetime.fromisoformat, metavar='YYYY-MM-DD',
+                        help='今日基准线与计划进度的参考日期（默认 2026-02-09；--portfolio 时默认取系统日期）')
+    parser.add_argument('--replay', metavar='日志',
+                        help='任务变更日志（backend/progress_log.py record 生成），增加“进度回放”滑块标签页')
+    parser.add_argument('--portfolio', nargs='+', metavar='来源',
+                        help="项目组合模式：多个计划（目录、JSON 快照、.gcol、gantt.db 或 'tasks_list'）"
+                             "共用时间轴，按项目分组展开 / 收起")
+    parser.add_argument('--title', help='项目组合页标题')
+    parser.add_argument('--expand', action='store_true', help='项目组合图初始展开全部项目')
+    args = parser.parse_args(argv)
+
+    try:
+        filters = parse_filter_args(args.filter)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.check_figures:
+        from backend import figure_builder
+        figure_builder.VALIDATE = True
+
+    if args.portfolio:
+        return portfolio_main(args)
 
-    # 生成HTML
-    html_content = generate_html()
+    print("🚀 正在生成 AI 项目甘特图...")
 
-    # 保存文件
-    output_file = "AI_Project_Gantt_2026.html"
-    with open(output_file, 'w', encoding='utf-8') as f:
-        f.write(html_content)
+    # 生成并保存HTML（快照只读取一次，统计与分面计数共用）
+    try:
+        plan = load_plan(args.snapshot) if args.snapshot else None
+        output_file = build_outputs(args.output or OUTPUT_FILE, plan=plan, filters=filters, risk_samples=args.risk,
+                                    history=args.history, today=args.today, replay=args.replay)
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}")
+        return 1
 
     print(f"✅ 甘特图已生成: {output_file}")
 
     # 自动打开浏览器
-    file_path = os.path.abspath(output_file)
-    webbrowser.open(f'file://{file_path}')
-    print(f"🌐 已在浏览器中打开")
-
-    # 打印任务统计
-    df = pd.DataFrame(tasks_list)
+    if not args.no_open:
+        file_path = os.path.abspath(output_file)
+        webbrowser.open(f'file://{file_path}')
+        print(f"🌐 已在浏览器中打开")
+
+    # 打印任务统计（实际渲染的任务：快照的叶子任务，经分面过滤）
+    tasks = rendered_tasks(plan, filters)
+    df = tasks.frame(('phase', 'is_milestone')) if isinstance(tasks, ColumnRecords) else pd.DataFrame(tasks)
     print(f"\n📊 项目统计:")
     print(f"   - 总任务数: {len(df)}")
     print(f"   - H1 任务: {len(df[df['phase']=='H1'])}")
@@ -1064,6 +2264,34 @@ def main():
     print(f"   - 里程碑数: {len(df[df['is_milestone']==True])}")
     print(f"   - 总里程碑: {len(milestones)}")
 
+    if args.facets:
+        print(f"\n🔎 分面计数:")
+        for field, counts in FacetIndex(rendered_tasks(plan)).counts(filters).items():
+            print(f"   - {field}: " + ', '.join(f"{value} ({count})" for value, count in counts.items()))
+
+
+def portfolio_main(args):
+    """--portfolio：生成项目组合页"""
+    print("🚀 正在生成项目组合甘特图...")
+    started = time.perf_counter()
+    try:
+        output_file, projects, index = build_portfolio(args.portfolio, args.output or PORTFOLIO_OUTPUT_FILE,
+                                                       args.today, args.title, expanded=args.expand or ())
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}")
+        return 1
+    elapsed = time.perf_counter() - started
+
+    if index.failures:
+        print(format_failures(index.failures))
+    print(f"✅ 项目组合图已生成: {output_file}（{elapsed:.2f} s）")
+    print(f"   - 项目数: {len(projects)}（索引命中 {index.hits}，重新汇总 {index.misses}）")
+    print(f"   - 总任务数: {sum(p['task_count'] for p in projects)}")
+    if not args.no_open:
+        webbrowser.open(f'file://{os.path.abspath(output_file)}')
+        print(f"🌐 已在浏览器中打开")
+    return 0
+
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
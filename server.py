@@ -4,55 +4,368 @@
 端口: 3003
 """
 
+import argparse
+import asyncio
+import email.utils
 import http.server
+import importlib
+import queue
 import socketserver
 import os
+import sys
+import time
 import webbrowser
 from pathlib import Path
+from urllib.parse import urlsplit
+
+from backend.live_reload import EventBroadcaster, FileWatcher, KEEPALIVE_INTERVAL, SSE_KEEPALIVE
+from backend.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, metrics
+from backend.precompress import has_variants, select_variant
+from backend.query_api import QueryApi, etag_matches
+from backend.render_service import (
+    MAX_BODY_SIZE, RenderService, bad_content_length, body_too_large, parse_content_length,
+)
+from backend.search_index import SearchIndex
+from backend.task_index import TaskIndex
 
 PORT = 3003
 DIRECTORY = Path(__file__).parent
+GANTT_FILE = 'AI_Project_Gantt_2026.html'
+FIGURES_FILE = 'AI_Project_Gantt_2026.figures.json'
+
+# 热更新默认监听的计划源文件
+WATCH_SOURCES = [DIRECTORY / 'gantt_chart.py']
+
+
+# 全文检索索引跨数据版本复用，重新加载时只同步变化的任务
+search_index = SearchIndex()
+
+
+def build_task_index():
+    """从 gantt_chart.py 的任务数据构建内存索引"""
+    from gantt_chart import tasks_list, milestones
+    return TaskIndex(tasks_list, milestones, search_index)
+
+
+query_api = QueryApi(build_task_index)
+render_service = RenderService()
+broadcaster = EventBroadcaster()
+watch_enabled = False
+
+
+def regenerate(changed_paths=()):
+    """重新加载任务数据并生成 HTML，然后通过 SSE 通知所有已打开的页面"""
+    started = time.perf_counter()
+
+    module = sys.modules.get('gantt_chart')
+    gantt_chart = importlib.reload(module) if module else importlib.import_module('gantt_chart')
+    gantt_chart.build_outputs(str(DIRECTORY / GANTT_FILE))
+    query_api.reset()
+
+    elapsed = (time.perf_counter() - started) * 1000
+    metrics.render_finished('regenerate', elapsed / 1000)
+    broadcaster.publish('reload', {'version': query_api.version, 'figures': f'/{FIGURES_FILE}'})
+    names = ', '.join(Path(p).name for p in changed_paths)
+    print(f"🔄 {names} 已变化，重新生成耗时 {elapsed:.0f} ms，已通知 {broadcaster.subscriber_count} 个页面")
+
 
 class CustomHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
+    cache_control = 'no-store, no-cache, must-revalidate'
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, directory=str(DIRECTORY), **kwargs)
 
+    vary_encoding = False
+    # 指标：请求路径、状态码、发送字节数（handle_one_request 结束时记录）
+    started = None
+    route = ''
+    status = None
+    sent = 0
+    streaming = False
+
+    def parse_request(self):
+        ok = super().parse_request()
+        if ok:
+            self.started = metrics.request_started()
+            self.route = urlsplit(self.path).path
+        return ok
+
+    def handle_one_request(self):
+        self.started = None
+        self.status = None
+        self.sent = 0
+        self.streaming = False
+        try:
+            super().handle_one_request()
+        finally:
+            if self.started is not None:
+                sent = 0 if self.command == 'HEAD' else self.sent
+                metrics.request_finished(self.started, self.command, self.route, self.status or 0, sent,
+                                         self.streaming)
+
+    def send_response(self, code, message=None):
+        self.status = code
+        super().send_response(code, message)
+
+    def send_header(self, keyword, value):
+        if keyword.lower() == 'content-length':
+            self.sent += int(value)
+        super().send_header(keyword, value)
+
     def end_headers(self):
         # 添加CORS头，允许跨域访问
         self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Cache-Control', 'no-store, no-cache, must-revalidate')
+        self.send_header('Cache-Control', self.cache_control)
+        if self.vary_encoding:
+            self.send_header('Vary', 'Accept-Encoding')
         super().end_headers()
 
     def do_GET(self):
+        url = urlsplit(self.path)
+        if query_api.handles(url.path):
+            return self.send_api_response(url.path, url.query)
+        if url.path == '/events':
+            return self.send_event_stream()
+        if url.path == '/metrics':
+            return self.send_metrics()
+
         # 如果访问根路径，重定向到甘特图
         if self.path == '/':
             self.path = '/AI_Project_Gantt_2026.html'
         return super().do_GET()
 
-def main():
+    def do_POST(self):
+        url = urlsplit(self.path)
+        if not render_service.handles(url.path):
+            self.send_response(405)
+            self.send_header('Allow', 'GET, HEAD')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        length = parse_content_length(self.headers.get('Content-Length'))
+        if length is None:
+            # 长度未知，无法可靠读取请求体，响应后关闭连接
+            status, body, content_type, headers = bad_content_length()
+            self.close_connection = True
+        elif length > MAX_BODY_SIZE:
+            # 不读取过大的请求体，直接关闭连接
+            status, body, content_type, headers = body_too_large()
+            self.close_connection = True
+        else:
+            status, body, content_type, headers = render_service.handle(self.rfile.read(length), url.query)
+
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_head(self):
+        """有预压缩文件（.gz / .br）且客户端接受时直接发送，请求路径上不做压缩"""
+        path = self.translate_path(self.path)
+        if not os.path.isfile(path) or not has_variants(path):
+            return super().send_head()
+
+        self.vary_encoding = True
+        variant, encoding = select_variant(path, self.headers.get('Accept-Encoding'))
+        if variant is None:
+            return super().send_head()
+
+        f = open(variant, 'rb')
+        try:
+            stat = os.fstat(f.fileno())
+            since = self.headers.get('If-Modified-Since')
+            if since and not self.headers.get('If-None-Match'):
+                try:
+                    if int(stat.st_mtime) <= email.utils.parsedate_to_datetime(since).timestamp():
+                        self.send_response(304)
+                        self.end_headers()
+                        f.close()
+                        return None
+                except (TypeError, ValueError, IndexError, OverflowError):
+                    pass
+            self.send_response(200)
+            self.send_header('Content-Type', self.guess_type(path))
+            self.send_header('Content-Encoding', encoding)
+            self.send_header('Content-Length', str(stat.st_size))
+            self.send_header('Last-Modified', self.date_time_string(stat.st_mtime))
+            self.end_headers()
+            return f
+        except Exception:
+            f.close()
+            raise
+
+    def copyfile(self, source, outputfile):
+        """静态文件用 sendfile 零拷贝发送（不支持时 socket.sendfile 自动回退为 send）"""
+        try:
+            source.fileno()
+        except (AttributeError, OSError):
+            # 目录列表等内存内容
+            return super().copyfile(source, outputfile)
+        self.wfile.flush()
+        self.connection.sendfile(source)
+
+    def send_api_response(self, path, query):
+        """JSON 查询接口：缓存的响应 + ETag 条件请求"""
+        status, body, etag = query_api.handle(path, query)
+        # 允许浏览器缓存，但每次都需用 ETag 重新验证
+        self.cache_control = 'no-cache'
+
+        if etag_matches(etag, self.headers.get('If-None-Match')):
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        if etag:
+            self.send_header('ETag', etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_metrics(self):
+        body = metrics.render()
+        self.send_response(200)
+        self.send_header('Content-Type', METRICS_CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_event_stream(self):
+        """SSE 热更新通道；未开启 --watch 时返回 204，浏览器不会重连"""
+        if not watch_enabled:
+            self.send_response(204)
+            self.end_headers()
+            return
+
+        self.streaming = True
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.end_headers()
+
+        messages = queue.Queue()
+        listener = broadcaster.subscribe(messages.put)
+        try:
+            self.wfile.write(b'retry: 1000\n\n')
+            self.wfile.flush()
+            while True:
+                try:
+                    message = messages.get(timeout=KEEPALIVE_INTERVAL)
+                except queue.Empty:
+                    message = SSE_KEEPALIVE
+                self.wfile.write(message)
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            broadcaster.unsubscribe(listener)
+
+
+class ThreadingServer(socketserver.ThreadingTCPServer):
+    """每个连接一个线程（SSE 长连接不阻塞其他请求）"""
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+def print_banner(port, mode, watcher):
+    print(f"\n{'='*60}")
+    print(f"🚀 AI项目甘特图服务器已启动 ({mode})")
+    print(f"{'='*60}")
+    print(f"📊 访问地址: http://localhost:{port}")
+    print(f"📂 服务目录: {DIRECTORY}")
+    print(f"🔎 查询接口: /api/tasks, /api/modules, /api/milestones")
+    print(f"📈 运行指标: /metrics (Prometheus)")
+    print(f"🖼️  渲染接口: POST /render（{render_service.workers} 个进程，排队上限 {render_service.queue_limit}）")
+    if watcher:
+        print(f"👀 热更新: 监听 {', '.join(Path(p).name for p in watcher.paths)}")
+    print(f"\n按 Ctrl+C 停止服务器")
+    print(f"{'='*60}\n")
+
+
+def serve_threading(port, on_ready):
+    with ThreadingServer(("", port), CustomHTTPRequestHandler) as httpd:
+        on_ready()
+        try:
+            httpd.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+def serve_asyncio(port, on_ready):
+    from backend.async_server import AsyncGanttServer
+
+    server = AsyncGanttServer(
+        DIRECTORY, GANTT_FILE, query_api,
+        render_service=render_service,
+        broadcaster=broadcaster if watch_enabled else None,
+        extra_headers={
+            'Access-Control-Allow-Origin': '*',
+            'Cache-Control': CustomHTTPRequestHandler.cache_control,
+        },
+    )
+    asyncio.run(server.serve("", port, on_ready=on_ready))
+
+
+SERVE_MODES = {
+    'threading': serve_threading,
+    'asyncio': serve_asyncio,
+}
+
+
+def main(argv=None):
+    global watch_enabled
+
+    parser = argparse.ArgumentParser(description='AI 项目甘特图服务器')
+    parser.add_argument('--port', type=int, default=PORT, help='监听端口')
+    parser.add_argument('--mode', choices=sorted(SERVE_MODES), default='threading',
+                        help='服务模式: threading（每连接一线程）或 asyncio（HTTP/1.1 keep-alive）')
+    parser.add_argument('--watch', action='store_true', help='监听计划源文件变化并热更新页面')
+    parser.add_argument('--watch-path', action='append', default=[], help='额外监听的文件（可重复）')
+    parser.add_argument('--no-open', action='store_true', help='启动后不自动打开浏览器')
+    parser.add_argument('--render-workers', type=int, default=render_service.workers,
+                        help='POST /render 的渲染进程数')
+    parser.add_argument('--render-queue', type=int, default=render_service.queue_limit,
+                        help='POST /render 的排队上限，超出时返回 429')
+    parser.add_argument('--render-timeout', type=float, default=render_service.timeout,
+                        help='单个渲染任务的超时（秒）')
+    args = parser.parse_args(argv)
+    render_service.workers = args.render_workers
+    render_service.queue_limit = args.render_queue
+    render_service.timeout = args.render_timeout
+
     # 确保甘特图存在
-    gantt_file = DIRECTORY / 'AI_Project_Gantt_2026.html'
+    gantt_file = DIRECTORY / GANTT_FILE
     if not gantt_file.exists():
         print("⚠️  甘特图文件不存在，正在生成...")
-        os.system('python3 gantt_chart.py')
+        os.system(f'python3 gantt_chart.py --no-open -o "{gantt_file}"')
 
-    # 启动服务器
-    with socketserver.TCPServer(("", PORT), CustomHTTPRequestHandler) as httpd:
-        print(f"\n{'='*60}")
-        print(f"🚀 AI项目甘特图服务器已启动")
-        print(f"{'='*60}")
-        print(f"📊 访问地址: http://localhost:{PORT}")
-        print(f"📂 服务目录: {DIRECTORY}")
-        print(f"\n按 Ctrl+C 停止服务器")
-        print(f"{'='*60}\n")
+    watcher = None
+    if args.watch:
+        watch_enabled = True
+        watcher = FileWatcher(WATCH_SOURCES + [Path(p) for p in args.watch_path], regenerate)
+        watcher.start()
 
+    def on_ready():
+        print_banner(args.port, args.mode, watcher)
         # 自动打开浏览器
-        webbrowser.open(f'http://localhost:{PORT}')
+        if not args.no_open:
+            webbrowser.open(f'http://localhost:{args.port}')
+
+    # 启动服务器
+    try:
+        SERVE_MODES[args.mode](args.port, on_ready)
+    finally:
+        if watcher:
+            watcher.stop()
+        render_service.shutdown()
+        print("\n\n✅ 服务器已停止")
 
-        try:
-            httpd.serve_forever()
-        except KeyboardInterrupt:
-            print("\n\n✅ 服务器已停止")
 
 if __name__ == "__main__":
     main()